@@ -0,0 +1,286 @@
+"""
+Admission control and load shedding for the NexGenTeck AI Chatbot.
+
+- A bounded number of chat pipelines run at once (ADMISSION_MAX_IN_FLIGHT).
+  Requests beyond that wait in a short FIFO queue (ADMISSION_MAX_QUEUE) for
+  at most ADMISSION_QUEUE_TIMEOUT_MS, or less if their deadline is closer.
+- Each client has a token bucket (RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST).
+  Clients are identified by address; X-Forwarded-For is only believed when
+  it comes from one of TRUSTED_PROXIES.
+
+Rejections are fast: 429 when the client is over its rate, 503 when the queue
+is full or the wait ran out, both with a Retry-After estimate. Admitted
+requests keep good latency instead of every request slowing down together.
+Limits apply per worker process.
+"""
+
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Dict, Optional
+import asyncio
+import ipaddress
+import logging
+import math
+import time
+
+import numpy as np
+
+from config import config
+from deadlines import Deadline
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; carries the HTTP status and Retry-After seconds."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float):
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, rate: float, capacity: float) -> float:
+        """
+        Take one token.
+
+        Returns:
+            0 if a token was taken, else seconds until one is available
+        """
+        now = time.monotonic()
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+class AdmissionController:
+    """In-flight limit with a bounded wait queue, plus per-client rate limits."""
+
+    def __init__(self):
+        self._in_flight = 0
+        self._waiters: deque = deque()
+        self._buckets: "OrderedDict[str, _TokenBucket]" = OrderedDict()
+        self._waits = deque(maxlen=1000)
+        self._service_time = 1.0  # EWMA of seconds per admitted request
+        self.admitted = 0
+        self.queued = 0
+        self.rate_limited = 0
+        self.queue_full = 0
+        self.queue_timeouts = 0
+
+    def _check_rate(self, client_id: str):
+        """Take a token from the client's bucket or raise AdmissionRejected (429)."""
+        if config.RATE_LIMIT_PER_MINUTE <= 0:
+            return
+        rate = config.RATE_LIMIT_PER_MINUTE / 60
+        capacity = max(1, config.RATE_LIMIT_BURST)
+
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = self._buckets[client_id] = _TokenBucket(capacity)
+            # Forget the least recently seen clients (a full bucket is the default anyway)
+            while len(self._buckets) > config.RATE_LIMIT_MAX_CLIENTS:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(client_id)
+
+        wait = bucket.take(rate, capacity)
+        if wait > 0:
+            self.rate_limited += 1
+            raise AdmissionRejected(429, "Too many requests", math.ceil(wait))
+
+    def _retry_after(self) -> int:
+        """Seconds until the current queue is likely to have drained."""
+        slots = max(1, config.ADMISSION_MAX_IN_FLIGHT)
+        return max(1, math.ceil(self._service_time * (len(self._waiters) + 1) / slots))
+
+    async def _acquire(self, deadline: Optional[Deadline]):
+        """Take an in-flight slot, waiting in the queue if needed."""
+        if config.ADMISSION_MAX_IN_FLIGHT <= 0:
+            self._in_flight += 1
+            return
+
+        if self._in_flight < config.ADMISSION_MAX_IN_FLIGHT and not self._waiters:
+            self._in_flight += 1
+            self._waits.append(0.0)
+            return
+
+        if len(self._waiters) >= config.ADMISSION_MAX_QUEUE:
+            self.queue_full += 1
+            raise AdmissionRejected(503, "Server busy", self._retry_after())
+
+        # Wait no longer than the request could still use the slot
+        timeout = config.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+        if deadline is not None:
+            timeout = deadline.budget(config.ADMISSION_QUEUE_TIMEOUT_MS, config.GENERATION_RESERVE_MS)
+        if timeout <= 0:
+            self.queue_full += 1
+            raise AdmissionRejected(503, "Server busy", self._retry_after())
+
+        self.queued += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self.queue_timeouts += 1
+                raise AdmissionRejected(503, "Server busy", self._retry_after())
+            # The slot was handed over just as the wait ran out: keep it
+        except asyncio.CancelledError:
+            # Client went away while queued
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            raise
+        self._waits.append(time.monotonic() - started)
+
+    def _release(self):
+        """Hand the slot to the next waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, client_id: str, deadline: Optional[Deadline] = None, slot: bool = True,
+                    batch: bool = False):
+        """
+        Run a request under admission control.
+
+        Args:
+            client_id: Client identity for rate limiting (e.g. IP address)
+            deadline: Request deadline; queue waits never outlast its budget
+            slot: Whether the request takes an in-flight slot here (False when
+                the slot is taken later with hold_slot, e.g. by a coalesced run)
+            batch: One run of an admin /chat/batch request: takes a slot like a
+                chat, but no rate-limit token, and its time stays out of the
+                service-time estimate behind /chat's Retry-After
+
+        Raises:
+            AdmissionRejected: If the request is shed (429 or 503)
+
+        Usage:
+            async with admission.admit(client_id, deadline):
+                ...
+        """
+        if not batch:
+            self._check_rate(client_id)
+        if not slot:
+            self.admitted += 1
+            yield
+            return
+
+        async with self.hold_slot(deadline, batch=batch):
+            self.admitted += 1
+            yield
+
+    @asynccontextmanager
+    async def hold_slot(self, deadline: Optional[Deadline] = None, batch: bool = False):
+        """
+        Hold an in-flight slot, without a rate-limit check.
+
+        Used directly by the coalescer: only the leader of a shared run takes a
+        slot, decided in the same step that makes it the leader.
+
+        Args:
+            deadline: Request deadline; queue waits never outlast its budget
+            batch: Keep the run's time out of the service-time estimate
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait ran out (503)
+        """
+        await self._acquire(deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            if not batch:
+                self._service_time = 0.9 * self._service_time + 0.1 * (time.monotonic() - started)
+            self._release()
+
+    def stats(self) -> Dict:
+        """Admission statistics: current load, queue waits and rejections."""
+        waits = list(self._waits)
+        stats = {
+            'in_flight': self._in_flight,
+            'queue_depth': len(self._waiters),
+            'max_in_flight': config.ADMISSION_MAX_IN_FLIGHT,
+            'max_queue': config.ADMISSION_MAX_QUEUE,
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'rejected_rate_limited': self.rate_limited,
+            'rejected_queue_full': self.queue_full,
+            'rejected_queue_timeout': self.queue_timeouts,
+            'service_time_ms': round(self._service_time * 1000, 1),
+        }
+        for pct in (50, 95, 99):
+            stats[f'queue_wait_p{pct}_ms'] = round(float(np.percentile(waits, pct)) * 1000, 1) if waits else None
+        return stats
+
+
+_trusted_networks = [
+    ipaddress.ip_network(proxy.strip(), strict=False) for proxy in config.TRUSTED_PROXIES if proxy.strip()
+]
+
+
+@lru_cache(maxsize=4096)
+def _is_trusted_proxy(address: str) -> bool:
+    """Check whether an address belongs to TRUSTED_PROXIES."""
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _trusted_networks)
+
+
+def client_id_for(request) -> str:
+    """
+    Identify the client for rate limiting.
+
+    The peer address, unless the peer is a trusted proxy (TRUSTED_PROXIES):
+    then the nearest X-Forwarded-For address that isn't one of our proxies.
+    Anyone else's X-Forwarded-For is ignored, so a client can't pick a new
+    identity per request.
+
+    Args:
+        request: FastAPI Request (or WebSocket)
+
+    Returns:
+        Client identifier string
+    """
+    peer = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded or not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    # Proxies append the address they saw, so read from the right
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+# Singleton instance
+admission = AdmissionController()
@@ -0,0 +1,158 @@
+"""
+Batch question answering for the NexGenTeck AI Chatbot.
+
+Large question sets (FAQ regeneration, QA sweeps) go through answer_batch()
+instead of one /chat call per question. The local-model steps run once for
+the whole batch:
+- one RoBERTa sentiment pass (in SENTIMENT_BATCH_SIZE chunks)
+- one BGE-M3 encode of all messages
+- one batched vector search (the raw-message retrieval each pipeline run
+  would otherwise do itself)
+Each message then runs through the normal pipeline (intent, refinement
+search if needed, generation) with those results preset. At most
+BATCH_CONCURRENCY runs are in flight at a time; each run has its own
+deadline and takes its own admission slot, so a batch competes for capacity
+like that many /chat requests. Answers are yielded as each run finishes,
+not in input order. Repeated messages are answered once.
+"""
+
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from config import config
+from admission import AdmissionRejected, admission
+from deadlines import Deadline
+from embeddings import embedding_manager
+from vector_store import vector_store
+from sentiment import llm_analyzer
+from rag_pipeline import get_fallback_response, run_pipeline
+from resilience import answer_cache, normalize_message
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _batch_sentiment(messages: List[str]) -> List[Optional[Dict]]:
+    """RoBERTa sentiment for every message, in SENTIMENT_BATCH_SIZE chunks (None each if it failed)."""
+    results = []
+    try:
+        for chunk in _chunks(messages, max(1, config.SENTIMENT_BATCH_SIZE)):
+            results.extend(llm_analyzer.analyze_sentiment_batch(chunk))
+    except Exception as e:
+        logger.warning("Batch sentiment failed, runs will analyze individually: %s", e)
+        return [None] * len(messages)
+    return results
+
+
+def _batch_retrieve(messages: List[str]):
+    """
+    Embed every message in one encode call and search for all of them at once.
+
+    Returns:
+        (vectors, one prefetched {'query', 'results'} dict per message); None
+        entries where encoding or the search failed, so runs do their own
+    """
+    try:
+        vectors = embedding_manager.encode(messages)
+    except Exception as e:
+        logger.warning("Batch encode failed, runs will embed and search individually: %s", e)
+        return [None] * len(messages), [None] * len(messages)
+    try:
+        results = vector_store.search_batch(messages, n_results=config.MAX_CONTEXT_DOCS, query_vectors=vectors)
+    except Exception as e:
+        logger.warning("Batch retrieval failed, runs will search individually: %s", e)
+        return vectors, [None] * len(messages)
+    return vectors, [{'query': message, 'results': hits} for message, hits in zip(messages, results)]
+
+
+async def answer_batch(
+    messages: List[str],
+    concurrency: Optional[int] = None,
+    client_id: str = "batch",
+    timeout_ms: Optional[float] = None
+) -> AsyncIterator[Dict]:
+    """
+    Answer many sessionless messages, sharing the local-model work.
+
+    Args:
+        messages: User messages
+        concurrency: Pipeline runs in flight at once (defaults to BATCH_CONCURRENCY)
+        client_id: Client the runs are admitted for
+        timeout_ms: Deadline of each run (defaults to REQUEST_TIMEOUT_MS)
+
+    Yields:
+        {'index', 'message', 'response', 'status'} per input message as it
+        finishes; status is "success", "fallback", or "rejected" (shed by
+        admission control; response is None and 'retry_after' is set)
+
+    Usage:
+        async for answer in answer_batch(questions):
+            print(answer['index'], answer['response'])
+    """
+    if not messages:
+        return
+    concurrency = max(1, min(concurrency or config.BATCH_CONCURRENCY, config.BATCH_CONCURRENCY))
+    started = time.perf_counter()
+
+    # Identical questions are answered once
+    indexes: Dict[str, List[int]] = {}
+    unique: List[str] = []
+    for index, message in enumerate(messages):
+        key = normalize_message(message)
+        if key not in indexes:
+            indexes[key] = []
+            unique.append(message)
+        indexes[key].append(index)
+
+    with timed("batch_prepare", {'chatbot.batch_size': len(unique)}):
+        sentiments, (vectors, prefetched) = await asyncio.gather(
+            asyncio.to_thread(_batch_sentiment, unique),
+            asyncio.to_thread(_batch_retrieve, unique)
+        )
+    logger.info("Prepared batch of %s messages (%s unique) in %.0f ms",
+                len(messages), len(unique), (time.perf_counter() - started) * 1000)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(position: int) -> Dict:
+        message = unique[position]
+        async with semaphore:
+            deadline = Deadline(timeout_ms)
+            try:
+                async with admission.admit(client_id, deadline, batch=True):
+                    result = await run_pipeline(
+                        message,
+                        deadline=deadline,
+                        query_vector=vectors[position],
+                        prefetched=prefetched[position],
+                        sentiment=sentiments[position]
+                    )
+            except AdmissionRejected as e:
+                logger.warning("Shedding batch message (%s): %s", e.status_code, e.reason)
+                return {'message': message, 'response': None, 'status': "rejected", 'retry_after': e.retry_after}
+            except Exception as e:
+                logger.error("Batch pipeline error: %s", e)
+                result = {'error': str(e)}
+        response = result.get('response') or get_fallback_response()
+        if not result.get('error'):
+            answer_cache.put(message, response)
+        return {'message': message, 'response': response, 'status': "fallback" if result.get('error') else "success"}
+
+    tasks = [asyncio.ensure_future(answer(position)) for position in range(len(unique))]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            for index in indexes[normalize_message(result['message'])]:
+                yield {'index': index, **result, 'message': messages[index]}
+    finally:
+        # The consumer went away (e.g. the client disconnected): stop the remaining runs
+        for task in tasks:
+            task.cancel()
+    logger.info("Answered batch of %s messages in %.1f s", len(messages), time.perf_counter() - started)
@@ -0,0 +1,85 @@
+"""
+Measure what hedged Groq requests do to generation tail latency.
+
+Sends the same answer-generation call with hedging off and then on, and
+reports p50/p95/p99 latency, the hedge rate and how many hedges won. Run it
+against the fake server (which has a configurable slow tail) or, with
+--base-url "", against the real Groq API.
+
+Usage (from the Chatbot directory):
+    python benchmarks/fake_groq_server.py --slow-prob 0.05 --slow-ms 3000 &
+    python benchmarks/bench_hedging.py --requests 400 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import config  # noqa: E402
+from llm_client import HedgedGenerator  # noqa: E402
+
+
+async def run_load(generator: HedgedGenerator, requests: int, concurrency: int):
+    """Run `requests` generations with the given concurrency; returns latencies in seconds."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    messages = [
+        SystemMessage(content="You are NexGenTeck's website assistant. Answer in two sentences."),
+        HumanMessage(content="What services does NexGenTeck offer?"),
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await generator.generate(messages, max_tokens=128)
+            except Exception:
+                pass
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8100", help='Groq endpoint ("" = real Groq API)')
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=50, help="Requests used to learn the hedge deadline")
+    parser.add_argument("--hedge-model", default=config.HEDGE_MODEL)
+    args = parser.parse_args()
+
+    config.GROQ_BASE_URL = args.base_url
+    config.HEDGE_MODEL = args.hedge_model
+    if args.base_url and not config.GROQ_API_KEY:
+        config.GROQ_API_KEY = "fake"
+
+    print(f"{'hedging':<8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'hedge %':>8} {'wins':>5} {'errors':>7}")
+    for enabled in (False, True):
+        config.HEDGE_ENABLED = enabled
+        generator = HedgedGenerator()
+        # Learn the time-to-first-token distribution before measuring
+        asyncio.run(run_load(generator, args.warmup, args.concurrency))
+        generator.reset_stats()
+
+        latencies = np.array(asyncio.run(run_load(generator, args.requests, args.concurrency))) * 1000
+        stats = generator.stats()
+        print(
+            f"{'on' if enabled else 'off':<8} {np.percentile(latencies, 50):>8.0f} {np.percentile(latencies, 95):>8.0f} "
+            f"{np.percentile(latencies, 99):>8.0f} {latencies.max():>8.0f} {stats['hedge_rate'] * 100:>8.1f} "
+            f"{stats['hedge_wins']:>5} {stats['errors']:>7}"
+        )
+    print(f"\nHedge deadline after warmup: {stats['hedge_delay_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
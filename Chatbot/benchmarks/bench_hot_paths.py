@@ -0,0 +1,342 @@
+"""
+Microbenchmarks for the chatbot's hot paths, runnable offline.
+
+Covers:
+- utils.chunk_text
+- WebsiteScraper._extract_all_content on the saved pages in benchmarks/fixtures/
+- EmbeddingManager.embed_text and embed_texts
+- VectorStore.add_documents and search (with and without a precomputed query vector)
+- build_system_prompt
+- LLMAnalyzer._parse_intent_response
+
+Each benchmark is calibrated so one sample lasts at least --min-time, then
+sampled --repeat times with the garbage collector paused. The median,
+min, mean, standard deviation and p95 per call are reported. Results are
+written as JSON with the git commit and machine details. --compare prints
+the change against an earlier run and exits with status 1 if any median
+regressed by more than --threshold, so the suite can gate CI.
+
+Model benchmarks load BGE-M3 from the local Hugging Face cache with
+HF_HUB_OFFLINE=1. Use --online to allow a download, or --skip-models to run
+only the pure-Python benchmarks.
+
+Usage (from the Chatbot directory):
+    python benchmarks/bench_hot_paths.py --output baseline.json
+    python benchmarks/bench_hot_paths.py --compare baseline.json
+    python benchmarks/bench_hot_paths.py --filter parse_intent,chunk_text --skip-models
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+class Case:
+    """One benchmark: `fn` is timed; `setup` (if given) runs untimed before every call."""
+
+    def __init__(self, name: str, fn: Callable, setup: Optional[Callable] = None, needs_models: bool = False):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.needs_models = needs_models
+
+
+def load_fixtures() -> Dict[str, str]:
+    """Saved HTML pages keyed by file stem."""
+    pages = {}
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        if name.endswith(".html"):
+            with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+                pages[name[:-5]] = f.read()
+    return pages
+
+
+def page_text(pages: Dict[str, str]) -> str:
+    """Visible text of all fixture pages, as the scraper would chunk it."""
+    from bs4 import BeautifulSoup
+    return "\n\n".join(BeautifulSoup(html, 'lxml').get_text("\n") for html in pages.values())
+
+
+def build_cases(pages: Dict[str, str]) -> List[Case]:
+    """Create every benchmark case (model-backed ones are built lazily)."""
+    from bs4 import BeautifulSoup
+    from utils import chunk_text
+    from scraper import WebsiteScraper
+    from rag_pipeline import build_system_prompt
+    from sentiment import LLMAnalyzer
+
+    text = page_text(pages)
+    cases = [
+        Case("chunk_text[500/50]", lambda: chunk_text(text, 500, 50)),
+        Case("chunk_text[800/100]", lambda: chunk_text(text, 800, 100)),
+    ]
+
+    # _extract_all_content mutates the soup, so every call gets a fresh parse (untimed)
+    scraper = WebsiteScraper()
+    state = {}
+
+    for page, html in pages.items():
+        def setup(html=html):
+            state['soup'] = BeautifulSoup(html, 'lxml')
+        cases.append(Case(
+            f"extract_all_content[{page}]",
+            lambda page=page: scraper._extract_all_content(state['soup'], f"https://nexgenteck.com/{page}"),
+            setup=setup
+        ))
+        cases.append(Case(f"parse_html[{page}]", lambda html=html: BeautifulSoup(html, 'lxml')))
+
+    context = [f"[Source: https://nexgenteck.com/services]\n{chunk}" for chunk in chunk_text(text, 800, 100)[:5]]
+    analysis = {
+        'is_greeting': False, 'intent': 'quote', 'is_lead_intent': True, 'needs_context': True,
+        'sentiment': 'positive', 'sentiment_score': 0.91, 'context_topics': ['pricing', 'web development'],
+        'contact_data': {'name': 'Jane', 'email': 'jane@example.com'},
+    }
+    cases.append(Case("build_system_prompt[5 docs]", lambda: build_system_prompt(context, analysis)))
+    cases.append(Case("build_system_prompt[no context]", lambda: build_system_prompt([], {'is_greeting': True})))
+
+    analyzer = LLMAnalyzer()
+    reply = json.dumps({
+        "is_greeting": False, "intent": "quote", "is_lead_intent": True, "needs_context": True,
+        "context_topics": ["pricing", "e-commerce"],
+        "contact_data": {"name": "Jane", "email": "jane@example.com", "phone": None, "project": "online store"},
+    }, indent=4)
+    cases.append(Case("parse_intent_response[json]", lambda: analyzer._parse_intent_response(reply)))
+    cases.append(Case(
+        "parse_intent_response[fenced]",
+        lambda: analyzer._parse_intent_response(f"Here is the analysis:\n```json\n{reply}\n```")
+    ))
+    cases.append(Case(
+        "parse_intent_response[invalid]",
+        lambda: analyzer._parse_intent_response("I think the user wants a quote.")
+    ))
+
+    cases.extend(model_cases(text))
+    return cases
+
+
+def model_cases(text: str) -> List[Case]:
+    """Benchmarks that need BGE-M3 (embedding and the vector store)."""
+    from embeddings import embedding_manager
+    from vector_store import vector_store
+    from utils import chunk_text
+
+    chunks = chunk_text(text, 800, 100)
+    batch = (chunks * 4)[:32]
+    documents = [
+        {'content': chunk, 'metadata': {'source': f"https://nexgenteck.com/page/{i // 4}", 'chunk_index': i % 4}}
+        for i, chunk in enumerate((chunks * 8)[:200])
+    ]
+    query = "How much does an e-commerce website cost?"
+    state = {}
+
+    def populate():
+        if not state.get('populated'):
+            vector_store.clear()
+            vector_store.add_documents(documents)
+            state['vector'] = embedding_manager.encode([query])[0]
+            state['populated'] = True
+
+    def clear():
+        state['populated'] = False
+        vector_store.clear()
+
+    return [
+        Case("embed_text", lambda: embedding_manager.embed_text(query), needs_models=True),
+        Case(f"embed_texts[{len(batch)}]", lambda: embedding_manager.embed_texts(batch), needs_models=True),
+        Case(f"add_documents[{len(documents)}]", lambda: vector_store.add_documents(documents), setup=clear, needs_models=True),
+        Case("search[text]", lambda: vector_store.search(query), setup=populate, needs_models=True),
+        Case("search[vector]", lambda: vector_store.search(query, query_vector=state['vector']), setup=populate, needs_models=True),
+    ]
+
+
+def measure(case: Case, repeat: int, min_time: float) -> Dict:
+    """
+    Time a case.
+
+    Returns:
+        Dict with per-call statistics in microseconds
+    """
+    def run(number: int) -> float:
+        total = 0.0
+        for _ in range(number):
+            if case.setup:
+                case.setup()
+            start = time.perf_counter()
+            case.fn()
+            total += time.perf_counter() - start
+        return total
+
+    # Warm up, then find how many calls make a sample last min_time
+    run(1)
+    number = 1
+    while True:
+        elapsed = run(number)
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            samples.append(run(number) / number * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        'median_us': statistics.median(samples),
+        'min_us': min(samples),
+        'mean_us': statistics.fmean(samples),
+        'stdev_us': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'p95_us': float(np.percentile(samples, 95)),
+        'calls_per_sample': number,
+        'samples': len(samples),
+    }
+
+
+def environment() -> Dict:
+    """Machine and code details stored with the results."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    from config import config
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'vector_backend': config.VECTOR_BACKEND,
+        'embedding_model': config.EMBEDDING_MODEL,
+    }
+
+
+def format_us(value: float) -> str:
+    """Human-readable duration from microseconds."""
+    if value >= 1e6:
+        return f"{value / 1e6:.2f} s"
+    if value >= 1e3:
+        return f"{value / 1e3:.2f} ms"
+    return f"{value:.1f} us"
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Print each benchmark's change against a baseline.
+
+    Returns:
+        Names of benchmarks whose median regressed by more than threshold
+    """
+    regressions = []
+    print(f"\nCompared with {baseline['environment'].get('commit')} ({baseline['environment'].get('timestamp')}):")
+    print(f"{'benchmark':<36} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, current in results['benchmarks'].items():
+        before = baseline['benchmarks'].get(name)
+        if before is None:
+            print(f"{name:<36} {'-':>10} {format_us(current['median_us']):>10} {'new':>8}")
+            continue
+        change = current['median_us'] / before['median_us'] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<36} {format_us(before['median_us']):>10} {format_us(current['median_us']):>10} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Median slowdown counted as a regression")
+    parser.add_argument("--filter", default="", help="Comma-separated substrings; run matching benchmarks only")
+    parser.add_argument("--repeat", type=int, default=15, help="Samples per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per sample")
+    parser.add_argument("--skip-models", action="store_true", help="Skip benchmarks that need BGE-M3")
+    parser.add_argument("--online", action="store_true", help="Allow downloading models from Hugging Face")
+    parser.add_argument("--vector-backend", choices=["qdrant", "numpy"], default=None)
+    args = parser.parse_args()
+
+    if not args.online:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+    from config import config
+    if args.vector_backend:
+        config.VECTOR_BACKEND = args.vector_backend
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    cases = build_cases(load_fixtures())
+    filters = [f.strip() for f in args.filter.split(",") if f.strip()]
+    if filters:
+        cases = [case for case in cases if any(f in case.name for f in filters)]
+
+    if not args.skip_models and any(case.needs_models for case in cases):
+        from embeddings import embedding_manager
+        try:
+            embedding_manager.load()
+            if not embedding_manager.is_loaded():
+                raise RuntimeError("model did not load")
+        except Exception as e:
+            print(f"Skipping model benchmarks: cannot load {config.EMBEDDING_MODEL} ({e}); use --online to download it")
+            args.skip_models = True
+    if args.skip_models:
+        cases = [case for case in cases if not case.needs_models]
+
+    results = {'environment': environment(), 'settings': {'repeat': args.repeat, 'min_time': args.min_time}, 'benchmarks': {}}
+    print(f"{'benchmark':<36} {'median':>10} {'min':>10} {'p95':>10} {'stdev':>8}")
+    for case in cases:
+        stats = measure(case, args.repeat, args.min_time)
+        results['benchmarks'][case.name] = stats
+        print(
+            f"{case.name:<36} {format_us(stats['median_us']):>10} {format_us(stats['min_us']):>10} "
+            f"{format_us(stats['p95_us']):>10} {stats['stdev_us'] / stats['median_us']:>8.1%}"
+        )
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Compare in-process inference with the inference sidecar.
+
+Fires single-text embedding requests (as /chat does) from an asyncio event
+loop at several concurrency levels and reports throughput, latency, and how
+long the event loop was stalled. A stalled loop can't handle other HTTP
+requests, which is the cost of running torch in the API process.
+
+Usage (from the Chatbot directory):
+    python inference_server.py &                     # start the sidecar
+    python benchmarks/bench_inference_sidecar.py --concurrency 1,8,32
+    python benchmarks/bench_inference_sidecar.py --op sentiment
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import config  # noqa: E402
+from embeddings import embedding_manager  # noqa: E402
+from sentiment import llm_analyzer  # noqa: E402
+
+MESSAGES = [
+    "Hello!",
+    "What services does NexGenTeck offer?",
+    "How much does a custom e-commerce website cost and how long does it take to build?",
+    "I want to hire your team for a mobile app with React Native, my email is jane@example.com",
+    "Do you do SEO audits for small businesses in the healthcare sector?",
+    "Can you edit promotional videos and add motion graphics for our product launch next month?",
+]
+
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list, interval: float = 0.001):
+    """Record how late the loop wakes up from a short sleep."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - start - interval)
+
+
+async def run_load(op: str, requests: int, concurrency: int):
+    """Run `requests` inference calls with the given concurrency."""
+    call = (
+        (lambda text: embedding_manager.encode([text]))
+        if op == "embed"
+        else (lambda text: llm_analyzer.analyze_sentiment_batch([text]))
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await asyncio.to_thread(call, f"{MESSAGES[i % len(MESSAGES)]} ({i})")
+            latencies.append(time.perf_counter() - start)
+
+    stop, lags = asyncio.Event(), []
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await lag_task
+
+    return {
+        'rps': requests / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'lag_p99_ms': float(np.percentile(lags, 99) * 1000) if lags else 0.0,
+        'lag_max_ms': float(max(lags) * 1000) if lags else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--op", default="embed", choices=["embed", "sentiment"])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--socket", default=config.INFERENCE_SOCKET)
+    parser.add_argument("--skip-local", action="store_true", help="Only benchmark the sidecar")
+    args = parser.parse_args()
+
+    config.INFERENCE_SOCKET = args.socket
+    modes = ["sidecar"] if args.skip_local else ["local", "sidecar"]
+
+    print(f"{'mode':<8} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'loop lag p99':>13} {'lag max':>8}")
+    for mode in modes:
+        config.INFERENCE_MODE = mode
+        if mode == "sidecar":
+            from inference_client import inference_client
+            inference_client.socket_path = args.socket
+            inference_client.reset()
+        embedding_manager.load()
+        llm_analyzer.load_sentiment_model()
+        # Warm up so model initialization isn't measured
+        asyncio.run(run_load(args.op, 8, 1))
+
+        for concurrency in [int(c) for c in args.concurrency.split(",") if c]:
+            row = asyncio.run(run_load(args.op, args.requests, concurrency))
+            print(
+                f"{mode:<8} {concurrency:>5} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                f"{row['lag_p99_ms']:>13.1f} {row['lag_max_ms']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark knowledge base ingestion: wall time and peak memory.
+
+Indexes a synthetic corpus of --documents chunks (about 500 characters each,
+like utils.chunk_text output) in three ways, each in a fresh process so
+peak RSS is measured independently:
+- before: the previous VectorStore.add_documents; embed every chunk in one
+  encode call, build every point, one upsert
+- after:  the batched pipeline (ingestion.py) on the same in-memory list
+- stream: the batched pipeline reading the corpus from a generator, as the
+  scraper feeds it
+
+"peak RSS" is the process's high-water mark, and "growth" is that peak minus
+the peak once the embedding model is loaded. growth is what ingestion adds,
+including the corpus list for "before" and "after" and the index itself.
+The index is the same size in every mode. --batch-size and --queue-batches
+override INGEST_BATCH_SIZE and INGEST_QUEUE_BATCHES.
+
+The embedding model loads from the local Hugging Face cache with
+HF_HUB_OFFLINE=1 (use --online to allow a download). BGE-M3 on CPU encodes
+roughly 20-50 chunks per second, so the full 50k corpus takes a long time;
+use --documents 2000 for a quick comparison.
+
+Usage (from the Chatbot directory):
+    python benchmarks/bench_ingest.py
+    python benchmarks/bench_ingest.py --documents 2000 --modes before,stream --vector-backend numpy
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+MODES = ("before", "after", "stream")
+
+WORDS = (
+    "website design development mobile app ecommerce store seo marketing content "
+    "strategy brand logo hosting cloud security maintenance support pricing quote "
+    "project team client launch analytics performance responsive custom platform "
+    "integration payment checkout inventory booking dashboard api database nexgenteck"
+).split()
+
+
+def synthetic_corpus(n: int, chars: int = 500):
+    """Yield n distinct chunk documents of about `chars` characters."""
+    for i in range(n):
+        rng = random.Random(i)
+        words = []
+        length = 0
+        while length < chars:
+            word = rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        yield {
+            'content': " ".join(words),
+            'metadata': {'source': f"https://example.com/page/{i // 8}", 'title': f"Page {i // 8}", 'chunk_index': i % 8},
+        }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def add_documents_before(vector_store, embedding_manager, documents) -> int:
+    """VectorStore.add_documents as it was before the batched pipeline."""
+    import uuid
+
+    contents = [doc['content'] for doc in documents]
+    metadatas = [doc.get('metadata', {}) for doc in documents]
+    embeddings = embedding_manager.encode(contents)
+
+    if vector_store._index is not None:
+        vector_store._index.add(embeddings, contents, metadatas)
+    else:
+        from qdrant_client.models import PointStruct
+
+        points = []
+        for content, embedding, metadata in zip(contents, embeddings.tolist(), metadatas):
+            points.append(PointStruct(id=str(uuid.uuid4()), vector=embedding, payload={"content": content, **metadata}))
+        vector_store.client.upsert(collection_name=vector_store._collection_name, points=points)
+    return len(documents)
+
+
+def run_worker(mode: str, documents: int) -> dict:
+    """Load the model, ingest the corpus once in `mode`, and report."""
+    from embeddings import embedding_manager
+    from vector_store import vector_store
+
+    embedding_manager.load()
+    vector_store.load()
+    embedding_manager.encode(["warm up"])
+    baseline = peak_rss_mb()
+
+    corpus = synthetic_corpus(documents)
+    if mode != "stream":
+        corpus = list(corpus)
+
+    start = time.perf_counter()
+    if mode == "before":
+        count = add_documents_before(vector_store, embedding_manager, corpus)
+    else:
+        count = vector_store.add_documents(corpus)
+    seconds = time.perf_counter() - start
+
+    peak = peak_rss_mb()
+    return {
+        'mode': mode,
+        'documents': count,
+        'indexed': vector_store.count(),
+        'seconds': seconds,
+        'peak_rss_mb': peak,
+        'growth_mb': peak - baseline,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=50000, help="Synthetic chunks to index")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated subset of: " + ", ".join(MODES))
+    parser.add_argument("--vector-backend", choices=["qdrant", "numpy"], default=None, help="VECTOR_BACKEND for the run")
+    parser.add_argument("--batch-size", type=int, default=None, help="INGEST_BATCH_SIZE")
+    parser.add_argument("--queue-batches", type=int, default=None, help="INGEST_QUEUE_BATCHES")
+    parser.add_argument("--online", action="store_true", help="Allow downloading models from Hugging Face")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.documents)))
+        return
+
+    env = dict(os.environ)
+    if not args.online:
+        env.setdefault("HF_HUB_OFFLINE", "1")
+    if args.vector_backend:
+        env["VECTOR_BACKEND"] = args.vector_backend
+    if args.batch_size:
+        env["INGEST_BATCH_SIZE"] = str(args.batch_size)
+    if args.queue_batches:
+        env["INGEST_QUEUE_BATCHES"] = str(args.queue_batches)
+    env.setdefault("QDRANT_URL", ":memory:")
+    env.setdefault("LOG_LEVEL", "WARNING")
+
+    results = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        if mode not in MODES:
+            parser.error(f"unknown mode: {mode}")
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", mode, "--documents", str(args.documents)],
+            env=env, capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            sys.exit(f"{mode} run failed:\n{output.stderr}")
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.documents} synthetic chunks, backend={args.vector_backend or os.getenv('VECTOR_BACKEND', 'qdrant')}")
+    print(f"{'mode':<8} {'indexed':>8} {'wall s':>8} {'docs/s':>8} {'peak RSS MB':>12} {'growth MB':>10}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['indexed']:>8} {r['seconds']:>8.1f} {r['documents'] / r['seconds']:>8.0f} "
+              f"{r['peak_rss_mb']:>12.0f} {r['growth_mb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
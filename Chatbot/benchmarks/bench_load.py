@@ -0,0 +1,282 @@
+"""
+Load-test a running chatbot server's /chat endpoint.
+
+Each concurrency level runs a closed loop: N virtual users each send a
+message, wait for the reply and immediately send the next one, for
+--duration seconds after a --warmup period. Per level it reports:
+- throughput and latency (p50/p95/p99/max)
+- time to first token, from the server's chatbot_stage_seconds{stage="llm_first_token"}
+  histogram (estimated within histogram buckets, mean exact)
+- error rates: 429 and 503 (shed), other HTTP errors, timeouts or connection
+  errors, and degraded answers (chatbot_fallback_responses_total)
+
+Virtual users send distinct X-Forwarded-For addresses (--clients), so the
+per-client rate limit only applies as it would to real visitors. Set
+RATE_LIMIT_PER_MINUTE=0 on the server to measure raw capacity.
+
+Point the server at the fake Groq server so no Groq quota is used:
+
+Usage (from the Chatbot directory):
+    python benchmarks/fake_groq_server.py --ttft-ms 300 --tokens-per-second 250 &
+    GROQ_BASE_URL=http://127.0.0.1:8100 GROQ_API_KEY=fake RATE_LIMIT_PER_MINUTE=0 python serve.py --workers 2 &
+    python benchmarks/bench_load.py --concurrency 1,8,32,64 --duration 30 --json load.json
+
+With several workers, set PROMETHEUS_MULTIPROC_DIR on the server so the TTFT
+and fallback figures cover every worker, not just the one that was scraped.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+MESSAGES = [
+    "Hello!",
+    "What services does NexGenTeck offer?",
+    "Do you build e-commerce websites?",
+    "Can you develop a mobile app for iOS and Android?",
+    "How do you approach SEO for a new website?",
+    "How much does a custom website cost?",
+    "Do you offer social media marketing?",
+    "Can I get a quote for a 3D product animation?",
+    "What technologies do you use for web development?",
+    "How long does it take to build an online store?",
+]
+
+
+def load_messages(path: Optional[str]) -> List[str]:
+    """Messages to send: one per line of `path`, or the built-in list."""
+    if not path:
+        return MESSAGES
+    with open(path, encoding="utf-8") as f:
+        messages = [line.strip() for line in f if line.strip()]
+    if not messages:
+        sys.exit(f"No messages in {path}")
+    return messages
+
+
+async def scrape_metrics(client: httpx.AsyncClient, url: str) -> Optional[Dict]:
+    """
+    Read the TTFT histogram and fallback counters from the server's /metrics.
+
+    Returns:
+        {'ttft_buckets': {le: count}, 'ttft_sum', 'ttft_count', 'fallbacks'}, or
+        None if /metrics is unavailable
+    """
+    try:
+        from prometheus_client.parser import text_string_to_metric_families
+    except ImportError:
+        return None
+    try:
+        response = await client.get(f"{url}/metrics", timeout=10)
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return None
+
+    snapshot = {'ttft_buckets': {}, 'ttft_sum': 0.0, 'ttft_count': 0.0, 'fallbacks': 0.0}
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            if family.name == "chatbot_stage_seconds" and sample.labels.get("stage") == "llm_first_token":
+                if sample.name.endswith("_bucket"):
+                    snapshot['ttft_buckets'][float(sample.labels["le"])] = sample.value
+                elif sample.name.endswith("_sum"):
+                    snapshot['ttft_sum'] = sample.value
+                elif sample.name.endswith("_count"):
+                    snapshot['ttft_count'] = sample.value
+            elif family.name == "chatbot_fallback_responses" and sample.name.endswith("_total"):
+                snapshot['fallbacks'] += sample.value
+    return snapshot
+
+
+def histogram_percentile(buckets: Dict[float, float], q: float) -> Optional[float]:
+    """Estimate a percentile from cumulative histogram buckets, interpolating inside the bucket."""
+    bounds = sorted(buckets)
+    if not bounds or buckets[bounds[-1]] <= 0:
+        return None
+    target = q / 100 * buckets[bounds[-1]]
+    lower, below = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= target:
+            if bound == float("inf"):
+                return lower
+            if count == below:
+                return bound
+            return lower + (bound - lower) * (target - below) / (count - below)
+        lower, below = bound, count
+    return lower
+
+
+def ttft_summary(before: Optional[Dict], after: Optional[Dict]) -> Dict:
+    """TTFT statistics (ms) for the samples recorded between two scrapes."""
+    if before is None or after is None:
+        return {}
+    count = after['ttft_count'] - before['ttft_count']
+    if count <= 0:
+        return {'ttft_samples': 0}
+    buckets = {le: value - before['ttft_buckets'].get(le, 0.0) for le, value in after['ttft_buckets'].items()}
+    summary = {
+        'ttft_samples': int(count),
+        'ttft_mean_ms': round((after['ttft_sum'] - before['ttft_sum']) / count * 1000, 1),
+    }
+    for pct in (50, 95, 99):
+        value = histogram_percentile(buckets, pct)
+        summary[f'ttft_p{pct}_ms'] = round(value * 1000, 1) if value is not None else None
+    return summary
+
+
+async def run_level(
+    client: httpx.AsyncClient, args, messages: List[str], concurrency: int
+) -> Dict:
+    """
+    Drive /chat with `concurrency` virtual users.
+
+    Returns:
+        Result dict for this concurrency level
+    """
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    headers = {}
+    if args.request_timeout_ms:
+        headers[args.timeout_header] = str(args.request_timeout_ms)
+
+    # Every user runs through the warm-up and the measured window; only
+    # requests started inside the window are recorded
+    measure_from = time.monotonic() + args.warmup
+    stop_at = measure_from + args.duration
+
+    async def user(index: int):
+        client_ip = f"10.0.{(index % args.clients) // 250}.{(index % args.clients) % 250 + 1}"
+        n = index
+        while time.monotonic() < stop_at:
+            message = messages[n % len(messages)]
+            n += concurrency
+            measured = time.monotonic() >= measure_from
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    f"{args.url}/chat", json={"message": message},
+                    headers={**headers, "x-forwarded-for": client_ip}, timeout=args.timeout
+                )
+                outcome = "ok" if response.status_code == 200 else str(response.status_code)
+            except httpx.TimeoutException:
+                outcome = "timeout"
+            except httpx.HTTPError:
+                outcome = "connection_error"
+            if measured:
+                outcomes[outcome] += 1
+                if outcome == "ok":
+                    latencies.append(time.perf_counter() - start)
+
+    users = [asyncio.create_task(user(i)) for i in range(concurrency)]
+    await asyncio.sleep(max(0.0, measure_from - time.monotonic()))
+    before = await scrape_metrics(client, args.url)
+    started = time.perf_counter()
+    await asyncio.gather(*users)
+    elapsed = time.perf_counter() - started
+    after = await scrape_metrics(client, args.url)
+
+    total = sum(outcomes.values())
+    result = {
+        'concurrency': concurrency,
+        'requests': total,
+        'duration_s': round(elapsed, 2),
+        'throughput_rps': round(outcomes["ok"] / elapsed, 2) if elapsed else 0.0,
+        'outcomes': dict(outcomes),
+    }
+    lat_ms = np.array(latencies) * 1000
+    for pct in (50, 95, 99):
+        result[f'latency_p{pct}_ms'] = round(float(np.percentile(lat_ms, pct)), 1) if len(lat_ms) else None
+    result['latency_max_ms'] = round(float(lat_ms.max()), 1) if len(lat_ms) else None
+
+    shed = outcomes["429"] + outcomes["503"]
+    failed = total - outcomes["ok"] - shed
+    result['shed_rate'] = round(shed / total, 4) if total else 0.0
+    result['error_rate'] = round(failed / total, 4) if total else 0.0
+    if before is not None and after is not None:
+        fallbacks = after['fallbacks'] - before['fallbacks']
+        result['fallback_rate'] = round(fallbacks / outcomes["ok"], 4) if outcomes["ok"] else 0.0
+    result.update(ttft_summary(before, after))
+    return result
+
+
+def format_ms(value) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def print_result(result: Dict):
+    print(
+        f"{result['concurrency']:>5} {result['requests']:>8} {result['throughput_rps']:>8.1f} "
+        f"{format_ms(result['latency_p50_ms']):>8} {format_ms(result['latency_p95_ms']):>8} "
+        f"{format_ms(result['latency_p99_ms']):>8} {format_ms(result.get('ttft_p50_ms')):>9} "
+        f"{format_ms(result.get('ttft_p95_ms')):>9} {result['shed_rate'] * 100:>7.1f} "
+        f"{result['error_rate'] * 100:>7.1f} "
+        f"{'-' if 'fallback_rate' not in result else format(result['fallback_rate'] * 100, '.1f'):>7}"
+    )
+
+
+async def run(args) -> List[Dict]:
+    messages = load_messages(args.messages)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    limits = httpx.Limits(max_connections=max(levels) + 4, max_keepalive_connections=max(levels) + 4)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+        try:
+            health = await client.get(f"{args.url}/readyz", timeout=10)
+        except httpx.HTTPError as e:
+            sys.exit(f"Cannot reach {args.url}: {e}")
+        if health.status_code != 200:
+            print(f"Warning: {args.url}/readyz returned {health.status_code}; results may include 503s")
+        if await scrape_metrics(client, args.url) is None:
+            print("Note: /metrics unavailable, TTFT and fallback rates will not be reported")
+
+        print(
+            f"{'conc':>5} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'ttft p50':>9} {'ttft p95':>9} {'shed %':>7} {'error %':>7} {'degr. %':>7}"
+        )
+        results = []
+        for concurrency in levels:
+            result = await run_level(client, args, messages, concurrency)
+            print_result(result)
+            results.append(result)
+            if args.pause:
+                await asyncio.sleep(args.pause)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Chatbot server base URL")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated virtual user counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before each level")
+    parser.add_argument("--pause", type=float, default=2.0, help="Seconds between levels")
+    parser.add_argument("--clients", type=int, default=1000, help="Distinct client addresses (X-Forwarded-For)")
+    parser.add_argument("--messages", help="File with one message per line (default: built-in questions)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Client-side request timeout in seconds")
+    parser.add_argument("--request-timeout-ms", type=int, default=None, help="Deadline sent to the server")
+    parser.add_argument("--timeout-header", default=os.getenv("REQUEST_TIMEOUT_HEADER", "X-Request-Timeout-Ms"))
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+    args.url = args.url.rstrip("/")
+
+    results = asyncio.run(run(args))
+    for result in results:
+        errors = {k: v for k, v in result['outcomes'].items() if k != "ok"}
+        if errors:
+            print(f"  concurrency {result['concurrency']}: {errors}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({'url': args.url, 'settings': vars(args), 'levels': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Measure the logging cost per /chat request, before and after queue-based logging.
+
+Replays the INFO lines one chat request logs (main.chat, process_message,
+the analyze/retrieve/generate nodes, VectorStore.search_batch and
+LLMAnalyzer.analyze) in two setups:
+- before: logging.basicConfig with a StreamHandler and eager f-strings
+- after:  logging_setup.setup_logging() (background QueueListener) with lazy
+  %-style arguments and request IDs
+
+Each setup runs with LOG_LEVEL=INFO and with WARNING (INFO disabled).
+"loop CPU" is CPU time on the request's own thread, i.e. what the event loop
+pays. "wall" is elapsed time including draining the queue on the listener
+thread (in this tight loop the listener competes for the GIL; in the server
+it mostly runs while the loop waits on Groq).
+Output goes to --sink, os.devnull by default. Use a file path to include
+real disk writes.
+
+Usage (from the Chatbot directory):
+    python benchmarks/bench_logging.py --requests 20000
+    python benchmarks/bench_logging.py --sink /tmp/chat.log --format json
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import config  # noqa: E402
+import logging_setup  # noqa: E402
+
+MESSAGE = "Hi, I'd like a quote for an online store with about 200 products and a blog."
+ANALYSIS = {'sentiment': 'positive', 'intent': 'quote', 'intent_source': 'router', 'needs_context': True, 'is_greeting': False}
+CONTEXT = ["NexGenTeck builds e-commerce stores."] * 5
+
+
+def request_before(log: logging.Logger):
+    """The request's log lines as written before (eager f-strings)."""
+    log.info(f"Received message: {MESSAGE[:100]}...")
+    log.info(f"Processing message: {MESSAGE[:50]}...")
+    log.info("Analyzing message with LLM")
+    log.info(f"Analysis: sentiment={ANALYSIS['sentiment']}, intent={ANALYSIS['intent']} ({ANALYSIS['intent_source']}), needs_context={ANALYSIS['needs_context']}")
+    log.info(f"LLM determined: greeting={ANALYSIS.get('is_greeting')}, needs_context={ANALYSIS.get('needs_context')}")
+    log.info("Retrieving context from website knowledge base")
+    log.info(f"Found {len(CONTEXT)} relevant documents for {1} queries")
+    log.info(f"Retrieved {len(CONTEXT)} relevant documents from website")
+    log.info("Generating LLM response using website context")
+    log.info("Response generated successfully")
+
+
+def request_after(log: logging.Logger):
+    """The same log lines with lazy %-style arguments."""
+    log.info("Received message: %s...", MESSAGE[:100], extra={'session': False})
+    log.info("Processing message: %s...", MESSAGE[:50])
+    log.info("Analyzing message with LLM")
+    log.info("Analysis: sentiment=%s, intent=%s (%s), needs_context=%s", ANALYSIS['sentiment'], ANALYSIS['intent'], ANALYSIS['intent_source'], ANALYSIS['needs_context'])
+    log.info("LLM determined: greeting=%s, needs_context=%s", ANALYSIS.get('is_greeting'), ANALYSIS.get('needs_context'))
+    log.info("Retrieving context from website knowledge base")
+    log.info("Found %s relevant documents for %s queries", len(CONTEXT), 1)
+    log.info("Retrieved %s relevant documents from website", len(CONTEXT))
+    log.info("Generating LLM response using website context")
+    log.info("Response generated successfully")
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def run_before(requests: int, level: str, sink) -> tuple:
+    reset_root()
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+    log = logging.getLogger("bench")
+
+    start, cpu = time.perf_counter(), time.thread_time()
+    for _ in range(requests):
+        request_before(log)
+    caller = time.thread_time() - cpu
+    sink.flush()
+    return caller, time.perf_counter() - start
+
+
+def run_after(requests: int, level: str, sink) -> tuple:
+    reset_root()
+    stderr, sys.stderr = sys.stderr, sink  # the listener's StreamHandler writes to sys.stderr
+    try:
+        logging_setup.setup_logging(level)
+        log = logging.getLogger("bench")
+        token = logging_setup.request_id_var.set("3f2a9c1e7b6d4a05")
+
+        start, cpu = time.perf_counter(), time.thread_time()
+        for _ in range(requests):
+            request_after(log)
+        caller = time.thread_time() - cpu
+        dropped = logging_setup.stats().get('dropped', 0)
+        logging_setup.shutdown_logging()
+        sink.flush()
+        total = time.perf_counter() - start
+        logging_setup.request_id_var.reset(token)
+    finally:
+        sys.stderr = stderr
+        logging_setup._queue_handler = None
+        reset_root()
+    if dropped:
+        print(f"  note: {dropped} records dropped (raise --queue-size)")
+    return caller, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Simulated requests per run")
+    parser.add_argument("--sink", default=os.devnull, help="Where log output goes")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="LOG_FORMAT for the queued setup")
+    parser.add_argument("--queue-size", type=int, default=None, help="LOG_QUEUE_SIZE (default: enough for the whole run)")
+    args = parser.parse_args()
+
+    config.LOG_FORMAT = args.format
+    config.LOG_QUEUE_SIZE = args.queue_size or args.requests * 10 + 1
+
+    print(f"{'setup':<8} {'level':<8} {'loop CPU us/req':>16} {'wall us/req':>12}")
+    with open(args.sink, "w", encoding="utf-8") as sink:
+        for level in ("INFO", "WARNING"):
+            for name, run in (("before", run_before), ("after", run_after)):
+                run(min(args.requests, 1000), level, sink)  # warm up
+                caller, total = run(args.requests, level, sink)
+                print(f"{name:<8} {level:<8} {caller / args.requests * 1e6:>16.1f} {total / args.requests * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compare the two-call pipeline (analysis call, then answer) with single-call mode.
+
+Runs a fixed question set through both graphs against the real Groq API and
+reports end-to-end latency, LLM calls and tokens per message, plus the
+estimated cost per 1k messages. The knowledge base is a small built-in
+service catalogue, or the live website with --scrape.
+
+Usage (from the Chatbot directory, GROQ_API_KEY set):
+    python benchmarks/bench_pipeline_modes.py
+    python benchmarks/bench_pipeline_modes.py --rounds 3 --scrape
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import config  # noqa: E402
+from vector_store import vector_store  # noqa: E402
+from rag_pipeline import build_rag_pipeline, run_pipeline  # noqa: E402
+
+QUESTIONS = [
+    "Hello!",
+    "Hi there, how are you?",
+    "What services does NexGenTeck offer?",
+    "Do you build e-commerce websites?",
+    "Can you develop a mobile app for iOS and Android?",
+    "How do you approach SEO for a new website?",
+    "Do you offer blockchain development?",
+    "I want to hire you for a web project, my email is jane@example.com",
+    "Can I get a quote for a 3D product animation?",
+    "Your last delivery was late and nobody answered my emails.",
+]
+
+SERVICES = {
+    "Web Development": "custom websites, landing pages and web applications built with modern frameworks",
+    "E-commerce Solutions": "online stores, payment integration, product catalogues and checkout optimization",
+    "Mobile App Development": "native and cross-platform iOS and Android apps",
+    "Search Engine Optimization (SEO)": "technical SEO audits, keyword research and on-page optimization",
+    "Social Media Marketing": "campaign planning, content calendars and paid social advertising",
+    "Software Development": "custom business software, integrations and internal tools",
+    "3D Graphics Designing": "product renders, 3D models and animations",
+    "Video Editing": "promotional videos, motion graphics and post-production",
+}
+
+
+def builtin_documents():
+    """A small service catalogue used as the knowledge base."""
+    return [
+        {
+            'content': f"NexGenTeck {name}: we provide {description}.",
+            'metadata': {'source': f"{config.WEBSITE_URL}/services", 'title': name},
+        }
+        for name, description in SERVICES.items()
+    ]
+
+
+async def run_mode(mode: str, rounds: int):
+    """Run every question `rounds` times through one pipeline mode."""
+    pipeline = build_rag_pipeline(mode)
+    latencies, calls, input_tokens, output_tokens, errors = [], [], [], [], 0
+
+    for _ in range(rounds):
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            state = await run_pipeline(question, pipeline)
+            latencies.append(time.perf_counter() - start)
+
+            usage = state.get('usage', {})
+            calls.append(len(usage))
+            input_tokens.append(sum(u['input_tokens'] for u in usage.values()))
+            output_tokens.append(sum(u['output_tokens'] for u in usage.values()))
+            errors += bool(state.get('error'))
+
+    return {
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'calls': float(np.mean(calls)),
+        'input_tokens': float(np.mean(input_tokens)),
+        'output_tokens': float(np.mean(output_tokens)),
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--modes", default="two_call,single_call")
+    parser.add_argument("--scrape", action="store_true", help="Index the live website instead of the built-in catalogue")
+    parser.add_argument("--price-in", type=float, default=0.59, help="USD per 1M input tokens")
+    parser.add_argument("--price-out", type=float, default=0.79, help="USD per 1M output tokens")
+    args = parser.parse_args()
+
+    config.validate()
+    if args.scrape:
+        from scraper import WebsiteScraper
+        documents = WebsiteScraper().scrape(max_pages=100)
+    else:
+        documents = builtin_documents()
+    vector_store.add_documents(documents)
+    print(f"Indexed {vector_store.count()} documents; {len(QUESTIONS)} questions x {args.rounds} rounds\n")
+
+    print(f"{'mode':<12} {'p50 ms':>8} {'p95 ms':>8} {'calls':>6} {'in tok':>8} {'out tok':>8} {'$/1k msgs':>10} {'errors':>7}")
+    for mode in [m for m in args.modes.split(",") if m]:
+        row = asyncio.run(run_mode(mode, args.rounds))
+        cost = (row['input_tokens'] * args.price_in + row['output_tokens'] * args.price_out) / 1000
+        print(
+            f"{mode:<12} {row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} {row['calls']:>6.2f} "
+            f"{row['input_tokens']:>8.0f} {row['output_tokens']:>8.0f} {cost:>10.3f} {row['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
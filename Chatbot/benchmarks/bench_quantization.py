@@ -0,0 +1,171 @@
+"""
+Benchmark Qdrant quantization settings against the unquantized collection.
+
+For each setting (none, scalar int8, binary; optionally with on-disk
+originals) this creates a collection on a Qdrant server, loads the same
+vectors and reports:
+- estimated RAM held by vectors, plus the server's resident memory delta
+  when its /metrics endpoint exposes memory_resident_bytes
+- single-query p50/p95 search latency
+- top-k overlap with exact (brute-force) search
+
+Usage (from the Chatbot directory, with Qdrant running):
+    python benchmarks/bench_quantization.py --qdrant-url http://localhost:6333
+    python benchmarks/bench_quantization.py --vectors embeddings.npy --on-disk
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.models import OptimizersConfigDiff, PointStruct  # noqa: E402
+
+from quantization import build_search_params, build_vector_params  # noqa: E402
+
+
+def load_vectors(args) -> np.ndarray:
+    """Load real embeddings from .npy or generate normalized random vectors."""
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+    else:
+        rng = np.random.default_rng(args.seed)
+        vectors = rng.standard_normal((args.n, args.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def server_rss(url: str):
+    """Return the Qdrant server's resident memory in bytes, if exposed."""
+    if url == ":memory:":
+        return None
+    try:
+        text = httpx.get(f"{url.rstrip('/')}/metrics", timeout=5).text
+    except httpx.HTTPError:
+        return None
+    for line in text.splitlines():
+        if line.startswith("memory_resident_bytes"):
+            return float(line.split()[-1])
+    return None
+
+
+def estimated_ram(n: int, dim: int, mode: str, on_disk: bool) -> float:
+    """Bytes of vector data kept in RAM for a given setting."""
+    original = 0 if on_disk else n * dim * 4
+    quantized = {"none": 0, "scalar": n * dim, "binary": n * dim / 8}[mode]
+    return original + quantized
+
+
+def wait_until_indexed(client: QdrantClient, name: str, timeout: float = 600):
+    """Wait for the optimizer to finish building indexes and quantized vectors."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = client.get_collection(name)
+        if info.status.value == "green":
+            return
+        time.sleep(0.5)
+
+
+def run_setting(client, url, vectors, queries, truth, mode, on_disk, args):
+    """Create, load and benchmark one collection setting."""
+    name = f"bench_quant_{mode}_{uuid.uuid4().hex[:6]}"
+    rss_before = server_rss(url)
+
+    client.create_collection(
+        collection_name=name,
+        vectors_config=build_vector_params(vectors.shape[1], mode=mode, on_disk=on_disk),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=args.indexing_threshold)
+    )
+    try:
+        for i in range(0, len(vectors), 1000):
+            client.upsert(
+                collection_name=name,
+                points=[
+                    PointStruct(id=i + j, vector=vec, payload={'content': f"chunk {i + j}"})
+                    for j, vec in enumerate(vectors[i:i + 1000].tolist())
+                ],
+                wait=True
+            )
+        wait_until_indexed(client, name)
+        rss_after = server_rss(url)
+
+        search_params = build_search_params(mode=mode, rescore=not args.no_rescore, oversampling=args.oversampling)
+        latencies, overlaps = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            hits = client.search(
+                collection_name=name,
+                query_vector=query.tolist(),
+                limit=args.k,
+                search_params=search_params
+            )
+            latencies.append(time.perf_counter() - start)
+            overlaps.append(len({hit.id for hit in hits} & expected) / args.k)
+
+        rss_delta = None if rss_before is None or rss_after is None else rss_after - rss_before
+        return {
+            'setting': f"{mode}{'+disk' if on_disk else ''}",
+            'ram_mb': estimated_ram(len(vectors), vectors.shape[1], mode, on_disk) / 1e6,
+            'rss_mb': None if rss_delta is None else rss_delta / 1e6,
+            'p50_ms': float(np.percentile(latencies, 50) * 1000),
+            'p95_ms': float(np.percentile(latencies, 95) * 1000),
+            'overlap': float(np.mean(overlaps)),
+        }
+    finally:
+        client.delete_collection(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default="http://localhost:6333")
+    parser.add_argument("--vectors", default="", help="Optional .npy file of real embeddings")
+    parser.add_argument("--n", type=int, default=50000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--no-rescore", action="store_true", help="Disable original-vector rescoring")
+    parser.add_argument("--on-disk", action="store_true", help="Also test on-disk original vectors")
+    parser.add_argument("--indexing-threshold", type=int, default=1000,
+                        help="Optimizer indexing threshold (KB); low so quantized indexes get built")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args)
+    rng = np.random.default_rng(args.seed + 1)
+    # Queries near real points make the overlap figure meaningful for synthetic data
+    queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = queries + rng.standard_normal(queries.shape, dtype=np.float32) * 0.05
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    scores = queries @ vectors.T
+    truth = [set(np.argpartition(-row, args.k)[:args.k].tolist()) for row in scores]
+
+    # ":memory:" is accepted for a dry run, but local mode ignores quantization
+    if args.qdrant_url == ":memory:":
+        client = QdrantClient(":memory:")
+    else:
+        client = QdrantClient(url=args.qdrant_url, timeout=60)
+    settings = [(mode, False) for mode in ("none", "scalar", "binary")]
+    if args.on_disk:
+        settings += [(mode, True) for mode in ("scalar", "binary")]
+
+    print(f"{'setting':<14} {'vec RAM MB':>10} {'RSS d MB':>9} {'p50 ms':>8} {'p95 ms':>8} {'top-k overlap':>14}")
+    for mode, on_disk in settings:
+        row = run_setting(client, args.qdrant_url, vectors, queries, truth, mode, on_disk, args)
+        rss = "n/a" if row['rss_mb'] is None else f"{row['rss_mb']:.0f}"
+        print(
+            f"{row['setting']:<14} {row['ram_mb']:>10.0f} {rss:>9} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['overlap']:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark the NumPy exact-search index against Qdrant local and server modes.
+
+Uses synthetic normalized vectors so no embedding model is needed.
+
+Usage (from the Chatbot directory):
+    python benchmarks/bench_vector_backends.py
+    python benchmarks/bench_vector_backends.py --sizes 1000,10000 --qdrant-url http://localhost:6333
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from numpy_store import NumpyIndex  # noqa: E402
+
+
+def make_corpus(n: int, dim: int, seed: int):
+    """Generate n normalized vectors with short payloads."""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    contents = [f"chunk {i} " + "lorem ipsum " * 60 for i in range(n)]
+    metadatas = [{'source': f"https://example.com/page/{i // 8}", 'chunk_index': i % 8} for i in range(n)]
+    return vectors, contents, metadatas
+
+
+def make_queries(n: int, dim: int, seed: int) -> np.ndarray:
+    """Generate n normalized query vectors."""
+    rng = np.random.default_rng(seed + 1)
+    queries = rng.standard_normal((n, dim), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
+
+
+def percentile_ms(samples, pct: float) -> float:
+    """Return the given percentile of a list of seconds, in milliseconds."""
+    return float(np.percentile(samples, pct) * 1000)
+
+
+def time_single(search_one, queries: np.ndarray):
+    """Time queries one at a time; returns per-query latencies in seconds."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search_one(query)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def time_batched(search_many, queries: np.ndarray, batch: int) -> float:
+    """Time queries in batches; returns queries per second."""
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch):
+        search_many(queries[i:i + batch])
+    return len(queries) / (time.perf_counter() - start)
+
+
+def bench_numpy(vectors, contents, metadatas, queries, k, batch, dtype):
+    """Benchmark NumpyIndex."""
+    index = NumpyIndex(dtype=dtype)
+    start = time.perf_counter()
+    index.add(vectors, contents, metadatas)
+    build = time.perf_counter() - start
+
+    latencies = time_single(lambda q: index.search(q, k), queries)
+    qps = time_batched(lambda qs: index.search(qs, k), queries, batch)
+    return build, latencies, qps
+
+
+def bench_qdrant(client, vectors, contents, metadatas, queries, k, batch):
+    """Benchmark a Qdrant client (local or server)."""
+    from qdrant_client.models import Distance, VectorParams, PointStruct, SearchRequest
+
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE)
+    )
+    try:
+        start = time.perf_counter()
+        for i in range(0, len(vectors), 1000):
+            client.upsert(
+                collection_name=name,
+                points=[
+                    PointStruct(id=str(uuid.uuid4()), vector=vec, payload={'content': content, **meta})
+                    for vec, content, meta in zip(
+                        vectors[i:i + 1000].tolist(), contents[i:i + 1000], metadatas[i:i + 1000]
+                    )
+                ],
+                wait=True
+            )
+        build = time.perf_counter() - start
+
+        latencies = time_single(
+            lambda q: client.search(collection_name=name, query_vector=q.tolist(), limit=k),
+            queries
+        )
+        qps = time_batched(
+            lambda qs: client.search_batch(
+                collection_name=name,
+                requests=[SearchRequest(vector=q, limit=k, with_payload=True) for q in qs.tolist()]
+            ),
+            queries,
+            batch
+        )
+        return build, latencies, qps
+    finally:
+        client.delete_collection(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated corpus sizes")
+    parser.add_argument("--dim", type=int, default=1024, help="Vector dimension (BGE-M3 is 1024)")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries per run")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--batch", type=int, default=16, help="Queries per batched call")
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"], help="NumPy storage dtype")
+    parser.add_argument("--qdrant-url", default="", help="Also benchmark a Qdrant server at this URL")
+    parser.add_argument("--skip-local", action="store_true", help="Skip Qdrant local (:memory:) mode")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    backends = ["numpy"]
+    if not args.skip_local:
+        backends.append("qdrant-local")
+    if args.qdrant_url:
+        backends.append("qdrant-server")
+
+    print(f"{'backend':<14} {'n':>7} {'build s':>9} {'p50 ms':>8} {'p95 ms':>8} {'batch qps':>10}")
+    for n in [int(x) for x in args.sizes.split(",") if x]:
+        vectors, contents, metadatas = make_corpus(n, args.dim, args.seed)
+        queries = make_queries(args.queries, args.dim, args.seed)
+
+        for backend in backends:
+            if backend == "numpy":
+                build, latencies, qps = bench_numpy(
+                    vectors, contents, metadatas, queries, args.k, args.batch, args.dtype
+                )
+            else:
+                from qdrant_client import QdrantClient
+                client = QdrantClient(":memory:") if backend == "qdrant-local" else QdrantClient(url=args.qdrant_url)
+                build, latencies, qps = bench_qdrant(
+                    client, vectors, contents, metadatas, queries, args.k, args.batch
+                )
+
+            print(
+                f"{backend:<14} {n:>7} {build:>9.2f} {percentile_ms(latencies, 50):>8.2f} "
+                f"{percentile_ms(latencies, 95):>8.2f} {qps:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Fake Groq server for tests and benchmarks, with a controllable latency tail.
+
+Serves the OpenAI-compatible /openai/v1/chat/completions endpoint that the
+Groq SDK calls, streamed or not. Each request waits a time-to-first-token
+drawn from a base latency plus jitter. With probability --slow-prob it waits
+--slow-ms more. With probability --error-rate it returns HTTP 500, and with
+probability --rate-limit-rate HTTP 429 with a Retry-After header. It then
+emits --tokens tokens, one every --token-ms (or at --tokens-per-second).
+Analysis and JSON-mode prompts get JSON replies, so the whole pipeline runs
+against it. GET /stats returns request counters; POST /stats/reset clears them.
+
+Usage (from the Chatbot directory):
+    python benchmarks/fake_groq_server.py --port 8100 --slow-prob 0.05 --slow-ms 3000
+    python benchmarks/fake_groq_server.py --ttft-ms 300 --tokens 200 --tokens-per-second 250
+    GROQ_BASE_URL=http://127.0.0.1:8100 GROQ_API_KEY=fake uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake Groq")
+settings = argparse.Namespace(
+    ttft_ms=150.0, jitter_ms=50.0, slow_prob=0.0, slow_ms=2000.0,
+    tokens=40, token_ms=5.0, error_rate=0.0, rate_limit_rate=0.0, seed=None,
+)
+COUNTERS = ('requests', 'streams', 'slow', 'errors', 'rate_limited', 'cancelled')
+stats = dict.fromkeys(COUNTERS, 0)
+
+
+def reply_text(body: dict) -> str:
+    """Pick a plausible reply for the request's prompt."""
+    system = " ".join(m.get("content", "") for m in body.get("messages", []) if m.get("role") == "system")
+    if "message analyzer" in system:
+        return json.dumps({
+            "is_greeting": False, "intent": "question", "is_lead_intent": False,
+            "needs_context": True, "context_topics": ["services"], "contact_data": None,
+        })
+    words = " ".join(["NexGenTeck builds websites, apps and software for growing businesses."] * 8).split()
+    answer = " ".join(words[:settings.tokens])
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({
+            "is_greeting": False, "intent": "question", "is_lead_intent": False,
+            "contact_data": None, "answer": answer,
+        })
+    return answer
+
+
+def split_tokens(text: str, n: int):
+    """Split text into about n pieces that concatenate back to the text."""
+    size = max(1, len(text) // max(1, n))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def usage(body: dict, text: str) -> dict:
+    """Rough token counts (4 characters per token)."""
+    prompt = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+    completion = max(1, len(text) // 4)
+    return {'prompt_tokens': prompt, 'completion_tokens': completion, 'total_tokens': prompt + completion}
+
+
+async def first_token_delay() -> bool:
+    """Sleep for the time-to-first-token; returns True if this request hit the slow tail."""
+    delay = max(0.0, random.gauss(settings.ttft_ms, settings.jitter_ms))
+    slow = random.random() < settings.slow_prob
+    if slow:
+        delay += settings.slow_ms
+        stats['slow'] += 1
+    await asyncio.sleep(delay / 1000)
+    return slow
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats['requests'] += 1
+    model = body.get("model", "fake")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+
+    if random.random() < settings.error_rate:
+        stats['errors'] += 1
+        return JSONResponse({"error": {"message": "Injected failure", "type": "internal_server_error"}}, status_code=500)
+    if random.random() < settings.rate_limit_rate:
+        stats['rate_limited'] += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+            status_code=429, headers={"retry-after": "1"}
+        )
+
+    text = reply_text(body)
+
+    if not body.get("stream"):
+        await first_token_delay()
+        await asyncio.sleep(settings.tokens * settings.token_ms / 1000)
+        return {
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage(body, text),
+        }
+
+    stats['streams'] += 1
+
+    def chunk(delta: dict, finish_reason=None, extra=None) -> str:
+        data = {
+            "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        data.update(extra or {})
+        return f"data: {json.dumps(data)}\n\n"
+
+    async def events():
+        try:
+            yield chunk({"role": "assistant", "content": ""})
+            await first_token_delay()
+            for piece in split_tokens(text, settings.tokens):
+                yield chunk({"content": piece})
+                await asyncio.sleep(settings.token_ms / 1000)
+            yield chunk({}, "stop", {"x_groq": {"id": completion_id, "usage": usage(body, text)}})
+            yield "data: [DONE]\n\n"
+        except asyncio.CancelledError:
+            # The client closed the stream (e.g. a cancelled hedge)
+            stats['cancelled'] += 1
+            raise
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/openai/v1/models")
+async def list_models():
+    """Model list, so clients that check the endpoint at startup accept it."""
+    return {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "fake"}]}
+
+
+@app.get("/stats")
+async def get_stats():
+    """Request counters (slow-tail hits, injected errors, cancelled streams)."""
+    return stats
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    """Zero the request counters (e.g. between load-test runs)."""
+    stats.update(dict.fromkeys(COUNTERS, 0))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ttft-ms", type=float, default=settings.ttft_ms, help="Mean time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=settings.jitter_ms)
+    parser.add_argument("--slow-prob", type=float, default=settings.slow_prob, help="Probability of a slow start")
+    parser.add_argument("--slow-ms", type=float, default=settings.slow_ms, help="Extra delay for slow starts")
+    parser.add_argument("--tokens", type=int, default=settings.tokens)
+    parser.add_argument("--token-ms", type=float, default=settings.token_ms, help="Delay between streamed tokens")
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="Token rate (overrides --token-ms)")
+    parser.add_argument("--error-rate", type=float, default=settings.error_rate, help="Probability of HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=settings.rate_limit_rate, help="Probability of HTTP 429")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    vars(settings).update({k: v for k, v in vars(args).items() if k in vars(settings)})
+    if args.tokens_per_second:
+        settings.token_ms = 1000 / args.tokens_per_second
+    if args.seed is not None:
+        random.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Request coalescing (single-flight) for the NexGenTeck AI Chatbot.
+
+When many visitors click the same prompt button at once, each click would run
+analyze -> retrieve -> generate on its own. SingleFlight lets concurrent
+sessionless requests with the same normalized message share one pipeline
+run: the first request (the leader) runs it, the others wait for its result.
+The shared run is a separate task, so it keeps going for the followers even
+if the leader's client disconnects. The shared run takes the admission slot
+itself, so only leaders hold one; that is decided in the same step that
+registers the run, leaving no gap for a second run to start without a slot.
+"""
+
+from typing import AsyncContextManager, Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+
+from resilience import normalize_message
+import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls with the same key."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.follower_timeouts = 0
+
+    def _forget(self, key: str, task: asyncio.Task):
+        """Drop a finished run so later requests start a fresh one."""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter went away
+            task.exception()
+
+    @staticmethod
+    async def _lead(factory: Callable[[], Awaitable], admit: Optional[Callable[[], AsyncContextManager]]):
+        """Body of the shared run: factory() inside the admission context, if any."""
+        if admit is None:
+            return await factory()
+        async with admit():
+            return await factory()
+
+    async def run(self, message: str, factory: Callable[[], Awaitable], timeout: Optional[float] = None,
+                  admit: Optional[Callable[[], AsyncContextManager]] = None):
+        """
+        Run factory() once for all concurrent callers with the same message.
+
+        Args:
+            message: User message (normalized to build the key)
+            factory: Creates the coroutine to run when this caller is the leader
+            timeout: Seconds a follower waits for the shared result (None = no limit)
+            admit: Creates the context (an admission slot) the shared run holds
+                while it runs; followers don't take one
+
+        Returns:
+            The shared result
+
+        Raises:
+            asyncio.TimeoutError: If a follower's timeout ran out first
+            AdmissionRejected: If the shared run could not get a slot
+        """
+        key = normalize_message(message)
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._lead(factory, admit))
+            self._calls[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+            self.leaders += 1
+            tracing.set_attributes(coalesced=False)
+            return await asyncio.shield(task)
+
+        self.coalesced += 1
+        tracing.set_attributes(coalesced=True)
+        logger.info("Coalescing request with an identical in-flight message: %s", message[:50])
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.follower_timeouts += 1
+            raise
+
+    def stats(self) -> Dict:
+        """Coalescing statistics."""
+        total = self.leaders + self.coalesced
+        return {
+            'in_flight': len(self._calls),
+            'pipeline_runs': self.leaders,
+            'coalesced': self.coalesced,
+            'coalesce_rate': round(self.coalesced / total, 4) if total else 0.0,
+            'follower_timeouts': self.follower_timeouts,
+        }
+
+
+# Singleton instance
+request_coalescer = SingleFlight()
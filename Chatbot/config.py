@@ -18,6 +18,8 @@ class Config:
     
     # Website Configuration
     WEBSITE_URL: str = os.getenv("WEBSITE_URL", "https://nexgenteck.com")
+    # Read the site's translation files instead of crawling (local development only)
+    USE_TRANSLATION_EXTRACTOR: bool = os.getenv("USE_TRANSLATION_EXTRACTOR", "false").lower() == "true"
     
     # CORS Configuration - Restricted to production and local development
     # Override via environment variable for specific deployments
@@ -33,20 +35,204 @@ class Config:
     # RAG Configuration
     MAX_CONTEXT_DOCS: int = int(os.getenv("MAX_CONTEXT_DOCS", "10"))
     RELEVANCE_THRESHOLD: float = float(os.getenv("RELEVANCE_THRESHOLD", "1.5"))
+    # Search the raw message while the analysis call runs; re-search when the
+    # analysis topics bring token Jaccard similarity below the threshold
+    SPECULATIVE_RETRIEVAL: bool = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+    SPECULATIVE_REFINE_THRESHOLD: float = float(os.getenv("SPECULATIVE_REFINE_THRESHOLD", "0.5"))
     
     # LLM Parameters
     LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.7"))
     LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", "1024"))
     
+    # Request Deadlines: total budget per chat (client may lower or raise it via
+    # the header, up to the max) and per-stage caps; GENERATION_RESERVE_MS is
+    # kept free for the answer call, so earlier stages are cut short first
+    REQUEST_TIMEOUT_MS: float = float(os.getenv("REQUEST_TIMEOUT_MS", "20000"))
+    REQUEST_TIMEOUT_MAX_MS: float = float(os.getenv("REQUEST_TIMEOUT_MAX_MS", "60000"))
+    REQUEST_TIMEOUT_HEADER: str = os.getenv("REQUEST_TIMEOUT_HEADER", "X-Request-Timeout-Ms")
+    ANALYSIS_BUDGET_MS: float = float(os.getenv("ANALYSIS_BUDGET_MS", "4000"))
+    RETRIEVAL_BUDGET_MS: float = float(os.getenv("RETRIEVAL_BUDGET_MS", "2000"))
+    GENERATION_RESERVE_MS: float = float(os.getenv("GENERATION_RESERVE_MS", "6000"))
+    
+    # Dependency timeouts (seconds)
+    GROQ_TIMEOUT: float = float(os.getenv("GROQ_TIMEOUT", "30"))
+    QDRANT_TIMEOUT: int = int(os.getenv("QDRANT_TIMEOUT", "5"))
+    SCRAPER_PAGE_TIMEOUT: float = float(os.getenv("SCRAPER_PAGE_TIMEOUT", "20"))
+    SCRAPER_TOTAL_TIMEOUT: float = float(os.getenv("SCRAPER_TOTAL_TIMEOUT", "600"))
+    
+    # Concurrent sessionless requests with the same normalized message share one pipeline run
+    COALESCE_REQUESTS: bool = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+    
+    # Admission control (per worker): at most ADMISSION_MAX_IN_FLIGHT chats run
+    # at once (0 = unlimited), up to ADMISSION_MAX_QUEUE wait briefly, the rest
+    # get 503; clients over RATE_LIMIT_PER_MINUTE (0 = off) get 429
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "8"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+    ADMISSION_QUEUE_TIMEOUT_MS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "2000"))
+    RATE_LIMIT_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "10"))
+    RATE_LIMIT_MAX_CLIENTS: int = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+    # Proxies (addresses or CIDR ranges) whose X-Forwarded-For is believed
+    # when identifying clients; nginx on the same host by default
+    TRUSTED_PROXIES: list = os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",")
+    
+    # OpenTelemetry tracing (needs opentelemetry-sdk; "otlp" also needs
+    # opentelemetry-exporter-otlp-proto-http and reads OTEL_EXPORTER_OTLP_ENDPOINT)
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "otlp").lower()  # otlp, file or console
+    TRACING_FILE_PATH: str = os.getenv("TRACING_FILE_PATH", "traces.jsonl")
+    TRACING_SAMPLE_RATIO: float = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+    TRACING_SERVICE_NAME: str = os.getenv("TRACING_SERVICE_NAME", "nexgenteck-chatbot")
+    
+    # On-demand /chat profiling with pyinstrument: requests carrying
+    # PROFILING_ADMIN_TOKEN in X-Admin-Token plus X-Profile: 1 (or ?profile=1),
+    # and a PROFILING_SAMPLE_RATE fraction of all requests, are profiled
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_ADMIN_TOKEN: str = os.getenv("PROFILING_ADMIN_TOKEN", "")
+    PROFILING_SAMPLE_RATE: float = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_INTERVAL_MS: float = float(os.getenv("PROFILING_INTERVAL_MS", "1"))
+    PROFILING_DIR: str = os.getenv("PROFILING_DIR", "profiles")
+    PROFILING_FORMAT: str = os.getenv("PROFILING_FORMAT", "speedscope").lower()  # speedscope or html
+    PROFILING_MAX_FILES: int = int(os.getenv("PROFILING_MAX_FILES", "50"))
+    
+    # Batch chat (/chat/batch, admin only): X-Admin-Token value (empty = endpoint
+    # off), messages per request and answers generated at once
+    BATCH_ADMIN_TOKEN: str = os.getenv("BATCH_ADMIN_TOKEN", "")
+    BATCH_MAX_MESSAGES: int = int(os.getenv("BATCH_MAX_MESSAGES", "50"))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    # Texts per RoBERTa forward pass in analyze_sentiment_batch
+    SENTIMENT_BATCH_SIZE: int = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+    
+    # WebSocket chat (/ws): open connections per worker and per client,
+    # idle timeout and the largest client frame accepted
+    WS_MAX_CONNECTIONS: int = int(os.getenv("WS_MAX_CONNECTIONS", "500"))
+    WS_MAX_CONNECTIONS_PER_CLIENT: int = int(os.getenv("WS_MAX_CONNECTIONS_PER_CLIENT", "5"))
+    WS_IDLE_TIMEOUT_SECONDS: float = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "300"))
+    WS_MAX_MESSAGE_BYTES: int = int(os.getenv("WS_MAX_MESSAGE_BYTES", "16384"))
+    
+    # Logging (records are written by a background thread; 0 = write synchronously)
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text").lower()  # text or json
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    
+    # Circuit breakers (one per dependency: Groq, Qdrant): open when at least
+    # BREAKER_MIN_CALLS calls in the last BREAKER_WINDOW_SECONDS failed at
+    # BREAKER_FAILURE_RATE or more; after BREAKER_OPEN_SECONDS let probes through
+    BREAKER_ENABLED: bool = os.getenv("BREAKER_ENABLED", "true").lower() == "true"
+    BREAKER_WINDOW_SECONDS: float = float(os.getenv("BREAKER_WINDOW_SECONDS", "30"))
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+    BREAKER_FAILURE_RATE: float = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+    BREAKER_OPEN_SECONDS: float = float(os.getenv("BREAKER_OPEN_SECONDS", "15"))
+    BREAKER_HALF_OPEN_PROBES: int = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+    
+    # Retry budget shared by all dependencies: retries (including hedges and
+    # failovers) may add at most RETRY_BUDGET_RATIO of the calls made in the
+    # last RETRY_BUDGET_WINDOW_SECONDS, plus RETRY_BUDGET_MIN_PER_SECOND
+    RETRY_ATTEMPTS: int = int(os.getenv("RETRY_ATTEMPTS", "1"))
+    RETRY_BACKOFF_MS: float = float(os.getenv("RETRY_BACKOFF_MS", "100"))
+    RETRY_BUDGET_RATIO: float = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+    RETRY_BUDGET_MIN_PER_SECOND: float = float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "1"))
+    RETRY_BUDGET_WINDOW_SECONDS: float = float(os.getenv("RETRY_BUDGET_WINDOW_SECONDS", "10"))
+    
+    # Recent answers to sessionless questions, served when Groq is unavailable
+    ANSWER_CACHE_SIZE: int = int(os.getenv("ANSWER_CACHE_SIZE", "500"))
+    ANSWER_CACHE_TTL_SECONDS: float = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+    
+    # Groq endpoint override (e.g. http://127.0.0.1:8100 for benchmarks/fake_groq_server.py)
+    GROQ_BASE_URL: str = os.getenv("GROQ_BASE_URL", "")
+    
+    # Hedged generation: if LLM_MODEL hasn't streamed a token by the
+    # HEDGE_PERCENTILE of recent time-to-first-token, also ask HEDGE_MODEL
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+    HEDGE_MODEL: str = os.getenv("HEDGE_MODEL", "")  # empty = same as LLM_MODEL
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    HEDGE_INITIAL_DELAY_MS: float = float(os.getenv("HEDGE_INITIAL_DELAY_MS", "1500"))
+    HEDGE_MIN_DELAY_MS: float = float(os.getenv("HEDGE_MIN_DELAY_MS", "250"))
+    HEDGE_MAX_DELAY_MS: float = float(os.getenv("HEDGE_MAX_DELAY_MS", "5000"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_WINDOW: int = int(os.getenv("HEDGE_WINDOW", "500"))
+    # Retry on HEDGE_MODEL when LLM_MODEL fails before its first token
+    LLM_FAILOVER: bool = os.getenv("LLM_FAILOVER", "true").lower() == "true"
+    
+    # Pipeline Mode ("two_call": analysis LLM call, then answer;
+    # "single_call": retrieve on the raw message, one structured call)
+    PIPELINE_MODE: str = os.getenv("PIPELINE_MODE", "two_call").lower()
+    
+    # Conversation Sessions (recent turns verbatim + rolling summary)
+    SESSION_RECENT_TURNS: int = int(os.getenv("SESSION_RECENT_TURNS", "3"))
+    SESSION_TURN_MAX_CHARS: int = int(os.getenv("SESSION_TURN_MAX_CHARS", "1500"))
+    SESSION_SUMMARY_MAX_CHARS: int = int(os.getenv("SESSION_SUMMARY_MAX_CHARS", "1200"))
+    SESSION_SUMMARY_MODEL: str = os.getenv("SESSION_SUMMARY_MODEL", "llama-3.1-8b-instant")
+    SESSION_TTL_SECONDS: float = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+    SESSION_MAX_SESSIONS: int = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+    SESSION_MAX_BYTES: int = int(os.getenv("SESSION_MAX_BYTES", "16384"))
+    SESSION_MAX_TOTAL_BYTES: int = int(os.getenv("SESSION_MAX_TOTAL_BYTES", str(64 * 1024 * 1024)))
+    # Key that signs server-issued session IDs (empty = random per start;
+    # set it to keep IDs valid across restarts or several instances)
+    SESSION_SECRET: str = os.getenv("SESSION_SECRET", "")
+    
     # Qdrant Configuration (in-memory by default)
     QDRANT_URL: str = os.getenv("QDRANT_URL", ":memory:")
     COLLECTION_NAME: str = os.getenv("COLLECTION_NAME", "nexgenteck_knowledge")
     
+    # Qdrant Quantization ("none", "scalar" for int8, or "binary")
+    QDRANT_QUANTIZATION: str = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true"
+    QDRANT_ON_DISK_VECTORS: bool = os.getenv("QDRANT_ON_DISK_VECTORS", "false").lower() == "true"
+    QDRANT_RESCORE: bool = os.getenv("QDRANT_RESCORE", "true").lower() == "true"
+    QDRANT_OVERSAMPLING: float = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))
+    
+    # Vector Backend ("qdrant" or "numpy" for in-process exact search)
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+    NUMPY_VECTOR_DTYPE: str = os.getenv("NUMPY_VECTOR_DTYPE", "float32")
+    
+    # Knowledge base ingestion: documents per encode/upsert batch, batches
+    # buffered between the read, encode and write stages, the longest a
+    # partial batch waits for more documents, progress log interval
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "128"))
+    INGEST_QUEUE_BATCHES: int = int(os.getenv("INGEST_QUEUE_BATCHES", "2"))
+    INGEST_FLUSH_SECONDS: float = float(os.getenv("INGEST_FLUSH_SECONDS", "1"))
+    INGEST_PROGRESS_SECONDS: float = float(os.getenv("INGEST_PROGRESS_SECONDS", "5"))
+    
+    # Inference ("local" runs models in-process, "sidecar" uses inference_server.py)
+    INFERENCE_MODE: str = os.getenv("INFERENCE_MODE", "local").lower()
+    INFERENCE_SOCKET: str = os.getenv("INFERENCE_SOCKET", "/tmp/ngt-inference.sock")
+    INFERENCE_TIMEOUT: float = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+    INFERENCE_STARTUP_TIMEOUT: float = float(os.getenv("INFERENCE_STARTUP_TIMEOUT", "300"))
+    INFERENCE_MAX_BATCH: int = int(os.getenv("INFERENCE_MAX_BATCH", "32"))
+    INFERENCE_MAX_WAIT_MS: float = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+    
+    # Local Intent Router (kNN over query embeddings; see intent_router.py)
+    INTENT_ROUTER_ENABLED: bool = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+    INTENT_ROUTER_MODEL_PATH: str = os.getenv("INTENT_ROUTER_MODEL_PATH", "intent_router.npz")
+    INTENT_ROUTER_K: int = int(os.getenv("INTENT_ROUTER_K", "7"))
+    INTENT_ROUTER_THRESHOLD: float = float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.8"))
+    INTENT_ROUTER_MIN_SIMILARITY: float = float(os.getenv("INTENT_ROUTER_MIN_SIMILARITY", "0.5"))
+    # Intents always sent to the LLM (it extracts contact details for leads)
+    INTENT_ROUTER_LLM_INTENTS: list = os.getenv("INTENT_ROUTER_LLM_INTENTS", "contact,hire,quote").split(",")
+    # Append LLM analysis outputs here as router training data (empty = off)
+    INTENT_LOG_PATH: str = os.getenv("INTENT_LOG_PATH", "")
+    
+    # Server Configuration (used by serve.py)
+    HOST: str = os.getenv("HOST", "0.0.0.0")
+    PORT: int = int(os.getenv("PORT", "8000"))
+    WEB_WORKERS: int = int(os.getenv("WEB_WORKERS", "1"))
+    # Torch intra-op threads per preforked worker (0 = CPU count / workers)
+    TORCH_THREADS_PER_WORKER: int = int(os.getenv("TORCH_THREADS_PER_WORKER", "0"))
+    
     @classmethod
     def validate(cls) -> bool:
         """Validate that required configuration is present."""
         if not cls.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY environment variable is required")
+        if cls.PIPELINE_MODE not in ("two_call", "single_call"):
+            raise ValueError(
+                f"PIPELINE_MODE must be 'two_call' or 'single_call', got '{cls.PIPELINE_MODE}'"
+            )
+        if cls.QDRANT_QUANTIZATION not in ("none", "scalar", "binary"):
+            raise ValueError(
+                f"QDRANT_QUANTIZATION must be 'none', 'scalar' or 'binary', got '{cls.QDRANT_QUANTIZATION}'"
+            )
         return True
 
 
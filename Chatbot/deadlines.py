@@ -0,0 +1,148 @@
+"""
+End-to-end request deadlines for the NexGenTeck AI Chatbot.
+
+Each chat request gets a Deadline, from REQUEST_TIMEOUT_MS or the client's
+X-Request-Timeout-Ms header (capped at REQUEST_TIMEOUT_MAX_MS). Pipeline
+stages run under Deadline.run(), which gives each stage the smaller of its own
+budget and what is left after reserving time for later stages. A stage that
+runs out of time returns None so the node can degrade, e.g. skip analysis or
+answer without context. Every skip or timeout is recorded per stage.
+"""
+
+from collections import Counter
+from typing import Awaitable, Dict, List, Optional
+import asyncio
+import logging
+import threading
+import time
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Message of the CancelledError a stage receives when its budget runs out;
+# circuit breakers count such a cancellation as a failed call (resilience.py)
+DEADLINE_EXCEEDED = "deadline exceeded"
+
+# Process-wide counts of "<stage>:<cause>" (cause is "timeout" or "skipped")
+_stage_events: Counter = Counter()
+_stage_events_lock = threading.Lock()
+
+
+class Deadline:
+    """A point in time by which a request must be answered."""
+
+    def __init__(self, timeout_ms: float = None):
+        """
+        Args:
+            timeout_ms: Total budget in milliseconds (defaults to config.REQUEST_TIMEOUT_MS)
+        """
+        self.timeout_ms = timeout_ms or config.REQUEST_TIMEOUT_MS
+        self.started = time.monotonic()
+        self.expires = self.started + self.timeout_ms / 1000
+        self.events: List[Dict] = []
+
+    @classmethod
+    def from_header(cls, value: Optional[str]) -> "Deadline":
+        """
+        Build a deadline from a client-supplied timeout header.
+
+        Args:
+            value: Header value in milliseconds (invalid or missing values use the default)
+
+        Returns:
+            Deadline capped at config.REQUEST_TIMEOUT_MAX_MS
+        """
+        timeout_ms = config.REQUEST_TIMEOUT_MS
+        if value:
+            try:
+                timeout_ms = float(value)
+            except ValueError:
+                logger.warning("Ignoring invalid %s header: %r", config.REQUEST_TIMEOUT_HEADER, value)
+        timeout_ms = min(max(timeout_ms, 1.0), config.REQUEST_TIMEOUT_MAX_MS)
+        return cls(timeout_ms)
+
+    def remaining(self) -> float:
+        """Seconds left (negative once expired)."""
+        return self.expires - time.monotonic()
+
+    def expired(self) -> bool:
+        """Check whether the deadline has passed."""
+        return self.remaining() <= 0
+
+    def budget(self, stage_ms: float = None, reserve_ms: float = 0) -> float:
+        """
+        Seconds available to a stage.
+
+        Args:
+            stage_ms: The stage's own cap (None = no cap)
+            reserve_ms: Time to keep for the stages after this one
+
+        Returns:
+            min(stage cap, remaining - reserve), possibly <= 0
+        """
+        available = self.remaining() - reserve_ms / 1000
+        if stage_ms is not None:
+            available = min(available, stage_ms / 1000)
+        return available
+
+    def record(self, stage: str, cause: str, budget: float):
+        """Record that a stage was skipped or timed out."""
+        event = {'stage': stage, 'cause': cause, 'budget_ms': round(max(budget, 0) * 1000, 1)}
+        self.events.append(event)
+        with _stage_events_lock:
+            _stage_events[f"{stage}:{cause}"] += 1
+        logger.warning("Stage '%s' %s (budget %s ms, %.0f ms left)", stage, cause, event['budget_ms'], self.remaining() * 1000)
+
+    async def run(self, stage: str, awaitable: Awaitable, stage_ms: float = None, reserve_ms: float = 0):
+        """
+        Await a stage within its budget.
+
+        Args:
+            stage: Stage name used in records
+            awaitable: Coroutine or task to run
+            stage_ms: The stage's own cap in milliseconds
+            reserve_ms: Time to keep for later stages
+
+        Returns:
+            The stage's result, or None if it was skipped or timed out
+        """
+        if isinstance(awaitable, asyncio.Future) and awaitable.done():
+            # Already finished in the background (e.g. speculative work); no time needed
+            return awaitable.result()
+
+        budget = self.budget(stage_ms, reserve_ms)
+        if budget <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            else:
+                asyncio.ensure_future(awaitable).cancel()
+            self.record(stage, "skipped", budget)
+            return None
+        task = asyncio.ensure_future(awaitable)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=budget)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if task in done:
+            return task.result()
+
+        # Tell the stage why it is cancelled, so a hung dependency counts as failing
+        task.cancel(DEADLINE_EXCEEDED)
+        try:
+            await task
+        except BaseException:
+            pass
+        self.record(stage, "timeout", budget)
+        return None
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """Skips and timeouts per stage since startup."""
+    result: Dict[str, Dict[str, int]] = {}
+    with _stage_events_lock:
+        for key, count in _stage_events.items():
+            stage, cause = key.split(":", 1)
+            result.setdefault(stage, {})[cause] = count
+    return result
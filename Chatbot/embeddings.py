@@ -7,13 +7,16 @@ import os
 # Disable tokenizers parallelism to avoid multiprocessing issues on Windows
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import List, TYPE_CHECKING
 import logging
+import threading
 import numpy as np
 
 from config import config
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,6 +25,7 @@ class EmbeddingManager:
     
     _instance = None
     _model = None
+    _lock = threading.Lock()
     
     def __new__(cls):
         """Singleton pattern to avoid loading model multiple times."""
@@ -29,11 +33,26 @@ class EmbeddingManager:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
-        """Initialize the embedding model if not already loaded."""
-        if EmbeddingManager._model is None:
-            logger.info(f"Loading embedding model: {config.EMBEDDING_MODEL}")
+    def load(self):
+        """
+        Load the embedding model if not already loaded.
+        Deferred until first use (or startup) so importing this module stays cheap.
+        """
+        if config.INFERENCE_MODE == "sidecar":
+            # The sidecar owns the model; just wait until it answers
+            from inference_client import inference_client
+            info = inference_client.wait_until_ready(timeout=config.INFERENCE_STARTUP_TIMEOUT)
+            logger.info("Using inference sidecar for embeddings (%s)", info['embedding_model'])
+            return
+        
+        with EmbeddingManager._lock:
+            if EmbeddingManager._model is not None:
+                return
+            
+            logger.info("Loading embedding model: %s", config.EMBEDDING_MODEL)
             try:
+                from sentence_transformers import SentenceTransformer
+                
                 # Force clean download with cache_folder to avoid corruption
                 EmbeddingManager._model = SentenceTransformer(
                     config.EMBEDDING_MODEL,
@@ -42,12 +61,18 @@ class EmbeddingManager:
                 )
                 logger.info("Embedding model loaded successfully")
             except Exception as e:
-                logger.error(f"Failed to load embedding model: {e}")
+                logger.error("Failed to load embedding model: %s", e)
                 raise RuntimeError(f"BAAI/bge-m3 is required. Error: {e}")
     
+    def is_loaded(self) -> bool:
+        """Check whether the model has been loaded."""
+        return EmbeddingManager._model is not None or config.INFERENCE_MODE == "sidecar"
+    
     @property
-    def model(self) -> SentenceTransformer:
-        """Get the loaded model."""
+    def model(self) -> "SentenceTransformer":
+        """Get the loaded model, loading it on first access."""
+        if EmbeddingManager._model is None:
+            self.load()
         return EmbeddingManager._model
     
     def embed_text(self, text: str) -> List[float]:
@@ -60,8 +85,7 @@ class EmbeddingManager:
         Returns:
             Embedding vector as list of floats
         """
-        embedding = self.model.encode(text, normalize_embeddings=True)
-        return embedding.tolist()
+        return self.encode([text])[0].tolist()
     
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
@@ -76,19 +100,44 @@ class EmbeddingManager:
         if not texts:
             return []
         
-        logger.info(f"Generating embeddings for {len(texts)} texts")
+        logger.info("Generating embeddings for %s texts", len(texts))
+        return self.encode(texts).tolist()
+    
+    def encode(self, texts: List[str], show_progress: bool = None) -> np.ndarray:
+        """
+        Generate embeddings as a float32 matrix without converting to lists.
+        
+        Args:
+            texts: List of texts to embed
+            show_progress: Show a progress bar (default: for more than 10 texts)
+            
+        Returns:
+            Array of shape (len(texts), dim)
+        """
+        if config.INFERENCE_MODE == "sidecar":
+            from inference_client import inference_client
+            return inference_client.encode(texts)
+        
         embeddings = self.model.encode(
-            texts, 
+            texts,
             normalize_embeddings=True,
-            show_progress_bar=len(texts) > 10
+            convert_to_numpy=True,
+            show_progress_bar=len(texts) > 10 if show_progress is None else show_progress
         )
-        return embeddings.tolist()
+        return np.asarray(embeddings, dtype=np.float32)
     
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings produced by the model."""
-        # Generate a test embedding to get dimension
-        test_embedding = self.embed_text("test")
-        return len(test_embedding)
+        if config.INFERENCE_MODE == "sidecar":
+            from inference_client import inference_client
+            return inference_client.info()['dimension']
+        
+        dim = self.model.get_sentence_embedding_dimension()
+        if dim:
+            return dim
+        
+        # Some models don't declare it; fall back to a test embedding
+        return len(self.embed_text("test"))
 
 
 # Singleton instance
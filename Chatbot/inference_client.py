@@ -0,0 +1,167 @@
+"""
+Client for the local inference sidecar (see inference_server.py).
+
+Talks to the sidecar over a Unix socket. Each frame is a small JSON header
+followed by a raw binary payload; embeddings come back as raw float32 bytes
+that are received straight into a buffer and wrapped with np.frombuffer,
+so no per-float conversion or extra copy happens in the API process.
+"""
+
+from typing import Dict, List, Tuple
+import json
+import logging
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Frame layout: header length, payload length (big-endian uint32), then
+# the UTF-8 JSON header and the payload bytes.
+FRAME_HEADER = struct.Struct("!II")
+
+
+class InferenceError(RuntimeError):
+    """Raised when the sidecar reports an error or cannot be reached."""
+
+
+class InferenceClient:
+    """
+    Blocking client for the inference sidecar.
+    Keeps one connection per thread; requests on a connection are sequential.
+    """
+
+    def __init__(self, socket_path: str = None, timeout: float = None):
+        """
+        Initialize the client. Connections are opened lazily.
+
+        Args:
+            socket_path: Unix socket path (defaults to config.INFERENCE_SOCKET)
+            timeout: Per-request timeout in seconds (defaults to config.INFERENCE_TIMEOUT)
+        """
+        self.socket_path = socket_path or config.INFERENCE_SOCKET
+        self.timeout = timeout or config.INFERENCE_TIMEOUT
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        """Get this thread's connection, opening it if needed."""
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def reset(self):
+        """Drop this thread's connection (e.g. after fork)."""
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _recv_exact(self, sock: socket.socket, size: int) -> bytearray:
+        """Receive exactly `size` bytes into a fresh buffer."""
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            n = sock.recv_into(view[received:], size - received)
+            if n == 0:
+                raise ConnectionError("Inference sidecar closed the connection")
+            received += n
+        return buffer
+
+    def _call(self, header: Dict, retry: bool = True) -> Tuple[Dict, bytearray]:
+        """
+        Send one request and read its response.
+
+        Args:
+            header: Request header (must contain 'op')
+            retry: Reconnect and retry once if the connection was stale
+
+        Returns:
+            (response header, payload buffer)
+        """
+        body = json.dumps(header).encode("utf-8")
+        try:
+            sock = self._connection()
+            sock.sendall(FRAME_HEADER.pack(len(body), 0) + body)
+            header_len, payload_len = FRAME_HEADER.unpack(self._recv_exact(sock, FRAME_HEADER.size))
+            response = json.loads(self._recv_exact(sock, header_len))
+            payload = self._recv_exact(sock, payload_len)
+        except socket.timeout as e:
+            # The response may still arrive later; never reuse this connection
+            self.reset()
+            raise InferenceError(f"Inference sidecar timed out after {self.timeout}s") from e
+        except (ConnectionError, OSError) as e:
+            self.reset()
+            if retry:
+                return self._call(header, retry=False)
+            raise InferenceError(f"Inference sidecar unavailable at {self.socket_path}: {e}") from e
+
+        if not response.get("ok"):
+            raise InferenceError(response.get("error", "Unknown inference error"))
+        return response, payload
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in the sidecar.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 array of shape (len(texts), dim), backed by the receive buffer
+        """
+        response, payload = self._call({"op": "embed", "texts": texts})
+        return np.frombuffer(payload, dtype=np.float32).reshape(response["shape"])
+
+    def sentiment(self, texts: List[str]) -> List[Dict]:
+        """
+        Run RoBERTa sentiment analysis in the sidecar.
+
+        Args:
+            texts: Texts to analyze
+
+        Returns:
+            One dict with 'sentiment' and 'sentiment_score' per text
+        """
+        response, _ = self._call({"op": "sentiment", "texts": texts})
+        return response["results"]
+
+    def info(self) -> Dict:
+        """Get model info and batching statistics from the sidecar."""
+        response, _ = self._call({"op": "info"})
+        return response
+
+    def wait_until_ready(self, timeout: float = 300) -> Dict:
+        """
+        Block until the sidecar answers, e.g. while it is still loading models.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            The sidecar's info response
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self.info()
+            except InferenceError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.5)
+
+
+# Singleton instance
+inference_client = InferenceClient()
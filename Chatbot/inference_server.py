@@ -0,0 +1,239 @@
+"""
+Local inference sidecar for the NexGenTeck AI Chatbot.
+
+A separate process that owns BGE-M3 and RoBERTa, so torch inference doesn't
+compete with HTTP handling for the API process's GIL and CPU. Requests from
+all API workers are merged into shared model calls (cross-request batching):
+a batch is flushed when it reaches INFERENCE_MAX_BATCH texts or after
+INFERENCE_MAX_WAIT_MS, whichever comes first.
+
+Usage:
+    python inference_server.py --socket /tmp/ngt-inference.sock
+Then run the API with INFERENCE_MODE=sidecar.
+"""
+
+import multiprocessing
+import os
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import logging
+
+import numpy as np
+
+from config import config
+from inference_client import FRAME_HEADER
+from logging_setup import setup_logging
+
+logger = logging.getLogger("inference_server")
+
+
+class MicroBatcher:
+    """
+    Merges concurrent requests into one model call.
+    Each request is a list of texts; results are split back per request.
+    """
+
+    def __init__(self, name: str, fn: Callable, max_batch: int, max_wait: float):
+        """
+        Args:
+            name: Name used in stats
+            fn: Blocking function mapping a list of texts to a sliceable result
+            max_batch: Maximum texts per model call
+            max_wait: Seconds to wait for more requests before flushing
+        """
+        self.name = name
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # One thread per model keeps calls serialized; torch parallelizes within a call
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.batches = 0
+        self.texts = 0
+
+    async def submit(self, texts: List[str]):
+        """Queue texts for the next batch and wait for their results."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[List[str], asyncio.Future]]:
+        """Wait for one request, then gather more until the batch is full or time is up."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.max_wait
+
+        while size < self.max_batch:
+            if self.queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self.queue.get_nowait()
+            batch.append(item)
+            size += len(item[0])
+
+        return batch
+
+    async def run(self):
+        """Batching loop; runs for the lifetime of the server."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [text for request_texts, _ in batch for text in request_texts]
+
+            try:
+                results = await loop.run_in_executor(self.executor, self.fn, texts)
+            except Exception as e:
+                logger.error("%s batch of %s failed: %s", self.name, len(texts), e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    def stats(self) -> Dict:
+        """Batching statistics."""
+        return {
+            'batches': self.batches,
+            'texts': self.texts,
+            'mean_batch_size': round(self.texts / self.batches, 2) if self.batches else 0.0,
+            'queued': self.queue.qsize(),
+        }
+
+
+class InferenceServer:
+    """Unix-socket server answering embed / sentiment / info requests."""
+
+    def __init__(self, socket_path: str, max_batch: int, max_wait: float):
+        # The sidecar itself must run the models in-process
+        config.INFERENCE_MODE = "local"
+
+        from embeddings import embedding_manager
+        from sentiment import llm_analyzer
+
+        self.socket_path = socket_path
+        self.embedding_manager = embedding_manager
+        self.llm_analyzer = llm_analyzer
+        self.embedder = MicroBatcher("embed", embedding_manager.encode, max_batch, max_wait)
+        self.sentiment = MicroBatcher("sentiment", llm_analyzer.analyze_sentiment_batch, max_batch, max_wait)
+
+    def load(self):
+        """Load both models before accepting connections."""
+        self.embedding_manager.load()
+        self.llm_analyzer.load_sentiment_model()
+        self.dimension = self.embedding_manager.get_embedding_dimension()
+
+    async def _read_frame(self, reader: asyncio.StreamReader) -> Dict:
+        """Read one request frame (requests carry no payload)."""
+        header_len, payload_len = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+        header = json.loads(await reader.readexactly(header_len))
+        if payload_len:
+            await reader.readexactly(payload_len)
+        return header
+
+    def _write_frame(self, writer: asyncio.StreamWriter, header: Dict, payload=b""):
+        """Write one response frame; payload may be any buffer (written without copying to bytes)."""
+        body = json.dumps(header).encode("utf-8")
+        payload = memoryview(payload).cast("B")
+        writer.write(FRAME_HEADER.pack(len(body), payload.nbytes) + body)
+        if payload.nbytes:
+            writer.write(payload)
+
+    async def _handle_request(self, writer: asyncio.StreamWriter, request: Dict):
+        """Dispatch one request and write its response."""
+        op = request.get("op")
+        if op == "embed":
+            vectors = np.ascontiguousarray(await self.embedder.submit(request["texts"]), dtype=np.float32)
+            self._write_frame(writer, {'ok': True, 'shape': list(vectors.shape)}, vectors)
+        elif op == "sentiment":
+            results = await self.sentiment.submit(request["texts"])
+            self._write_frame(writer, {'ok': True, 'results': list(results)})
+        elif op == "info":
+            self._write_frame(writer, {
+                'ok': True,
+                'embedding_model': config.EMBEDDING_MODEL,
+                'dimension': self.dimension,
+                'sentiment_loaded': self.llm_analyzer.load_sentiment_model(),
+                'embed': self.embedder.stats(),
+                'sentiment': self.sentiment.stats(),
+            })
+        else:
+            self._write_frame(writer, {'ok': False, 'error': f"Unknown op: {op}"})
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one client connection until it closes."""
+        try:
+            while True:
+                try:
+                    request = await self._read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+
+                try:
+                    await self._handle_request(writer, request)
+                except Exception as e:
+                    logger.error("Inference request failed: %s", e)
+                    self._write_frame(writer, {'ok': False, 'error': str(e)})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        """Start batching loops and serve until cancelled."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        batchers = [asyncio.create_task(self.embedder.run()), asyncio.create_task(self.sentiment.run())]
+        server = await asyncio.start_unix_server(self.handle_connection, path=self.socket_path)
+        logger.info("Inference sidecar listening on %s (dimension %s)", self.socket_path, self.dimension)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in batchers:
+                task.cancel()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=config.INFERENCE_SOCKET)
+    parser.add_argument("--max-batch", type=int, default=config.INFERENCE_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=config.INFERENCE_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    setup_logging()
+
+    server = InferenceServer(args.socket, args.max_batch, args.max_wait_ms / 1000)
+    server.load()
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
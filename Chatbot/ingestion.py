@@ -0,0 +1,255 @@
+"""
+Streaming knowledge base ingestion for the NexGenTeck AI Chatbot.
+
+Documents are indexed in batches through three stages, each on its own
+thread, connected by bounded queues:
+- read:   the caller's thread iterates the documents (a list, or a generator
+          such as WebsiteScraper.iter_documents)
+- encode: groups documents into INGEST_BATCH_SIZE batches and embeds batch
+          N+1 with BGE-M3 ...
+- write:  ... while batch N is upserted into the vector store
+
+A batch is also sent on once its first document has waited
+INGEST_FLUSH_SECONDS, so a slow source (a crawl) makes its first pages
+searchable quickly instead of waiting for a full batch. At most
+INGEST_QUEUE_BATCHES batches wait between two stages, so a fast reader
+blocks instead of buffering the whole corpus, and memory stays bounded by
+the batch size rather than the corpus size. Progress is logged every
+INGEST_PROGRESS_SECONDS and passed to an optional callback.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# End-of-stream marker passed from stage to stage
+_DONE = object()
+
+# How often blocked stages check whether another stage failed
+_POLL_SECONDS = 0.1
+
+
+class IngestionPipeline:
+    """
+    Encode and write documents in overlapping batches.
+
+    Usage:
+        pipeline = IngestionPipeline(embedding_manager.encode, write_batch)
+        count = pipeline.run(documents)
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        write: Callable[[List[str], np.ndarray, List[Dict]], None],
+        batch_size: int = None,
+        queue_batches: int = None,
+        on_progress: Optional[Callable[[Dict], None]] = None
+    ):
+        """
+        Args:
+            encode: Embeds a list of texts, returning a (n, dim) array
+            write: Stores one batch: (contents, vectors, metadatas)
+            batch_size: Documents per batch (defaults to INGEST_BATCH_SIZE)
+            queue_batches: Batches buffered between stages (defaults to INGEST_QUEUE_BATCHES)
+            on_progress: Called from the writer thread with progress() after each batch
+        """
+        self.encode = encode
+        self.write = write
+        self.batch_size = max(1, batch_size or config.INGEST_BATCH_SIZE)
+        self.queue_batches = max(1, queue_batches or config.INGEST_QUEUE_BATCHES)
+        self.on_progress = on_progress
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self.started = None
+        self.read = 0
+        self.encoded = 0
+        self.written = 0
+        self.batches = 0
+        self.encode_seconds = 0.0
+        self.write_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def progress(self) -> Dict:
+        """Counters for the current run."""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            'read': self.read,
+            'encoded': self.encoded,
+            'written': self.written,
+            'batches': self.batches,
+            'seconds': round(elapsed, 3),
+            'documents_per_second': round(self.written / elapsed, 1) if elapsed else 0.0,
+            'encode_seconds': round(self.encode_seconds, 3),
+            'write_seconds': round(self.write_seconds, 3),
+            # Time the reader waited for the encoder (backpressure)
+            'blocked_seconds': round(self.blocked_seconds, 3),
+        }
+
+    def _fail(self, error: BaseException):
+        """Record the first stage failure and stop every stage."""
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        """Put with backpressure; False if the pipeline was stopped meanwhile."""
+        try:
+            target.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source: queue.Queue):
+        """Get the next item; _DONE if the pipeline was stopped meanwhile."""
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _next_batch(self, source: queue.Queue):
+        """
+        Collect up to batch_size documents, waiting at most INGEST_FLUSH_SECONDS
+        after the first one.
+
+        Returns:
+            (documents, True if the stream ended)
+        """
+        first = self._get(source)
+        if first is _DONE:
+            return [], True
+        batch = [first]
+        flush_at = time.perf_counter() + config.INGEST_FLUSH_SECONDS
+        while len(batch) < self.batch_size:
+            remaining = flush_at - time.perf_counter()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                document = source.get_nowait()
+            except queue.Empty:
+                try:
+                    document = source.get(timeout=min(remaining, _POLL_SECONDS))
+                except queue.Empty:
+                    continue
+            if document is _DONE:
+                return batch, True
+            batch.append(document)
+        return batch, False
+
+    def _encode_loop(self, source: queue.Queue, target: queue.Queue):
+        """Encode stage: batch documents, embed each batch and hand it to the writer."""
+        try:
+            done = False
+            while not done:
+                batch, done = self._next_batch(source)
+                if not batch:
+                    continue
+                contents = [document['content'] for document in batch]
+                metadatas = [document.get('metadata', {}) for document in batch]
+                started = time.perf_counter()
+                vectors = self.encode(contents)
+                self.encode_seconds += time.perf_counter() - started
+                self.encoded += len(contents)
+                if not self._put(target, (contents, vectors, metadatas)):
+                    return
+        except BaseException as e:
+            self._fail(e)
+            return
+        self._put(target, _DONE)
+
+    def _write_loop(self, source: queue.Queue):
+        """Write stage: store each encoded batch and report progress."""
+        last_log = time.perf_counter()
+        try:
+            while True:
+                item = self._get(source)
+                if item is _DONE:
+                    return
+                contents, vectors, metadatas = item
+                started = time.perf_counter()
+                self.write(contents, vectors, metadatas)
+                self.write_seconds += time.perf_counter() - started
+                self.written += len(contents)
+                self.batches += 1
+                if self.on_progress is not None:
+                    self.on_progress(self.progress())
+                if time.perf_counter() - last_log >= config.INGEST_PROGRESS_SECONDS:
+                    last_log = time.perf_counter()
+                    logger.info("Ingestion progress: %s documents indexed (%s read, %.0f docs/s)",
+                                self.written, self.read, self.written / (last_log - self.started))
+        except BaseException as e:
+            self._fail(e)
+
+    def run(self, documents: Iterable[Dict[str, str]]) -> int:
+        """
+        Index documents, blocking until every batch is written.
+
+        Args:
+            documents: Dicts with 'content' and 'metadata' keys; read lazily
+
+        Returns:
+            Number of documents written
+
+        Raises:
+            Whatever the document iterator, encode or write raised (batches
+            written before the failure stay in the store)
+        """
+        self.started = time.perf_counter()
+        # Documents waiting to be batched, and encoded batches waiting to be written
+        to_encode = queue.Queue(maxsize=self.batch_size * self.queue_batches)
+        to_write = queue.Queue(maxsize=self.queue_batches)
+        encoder = threading.Thread(target=self._encode_loop, args=(to_encode, to_write), name="ingest-encode", daemon=True)
+        writer = threading.Thread(target=self._write_loop, args=(to_write,), name="ingest-write", daemon=True)
+        encoder.start()
+        writer.start()
+
+        iterator = iter(documents)
+        try:
+            for document in iterator:
+                self.read += 1
+                if to_encode.full():
+                    started = time.perf_counter()
+                    if not self._put(to_encode, document):
+                        break
+                    self.blocked_seconds += time.perf_counter() - started
+                elif not self._put(to_encode, document):
+                    break
+            else:
+                self._put(to_encode, _DONE)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # Stop a generator source early (e.g. close the scraper's browser)
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            encoder.join()
+            writer.join()
+
+        if self._error is not None:
+            raise self._error
+
+        progress = self.progress()
+        logger.info(
+            "Ingested %s documents in %s batches in %.1f s (encode %.1f s, write %.1f s)",
+            progress['written'], progress['batches'], progress['seconds'],
+            progress['encode_seconds'], progress['write_seconds']
+        )
+        return self.written
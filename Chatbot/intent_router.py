@@ -0,0 +1,273 @@
+"""
+Local intent router for the NexGenTeck AI Chatbot.
+
+A k-nearest-neighbour head over BGE-M3 query embeddings, trained from logged
+LLM analysis outputs. High-confidence messages get their intent locally in
+about a millisecond; uncertain ones (and lead intents, whose contact details
+only the LLM extracts) fall back to the LLM analysis call.
+
+Collect training data by setting INTENT_LOG_PATH, then train:
+    python intent_router.py train --log intent_log.jsonl --out intent_router.npz
+    python intent_router.py eval --log intent_log.jsonl
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import argparse
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Fields learned from the LLM's analysis output
+BOOLEAN_FIELDS = ("is_greeting", "is_lead_intent", "needs_context")
+
+_log_lock = threading.Lock()
+# One background thread appends to the intent log, in order (created on first use)
+_log_writer: Optional[ThreadPoolExecutor] = None
+
+
+class IntentRouter:
+    """
+    kNN intent classifier over normalized query embeddings.
+
+    Confidence is the similarity-weighted vote share of the winning intent
+    among the k nearest logged messages. A prediction is only returned when
+    that share and the nearest neighbour's similarity both clear their
+    thresholds.
+    """
+
+    def __init__(self, model_path: str = None):
+        """
+        Initialize the router. The model file is loaded lazily.
+
+        Args:
+            model_path: Path to the trained .npz (defaults to config.INTENT_ROUTER_MODEL_PATH)
+        """
+        self.model_path = model_path or config.INTENT_ROUTER_MODEL_PATH
+        self._vectors: Optional[np.ndarray] = None
+        self._intents: Optional[np.ndarray] = None
+        self._intent_names: List[str] = []
+        self._flags: Dict[str, np.ndarray] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[bool]:
+        """
+        Load the trained head if the router is enabled and a model exists.
+
+        Returns:
+            True if loaded, None if the router is disabled or untrained
+        """
+        with self._lock:
+            if self._loaded:
+                return True if self._vectors is not None else None
+            self._loaded = True
+
+            if not config.INTENT_ROUTER_ENABLED or not os.path.exists(self.model_path):
+                logger.info("Intent router disabled (no trained model); using LLM analysis only")
+                return None
+
+            data = np.load(self.model_path, allow_pickle=False)
+            self._vectors = np.ascontiguousarray(data['vectors'], dtype=np.float32)
+            self._intents = data['intents']
+            self._intent_names = [str(name) for name in data['intent_names']]
+            self._flags = {field: data[field] for field in BOOLEAN_FIELDS}
+            logger.info("Intent router loaded with %s examples, %s intents", len(self._vectors), len(self._intent_names))
+            return True
+
+    def is_available(self) -> bool:
+        """Check whether a trained head is loaded."""
+        self.load()
+        return self._vectors is not None
+
+    def predict(self, vector: np.ndarray) -> Optional[Dict]:
+        """
+        Predict intent fields for one normalized query vector.
+
+        Args:
+            vector: BGE-M3 embedding of the message
+
+        Returns:
+            Intent fields in the LLM analysis format, or None when uncertain
+        """
+        if not self.is_available():
+            return None
+
+        scores = self._vectors @ np.asarray(vector, dtype=np.float32)
+        k = min(config.INTENT_ROUTER_K, len(scores))
+        top = np.argpartition(scores, len(scores) - k)[len(scores) - k:]
+        top_scores = scores[top]
+
+        if top_scores.max() < config.INTENT_ROUTER_MIN_SIMILARITY:
+            return None
+
+        weights = np.clip(top_scores, 0.0, None)
+        if weights.sum() <= 0:
+            return None
+
+        votes = np.bincount(self._intents[top], weights=weights, minlength=len(self._intent_names))
+        winner = int(votes.argmax())
+        confidence = float(votes[winner] / weights.sum())
+        intent = self._intent_names[winner]
+
+        if confidence < config.INTENT_ROUTER_THRESHOLD or intent in config.INTENT_ROUTER_LLM_INTENTS:
+            return None
+
+        # Boolean fields follow the neighbours that voted for the winning intent
+        agree = self._intents[top] == winner
+        result = {
+            field: bool(np.average(self._flags[field][top][agree], weights=weights[agree]) >= 0.5)
+            for field in BOOLEAN_FIELDS
+        }
+        result.update({
+            'intent': intent,
+            'context_topics': [],
+            'contact_data': None,
+            'confidence': round(confidence, 3),
+        })
+        return result
+
+
+def log_analysis(message: str, analysis: Dict):
+    """
+    Append an LLM analysis result to the training log (if INTENT_LOG_PATH is set).
+
+    The record is built here and written by a background thread, so callers
+    on the event loop never wait for the file.
+
+    Args:
+        message: The analyzed user message
+        analysis: Parsed LLM intent fields
+    """
+    global _log_writer
+    if not config.INTENT_LOG_PATH:
+        return
+
+    record = {'message': message}
+    record.update({field: bool(analysis.get(field, False)) for field in BOOLEAN_FIELDS})
+    record['intent'] = analysis.get('intent', 'general')
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    if _log_writer is None:
+        with _log_lock:
+            if _log_writer is None:
+                _log_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intent-log")
+    _log_writer.submit(_append_log, config.INTENT_LOG_PATH, line)
+
+
+def _append_log(path: str, line: str):
+    """Append one line to the intent log (runs on the log writer thread)."""
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError as e:
+        logger.warning("Could not write intent log: %s", e)
+
+
+def _reset_after_fork():
+    """Forked workers start their own writer thread (threads don't survive fork)."""
+    global _log_writer
+    _log_writer = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def load_examples(log_path: str) -> List[Dict]:
+    """Read logged analyses, keeping the latest record per distinct message."""
+    examples: Dict[str, Dict] = {}
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            key = " ".join(record['message'].lower().split())
+            examples[key] = record
+    return list(examples.values())
+
+
+def build_head(examples: List[Dict], vectors: np.ndarray) -> Dict[str, np.ndarray]:
+    """Build the arrays saved in the router's .npz file."""
+    intent_names = sorted({ex['intent'] for ex in examples})
+    index = {name: i for i, name in enumerate(intent_names)}
+    head = {
+        'vectors': vectors.astype(np.float32),
+        'intents': np.array([index[ex['intent']] for ex in examples], dtype=np.int64),
+        'intent_names': np.array(intent_names),
+    }
+    for field in BOOLEAN_FIELDS:
+        head[field] = np.array([bool(ex.get(field, False)) for ex in examples])
+    return head
+
+
+def train(log_path: str, out_path: str):
+    """Embed logged messages and save the kNN head."""
+    from embeddings import embedding_manager
+
+    examples = load_examples(log_path)
+    if not examples:
+        raise SystemExit(f"No examples in {log_path}")
+
+    vectors = embedding_manager.encode([ex['message'] for ex in examples])
+    np.savez(out_path, **build_head(examples, vectors))
+    print(f"Saved intent router with {len(examples)} examples to {out_path}")
+
+
+def evaluate(log_path: str, holdout: float, seed: int):
+    """Report coverage (answered locally) and accuracy on a held-out split."""
+    import tempfile
+    from embeddings import embedding_manager
+
+    examples = load_examples(log_path)
+    vectors = embedding_manager.encode([ex['message'] for ex in examples])
+    order = np.random.default_rng(seed).permutation(len(examples))
+    n_test = max(1, int(len(examples) * holdout))
+    test, fit = order[:n_test], order[n_test:]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "router.npz")
+        np.savez(path, **build_head([examples[i] for i in fit], vectors[fit]))
+        config.INTENT_ROUTER_ENABLED = True
+        router = IntentRouter(path)
+
+        answered = correct = 0
+        for i in test:
+            prediction = router.predict(vectors[i])
+            if prediction is None:
+                continue
+            answered += 1
+            correct += prediction['intent'] == examples[i]['intent'] and all(
+                prediction[field] == bool(examples[i].get(field, False)) for field in BOOLEAN_FIELDS
+            )
+
+    print(f"Held-out examples: {len(test)}")
+    print(f"Answered locally:  {answered / len(test):.1%}")
+    print(f"Accuracy (local):  {correct / answered:.1%}" if answered else "Accuracy (local):  n/a")
+
+
+# Singleton instance
+intent_router = IntentRouter()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["train", "eval"])
+    parser.add_argument("--log", default=config.INTENT_LOG_PATH or "intent_log.jsonl")
+    parser.add_argument("--out", default=config.INTENT_ROUTER_MODEL_PATH)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.command == "train":
+        train(args.log, args.out)
+    else:
+        evaluate(args.log, args.holdout, args.seed)
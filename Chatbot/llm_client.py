@@ -0,0 +1,319 @@
+"""
+Groq chat model access for the NexGenTeck AI Chatbot.
+
+- get_chat_model(): one cached ChatGroq client per parameter set, pointed at
+  GROQ_BASE_URL when set (e.g. the fake server in benchmarks/).
+- HedgedGenerator: streams the answer from LLM_MODEL. If no token has arrived
+  by a deadline taken from recent time-to-first-token percentiles, it fires a
+  second request (HEDGE_MODEL, or the same model) and keeps whichever starts
+  first, cancelling the other. If the primary fails before its first token,
+  the second request is sent immediately (failover).
+
+Every request goes through the Groq circuit breaker, and backup requests
+draw on the shared retry budget (see resilience.py).
+"""
+
+from collections import deque
+from typing import Callable, Dict, List, Optional
+import asyncio
+import logging
+import threading
+import time
+
+import numpy as np
+
+from config import config
+from resilience import CircuitOpenError, groq_breaker, is_failure, retry_budget
+from metrics import STAGE_SECONDS
+import tracing
+
+logger = logging.getLogger(__name__)
+
+_models: Dict[tuple, object] = {}
+_models_lock = threading.Lock()
+
+
+def get_chat_model(model: str = None, temperature: float = None, max_tokens: int = None, **kwargs):
+    """
+    Get a ChatGroq client, reusing one per parameter set so HTTP connections are pooled.
+    The SDK's own retries are off; retries go through the shared retry budget instead.
+
+    Args:
+        model: Groq model name (defaults to config.LLM_MODEL)
+        temperature: Sampling temperature (defaults to config.LLM_TEMPERATURE)
+        max_tokens: Maximum output tokens (defaults to config.LLM_MAX_TOKENS)
+        **kwargs: Extra ChatGroq arguments (e.g. model_kwargs)
+
+    Returns:
+        ChatGroq instance
+    """
+    model = model or config.LLM_MODEL
+    temperature = config.LLM_TEMPERATURE if temperature is None else temperature
+    max_tokens = max_tokens or config.LLM_MAX_TOKENS
+    key = (model, temperature, max_tokens, repr(sorted(kwargs.items())))
+
+    with _models_lock:
+        if key not in _models:
+            from langchain_groq import ChatGroq
+
+            if config.GROQ_BASE_URL:
+                kwargs.setdefault("base_url", config.GROQ_BASE_URL)
+            kwargs.setdefault("timeout", config.GROQ_TIMEOUT)
+            kwargs.setdefault("max_retries", 0)
+            _models[key] = ChatGroq(
+                api_key=config.GROQ_API_KEY,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+        return _models[key]
+
+
+class _Attempt:
+    """One streaming request: waits for its first token, then collects the rest."""
+
+    def __init__(self, llm, messages: List, label: str):
+        self.label = label
+        self.started = time.perf_counter()
+        self.stream = llm.astream(messages)
+        self.task = asyncio.ensure_future(self._first_token())
+
+    async def _first_token(self):
+        """Read chunks until one carries content; returns the accumulated chunk."""
+        with groq_breaker.guard():
+            collected = None
+            async for chunk in self.stream:
+                collected = chunk if collected is None else collected + chunk
+                if chunk.content:
+                    return collected
+            if collected is None:
+                raise RuntimeError("Empty response stream")
+            return collected
+
+    async def finish(self, first, on_token: Optional[Callable[[str], None]] = None):
+        """Consume the rest of the stream after the first token, passing each piece of text to `on_token`."""
+        message = first
+        if on_token and first.content:
+            on_token(first.content)
+        try:
+            async for chunk in self.stream:
+                message = message + chunk
+                if on_token and chunk.content:
+                    on_token(chunk.content)
+        except BaseException as e:
+            # The guard only covered the first token; a stream that dies (or
+            # stalls past the deadline) mid-response is a Groq failure too
+            if is_failure(e):
+                groq_breaker.record_failure()
+            raise
+        finally:
+            # The winner is no longer in the caller's attempts, so nothing else
+            # closes its HTTP response if finishing fails or is cancelled
+            await self._close_stream()
+        return message
+
+    async def _close_stream(self):
+        """Close the HTTP stream (a no-op once it has been read to the end)."""
+        try:
+            await self.stream.aclose()
+        except Exception:
+            pass
+
+    async def cancel(self, msg: Optional[str] = None):
+        """Stop waiting and close the HTTP stream (`msg` is passed to the CancelledError)."""
+        self.task.cancel(msg)
+        try:
+            await self.task
+        except BaseException:
+            pass
+        await self._close_stream()
+
+
+class HedgedGenerator:
+    """Answer generation with hedged requests and failover."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ttfts = deque(maxlen=config.HEDGE_WINDOW)
+        self._latencies = deque(maxlen=1000)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def hedge_delay(self) -> float:
+        """
+        Seconds to wait for the primary's first token before hedging:
+        the HEDGE_PERCENTILE of recent time-to-first-token, within bounds.
+        """
+        with self._lock:
+            samples = list(self._ttfts)
+        if len(samples) < config.HEDGE_MIN_SAMPLES:
+            delay = config.HEDGE_INITIAL_DELAY_MS
+        else:
+            delay = float(np.percentile(samples, config.HEDGE_PERCENTILE)) * 1000
+        return min(max(delay, config.HEDGE_MIN_DELAY_MS), config.HEDGE_MAX_DELAY_MS) / 1000
+
+    def _record(self, ttft: Optional[float] = None, latency: Optional[float] = None, **counters):
+        """Update samples and counters."""
+        with self._lock:
+            if ttft is not None:
+                self._ttfts.append(ttft)
+            if latency is not None:
+                self._latencies.append(latency)
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    async def generate(
+        self,
+        messages: List,
+        temperature: float = None,
+        max_tokens: int = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        **kwargs
+    ):
+        """
+        Generate a response, hedging slow starts and failing over on errors.
+
+        Args:
+            messages: LangChain messages
+            temperature: Sampling temperature (defaults to config.LLM_TEMPERATURE)
+            max_tokens: Maximum output tokens (defaults to config.LLM_MAX_TOKENS)
+            on_token: Called with each piece of answer text as it arrives (optional).
+                Only the winning request's text is passed on.
+            **kwargs: Extra ChatGroq arguments (e.g. model_kwargs)
+
+        Returns:
+            AIMessageChunk with the full content and usage_metadata
+            
+        Raises:
+            CircuitOpenError: If the Groq circuit breaker is open
+        """
+        with tracing.span("llm_generate", {'gen_ai.request.model': config.LLM_MODEL}) as span:
+            message = await self._generate(span, messages, temperature, max_tokens, on_token, **kwargs)
+            usage = getattr(message, "usage_metadata", None) or {}
+            span.set_attributes({
+                'gen_ai.usage.input_tokens': usage.get('input_tokens', 0),
+                'gen_ai.usage.output_tokens': usage.get('output_tokens', 0),
+            })
+            return message
+
+    async def _generate(self, span, messages: List, temperature: float = None, max_tokens: int = None,
+                        on_token: Optional[Callable[[str], None]] = None, **kwargs):
+        """Body of generate(); `span` receives the hedging outcome."""
+        if groq_breaker.is_open():
+            groq_breaker.record_rejected()
+            self._record(requests=1, rejected=1)
+            raise CircuitOpenError(groq_breaker.name)
+        
+        retry_budget.record_call()
+        start = time.perf_counter()
+        primary = _Attempt(get_chat_model(config.LLM_MODEL, temperature, max_tokens, **kwargs), messages, "primary")
+        attempts = {primary.task: primary}
+        backup = None
+        hedge_at = start + self.hedge_delay()
+        counters = {'requests': 1}
+        error = None
+
+        def launch_backup(reason: str):
+            model = config.HEDGE_MODEL or config.LLM_MODEL
+            logger.info("Sending backup request to %s (%s)", model, reason)
+            attempt = _Attempt(get_chat_model(model, temperature, max_tokens, **kwargs), messages, "backup")
+            attempts[attempt.task] = attempt
+            return attempt
+
+        try:
+            winner, first = None, None
+            while winner is None:
+                if not attempts:
+                    raise error
+                timeout = None
+                if backup is None and config.HEDGE_ENABLED:
+                    timeout = max(0.0, hedge_at - time.perf_counter())
+                done, _ = await asyncio.wait(list(attempts), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # The primary is slower than usual to start: hedge if the budget allows
+                    if retry_budget.try_retry():
+                        backup = launch_backup("hedge")
+                        counters['hedged'] = 1
+                    else:
+                        backup = False  # No hedge for this request; failover is still possible
+                    continue
+
+                for task in done:
+                    attempt = attempts.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        logger.warning("%s LLM request failed: %s", attempt.label, error)
+                        if (attempt is primary and not backup and config.LLM_FAILOVER
+                                and not groq_breaker.is_open() and retry_budget.try_retry()):
+                            backup = launch_backup("failover")
+                            counters['failovers'] = 1
+                        continue
+                    if winner is None:
+                        winner, first = attempt, task.result()
+
+            # Cancel the slower request; its time-to-first-token is at least this long
+            for attempt in list(attempts.values()):
+                await attempt.cancel()
+            attempts.clear()
+
+            ttft = time.perf_counter() - primary.started
+            STAGE_SECONDS.labels("llm_first_token").observe(time.perf_counter() - start)
+            if winner is primary or not counters.get('failovers'):
+                self._record(ttft=ttft)
+            if winner is backup and counters.get('hedged'):
+                counters['hedge_wins'] = 1
+
+            span.set_attributes({
+                'chatbot.hedged': bool(counters.get('hedged')),
+                'chatbot.failover': bool(counters.get('failovers')),
+                'chatbot.winner': winner.label,
+                'chatbot.ttft_ms': round(ttft * 1000, 1),
+            })
+
+            message = await winner.finish(first, on_token)
+            STAGE_SECONDS.labels("llm_generate").observe(time.perf_counter() - start)
+            self._record(latency=time.perf_counter() - start, **counters)
+            return message
+        except BaseException as e:
+            # A deadline cancellation is passed on, so the breaker counts the hung attempts
+            msg = e.args[0] if isinstance(e, asyncio.CancelledError) and e.args else None
+            for attempt in attempts.values():
+                await attempt.cancel(msg)
+            counters['errors'] = 1
+            self._record(**counters)
+            raise
+
+    def stats(self) -> Dict:
+        """Hedging statistics."""
+        with self._lock:
+            latencies = list(self._latencies)
+            requests = self.requests
+            stats = {
+                'requests': requests,
+                'hedged': self.hedged,
+                'hedge_rate': round(self.hedged / requests, 4) if requests else 0.0,
+                'hedge_wins': self.hedge_wins,
+                'failovers': self.failovers,
+                'errors': self.errors,
+                'rejected': self.rejected,
+            }
+        stats['hedge_delay_ms'] = round(self.hedge_delay() * 1000, 1)
+        for pct in (50, 95, 99):
+            stats[f'latency_p{pct}_ms'] = round(float(np.percentile(latencies, pct)) * 1000, 1) if latencies else None
+        return stats
+
+    def reset_stats(self):
+        """Clear counters and latency samples (keeps the hedge deadline samples)."""
+        with self._lock:
+            self._latencies.clear()
+            self.requests = self.hedged = self.hedge_wins = self.failovers = self.errors = self.rejected = 0
+
+
+# Singleton instance
+llm_generator = HedgedGenerator()
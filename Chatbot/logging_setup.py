@@ -0,0 +1,206 @@
+"""
+Logging setup for the NexGenTeck AI Chatbot.
+
+Request handlers only put log records on an in-memory queue. A background
+thread (logging.handlers.QueueListener) formats the records and writes them
+to stderr, so formatting and stream writes never run on the event loop.
+Records are queued unformatted: with lazy %-style arguments
+(logger.info("Found %s documents", n)) the message is built on the
+listener thread, or not at all when the level is disabled. If the queue
+fills up (LOG_QUEUE_SIZE), new records are dropped and counted instead of
+blocking a request.
+
+Every record carries the request ID of the request that logged it. The ID
+comes from the X-Request-ID header, or a new one is generated. It is echoed
+back in the response. LOG_FORMAT=json writes one JSON object per line,
+including any fields passed with extra={...}.
+"""
+
+from contextvars import ContextVar
+from typing import Dict, Optional
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import uuid
+
+from config import config
+
+# Request ID of the request being handled ("-" outside a request)
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+# LogRecord attributes that are not extra={...} fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["_QueueHandler"] = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current request ID (runs on the thread that logged it)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the standard fields plus extra={...} fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, "request_id", "-"),
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers formatting to the listener and drops records when the queue is full."""
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats the message here, on the caller's thread.
+        # Queue the record as-is; the listener formats it.
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # SimpleQueue is lock-free for the caller; the bound is approximate
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+def setup_logging(level: Optional[str] = None):
+    """
+    Route all logging through the background queue (idempotent).
+
+    Replaces any handlers already installed on the root logger (e.g. by
+    logging.basicConfig).
+
+    Args:
+        level: Root log level (default: LOG_LEVEL)
+    """
+    global _listener, _queue_handler
+
+    root = logging.getLogger()
+    root.setLevel((level or config.LOG_LEVEL).upper())
+    if _listener is not None:
+        return
+
+    # Skip record fields no formatter here uses (see "Optimization" in the
+    # logging HOWTO); the caller's frame lookup is the most expensive of them
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter() if config.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if config.LOG_QUEUE_SIZE <= 0:
+        # Synchronous logging (e.g. to debug the logging setup itself)
+        stream.addFilter(RequestIdFilter())
+        root.addHandler(stream)
+        return
+
+    _queue_handler = _QueueHandler(queue.SimpleQueue(), config.LOG_QUEUE_SIZE)
+    _queue_handler.addFilter(RequestIdFilter())
+    root.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def shutdown_logging():
+    """Write out queued records and stop the background thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    """
+    Restart the background thread in a forked worker (threads don't survive fork).
+    Records queued in the parent but not yet written are discarded.
+    """
+    global _listener
+    if _listener is None:
+        return
+    handlers = _listener.handlers
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stats() -> Dict:
+    """Logging queue statistics."""
+    if _queue_handler is None:
+        return {'queued': False}
+    return {
+        'queued': True,
+        'queue_depth': _queue_handler.queue.qsize(),
+        'queue_size': config.LOG_QUEUE_SIZE,
+        'dropped': _queue_handler.dropped,
+    }
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware that sets request_id_var for each HTTP request or WebSocket
+    connection and echoes the ID in an X-Request-ID response header.
+    """
+
+    def __init__(self, app, header: str = "x-request-id"):
+        self.app = app
+        self.header = header.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == self.header:
+                # Keep caller-supplied IDs short and printable
+                request_id = value.decode("latin-1")[:64].strip() or None
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + [(self.header, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -1,6 +1,9 @@
 # Windows multiprocessing compatibility - MUST be at the very start
 import multiprocessing
 import os
+import time
+
+_import_started = time.perf_counter()
 
 # Set environment variables BEFORE any other imports
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
@@ -20,33 +23,60 @@ FULLY SOFTCODED APPROACH:
 - LLM decides intent, sentiment, and context needs
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, field_validator
 from contextlib import asynccontextmanager
+from typing import Callable, List, Dict, Optional
 import logging
 import asyncio
+import hmac
+import json
+import signal
 
 from config import config
 from scraper import WebsiteScraper
+from embeddings import embedding_manager
 from vector_store import vector_store
-from rag_pipeline import process_message
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from sentiment import llm_analyzer
+from intent_router import intent_router
+from rag_pipeline import process_message, get_rag_pipeline
+from batch import answer_batch
+from startup import startup_tracker
+from sessions import session_store
+from llm_client import llm_generator
+from deadlines import Deadline, stats as deadline_stats
+from resilience import stats as resilience_stats
+from admission import AdmissionRejected, admission, client_id_for
+from coalescing import request_coalescer
+from profiling import request_profiler
+from ws_chat import CLOSE_POLICY, websocket_chat
+import metrics
+import tracing
+import logging_setup
+from logging_setup import RequestIdMiddleware, request_id_var
+
+# Configure logging (records are written by a background thread)
+logging_setup.setup_logging()
 logger = logging.getLogger(__name__)
 
 # Global reindex lock to prevent concurrent reindex operations
 _reindex_lock = asyncio.Lock()
 _is_reindexing = False
 
+# Scraper feeding the startup indexer, stopped on shutdown
+_startup_scraper: Optional[WebsiteScraper] = None
+
+# Set by serve.py when running as a preforked worker; the parent owns the
+# in-process index, so reindex requests are forwarded to it.
+prefork_parent_pid = None
+
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint with input validation."""
     message: str
+    session_id: Optional[str] = None
     
     @field_validator('message')
     @classmethod
@@ -67,12 +97,41 @@ class ChatRequest(BaseModel):
             raise ValueError('Message must contain at least 1 character')
         
         return v
+    
+    @field_validator('session_id')
+    @classmethod
+    def validate_session_id(cls, v: Optional[str]) -> Optional[str]:
+        """Session IDs are issued by the server (POST /sessions)."""
+        if v is None:
+            return v
+        if session_store.disabled_reason:
+            raise ValueError(session_store.disabled_reason)
+        if len(v) > 128 or not session_store.is_issued(v):
+            raise ValueError('Unknown session_id; create a session with POST /sessions')
+        return v
+
+
+class BatchChatRequest(BaseModel):
+    """Request model for the batch chat endpoint."""
+    messages: List[str]
+    concurrency: Optional[int] = None
+    
+    @field_validator('messages')
+    @classmethod
+    def validate_messages(cls, v: List[str]) -> List[str]:
+        """Validate each message like /chat, and the batch size."""
+        if not v:
+            raise ValueError('messages cannot be empty')
+        if len(v) > config.BATCH_MAX_MESSAGES:
+            raise ValueError(f'Too many messages (max {config.BATCH_MAX_MESSAGES})')
+        return [ChatRequest.validate_message(message) for message in v]
 
 
 class ChatResponse(BaseModel):
     """Response model for chat endpoint."""
     response: str
     status: str = "success"
+    session_id: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
@@ -82,11 +141,23 @@ class HealthResponse(BaseModel):
     documents_count: int
 
 
+# Components loaded in the background at startup; optional ones may fail
+# and leave the chatbot running in a degraded mode.
+startup_tracker.register("embedding_model")
+startup_tracker.register("vector_store")
+startup_tracker.register("rag_pipeline")
+startup_tracker.register("sentiment_model", required=False)
+startup_tracker.register("intent_llm", required=False)
+startup_tracker.register("intent_router", required=False)
+startup_tracker.register("knowledge_base", required=False)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan handler.
-    Initializes the knowledge base on startup by scraping the ENTIRE website.
+    Starts loading models and the knowledge base in the background so the
+    server can answer /livez immediately; /readyz reports progress.
     """
     logger.info("Starting NexGenTeck AI Chatbot (Fully Softcoded)")
     
@@ -94,43 +165,142 @@ async def lifespan(app: FastAPI):
     try:
         config.validate()
     except ValueError as e:
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         raise
     
-    # Initialize knowledge base if empty - scrape entire website
-    if not vector_store.is_initialized():
-        logger.info("Knowledge base is empty, scraping ENTIRE website...")
-        await initialize_knowledge_base()
-    else:
-        logger.info(f"Knowledge base already has {vector_store.count()} documents")
+    tracing.setup_tracing()
+    loader = asyncio.create_task(load_components())
     
     yield
     
+    loader.cancel()
+    if _startup_scraper is not None:
+        _startup_scraper.stop()
+    tracing.shutdown_tracing()
     logger.info("Shutting down NexGenTeck AI Chatbot")
 
 
-async def initialize_knowledge_base() -> int:
+async def load_components(wait_for_knowledge_base: bool = False):
     """
-    Scrape the ENTIRE website and populate the vector store.
-    This is the ONLY source of information for the chatbot.
+    Load models, the vector store and the knowledge base.
+    The website crawl starts right away and feeds the indexer page by page
+    (scraping needs no models, so it runs while they load). The service is
+    ready once the first pages are searchable; the rest of the site is
+    indexed in the background.
+    
+    Args:
+        wait_for_knowledge_base: Return only after the whole site is indexed
+            (the preforking parent needs the complete index before forking)
     """
+    if startup_tracker.is_settled():
+        return
+    
+    # Initialize knowledge base if empty - index the ENTIRE website as it is scraped
+    indexer = None
+    first_batch = asyncio.Event()
+    if not vector_store.is_initialized():
+        logger.info("Knowledge base is empty, indexing the ENTIRE website as it is scraped...")
+        loop = asyncio.get_running_loop()
+        indexer = asyncio.create_task(startup_tracker.load(
+            "knowledge_base", lambda: index_website(lambda: loop.call_soon_threadsafe(first_batch.set))
+        ))
+    
+    await startup_tracker.load("embedding_model", embedding_manager.load)
+    await startup_tracker.load("vector_store", vector_store.load)
+    await startup_tracker.load("sentiment_model", llm_analyzer.load_sentiment_model)
+    await startup_tracker.load("intent_llm", llm_analyzer.load_llm)
+    await startup_tracker.load("intent_router", intent_router.load)
+    await startup_tracker.load("rag_pipeline", get_rag_pipeline)
+    
+    if indexer is not None:
+        if wait_for_knowledge_base:
+            await indexer
+        else:
+            first_batch_written = asyncio.ensure_future(first_batch.wait())
+            await asyncio.wait([indexer, first_batch_written], return_when=asyncio.FIRST_COMPLETED)
+            first_batch_written.cancel()
+    else:
+        logger.info("Knowledge base already has %s documents", vector_store.count())
+        startup_tracker.set_state("knowledge_base", "ready")
+    
+    startup_tracker.mark_complete()
+
+
+def index_website(on_first_batch: Callable[[], None] = None) -> int:
+    """
+    Crawl the ENTIRE website and index each page as soon as it is scraped
+    (blocking; runs in a worker thread). This is the ONLY source of
+    information for the chatbot. Progress is shown in /readyz.
+    
+    Args:
+        on_first_batch: Called once the first documents are searchable
+        
+    Returns:
+        Number of documents indexed
+    """
+    global _startup_scraper
+    
+    def on_progress(progress: Dict):
+        startup_tracker.set_progress("knowledge_base", progress, usable=True)
+        if progress['batches'] == 1 and on_first_batch is not None:
+            on_first_batch()
+    
+    scraper = _startup_scraper = WebsiteScraper()
     try:
-        scraper = WebsiteScraper()
         # Scrape up to 100 pages for comprehensive coverage
-        documents = scraper.scrape(max_pages=100)
+        count = vector_store.add_documents(scraper.iter_documents(max_pages=100), on_progress=on_progress)
+    finally:
+        _startup_scraper = None
+    
+    if count:
+        logger.info("Indexed %s documents from %s website pages", count, len(scraper.visited_urls))
+    else:
+        logger.warning("No documents scraped, knowledge base is empty")
+    return count
+
 
-        if documents:
-            count = vector_store.add_documents(documents)
-            logger.info(f"Indexed {count} documents from website")
-            return count
+def rebuild_knowledge_base() -> int:
+    """
+    Re-scrape the website and replace the knowledge base.
+    Scrapes first so a failed scrape keeps the existing knowledge base.
+    
+    Returns:
+        Number of documents indexed
+    """
+    started = time.perf_counter()
+    try:
+        scraper = WebsiteScraper()
+        documents = scraper.scrape(max_pages=100)
         
-        logger.warning("No documents scraped, using fallback content")
-        return 0
-            
-    except Exception as e:
-        logger.error(f"Failed to initialize knowledge base: {e}")
-        # The fallback content will be used automatically
-        return 0
+        if not documents:
+            raise RuntimeError("Scraping failed; keeping existing knowledge base")
+        
+        # Clear existing data only after successful scrape
+        vector_store.clear()
+        count = vector_store.add_documents(documents)
+    except Exception:
+        metrics.REINDEXES.labels("failed").inc()
+        raise
+    metrics.REINDEXES.labels("success").inc()
+    metrics.REINDEX_SECONDS.observe(time.perf_counter() - started)
+    return count
+
+
+def require_ready():
+    """Reject requests with 503 until required components have loaded."""
+    failed = startup_tracker.failed_components()
+    if failed:
+        # Retrying won't help until the service is fixed and restarted
+        raise HTTPException(
+            status_code=503,
+            detail=f"The chatbot is unavailable ({', '.join(failed)} failed to load).",
+        )
+    if not startup_tracker.is_ready():
+        raise HTTPException(
+            status_code=503,
+            detail="The chatbot is still starting up. Please try again shortly.",
+            headers={"Retry-After": "5"}
+        )
 
 
 # Create FastAPI app
@@ -150,6 +320,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tag every log line with the request's ID (X-Request-ID in and out)
+app.add_middleware(RequestIdMiddleware)
+
 
 @app.get("/", response_model=HealthResponse)
 async def root():
@@ -171,8 +344,22 @@ async def health_check():
     )
 
 
+@app.get("/livez")
+async def liveness():
+    """Liveness probe: responds as soon as the process is serving HTTP."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness probe with per-component load state and startup timings."""
+    report = startup_tracker.snapshot()
+    report['documents_count'] = vector_store.count()
+    return JSONResponse(report, status_code=200 if report['status'] == "ready" else 503)
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request, http_response: Response):
     """
     Process a chat message and return a response.
     
@@ -185,22 +372,191 @@ async def chat(request: ChatRequest):
     """
     global _is_reindexing
     
+    require_ready()
+    
     # Warn if reindexing is in progress (but still allow chat)
     if _is_reindexing:
         logger.warning("Chat request received while reindexing is in progress")
     
-    logger.info(f"Received message: {request.message[:100]}...")
+    logger.info("Received message: %s...", request.message[:100], extra={'session': request.session_id is not None})
     
-    try:
-        response = await process_message(request.message)
-        return ChatResponse(response=response)
+    started = time.perf_counter()
+    status = "error"
+    deadline = Deadline.from_header(http_request.headers.get(config.REQUEST_TIMEOUT_HEADER))
+    with tracing.request_span("POST /chat", http_request.headers, {
+        'chatbot.session': request.session_id is not None,
+        'chatbot.message_chars': len(request.message),
+        'chatbot.request_id': request_id_var.get(),
+    }) as span:
+        try:
+            # Rate limit here; the pipeline run takes the slot, so requests that
+            # join an identical in-flight run (coalescing) don't hold one
+            async with request_profiler.profile(http_request, "chat") as profile:
+                async with admission.admit(client_id_for(http_request), deadline, slot=False):
+                    response = await process_message(
+                        request.message, request.session_id, deadline,
+                        admit=lambda: admission.hold_slot(deadline)
+                    )
+            if profile['name']:
+                http_response.headers["X-Profile-Id"] = profile['name']
+            status = "ok"
+            return ChatResponse(response=response, session_id=request.session_id)
         
-    except Exception as e:
-        logger.error(f"Error processing message: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail="I'm having trouble processing your request. Please try again."
-        )
+        except AdmissionRejected as e:
+            status = str(e.status_code)
+            logger.warning("Shedding chat request (%s): %s", e.status_code, e.reason)
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=f"{e.reason}. Please try again in {e.retry_after} seconds.",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        except Exception as e:
+            logger.error("Error processing message: %s", e)
+            raise HTTPException(
+                status_code=500,
+                detail="I'm having trouble processing your request. Please try again."
+            )
+        finally:
+            span.set_attribute('chatbot.status', status)
+            metrics.REQUEST_SECONDS.labels("/chat", status).observe(time.perf_counter() - started)
+
+
+def require_batch_admin(http_request: Request):
+    """Reject /chat/batch requests without BATCH_ADMIN_TOKEN (404 while it is unset)."""
+    if not config.BATCH_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = http_request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode(), config.BATCH_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest, http_request: Request):
+    """
+    Answer many messages in one request, streamed back as NDJSON (admin only).
+    
+    Sentiment, embedding and retrieval run once for the whole batch; answers
+    are generated with bounded concurrency and each line is sent as soon as
+    its answer is ready: {"index", "message", "response", "status"}.
+    Each answer takes its own admission slot and deadline, like a /chat request.
+    """
+    require_batch_admin(http_request)
+    require_ready()
+    
+    logger.info("Received batch of %s messages", len(request.messages))
+    client_id = client_id_for(http_request)
+    timeout_ms = Deadline.from_header(http_request.headers.get(config.REQUEST_TIMEOUT_HEADER)).timeout_ms
+    
+    async def lines():
+        started = time.perf_counter()
+        status = "error"
+        try:
+            async for answer in answer_batch(request.messages, request.concurrency, client_id, timeout_ms):
+                yield json.dumps(answer) + "\n"
+            status = "ok"
+        except (asyncio.CancelledError, GeneratorExit):
+            status = "cancelled"  # The client disconnected
+            raise
+        except Exception as e:
+            logger.error("Error answering batch: %s", e)
+            raise
+        finally:
+            metrics.REQUEST_SECONDS.labels("/chat/batch", status).observe(time.perf_counter() - started)
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.websocket("/ws")
+async def chat_websocket(websocket: WebSocket, session_id: Optional[str] = None):
+    """
+    Chat over one persistent WebSocket connection (see ws_chat.py for the protocol).
+    
+    Answers go through the same pipeline as /chat and stream token by token;
+    a new message cancels the answer still streaming. Without a session_id
+    query parameter, a new session is created for the connection (none while
+    sessions are disabled).
+    """
+    try:
+        session_id = ChatRequest.validate_session_id(session_id)
+    except ValueError as e:
+        await websocket.accept()
+        await websocket.close(code=CLOSE_POLICY, reason=str(e))
+        return
+    await websocket_chat.serve(websocket, session_id, ChatRequest.validate_message)
+
+
+@app.get("/stats")
+async def stats():
+    """Runtime statistics: admission, coalescing, LLM hedging/failover, sessions, WebSocket connections, per-stage deadline skips/timeouts, circuit breakers, profiling and the log queue."""
+    return {
+        "admission": admission.stats(),
+        "coalescing": request_coalescer.stats(),
+        "llm": llm_generator.stats(),
+        "sessions": session_store.stats(),
+        "websocket": websocket_chat.stats(),
+        "stage_deadlines": deadline_stats(),
+        "resilience": resilience_stats(),
+        "profiling": request_profiler.stats(),
+        "logging": logging_setup.stats()
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics: per-stage latency histograms, counters and load gauges."""
+    try:
+        body, content_type = metrics.render()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return Response(content=body, media_type=content_type)
+
+
+def require_admin(http_request: Request):
+    """Reject requests without the profiling admin token (404 while profiling is off)."""
+    if not config.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not request_profiler.is_admin(http_request.headers):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/profiles")
+async def list_profiles(http_request: Request):
+    """Saved request profiles, newest first (admin only)."""
+    require_admin(http_request)
+    return {"profiles": request_profiler.list_profiles(), "stats": request_profiler.stats()}
+
+
+@app.get("/profiles/{name}")
+async def get_profile(name: str, http_request: Request):
+    """Download a saved profile (admin only)."""
+    require_admin(http_request)
+    path = request_profiler.path_for(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/html" if name.endswith(".html") else "application/json"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
+def require_sessions():
+    """Reject session endpoints while sessions are disabled (several serve.py workers)."""
+    if session_store.disabled_reason:
+        raise HTTPException(status_code=501, detail=session_store.disabled_reason)
+
+
+@app.post("/sessions")
+async def create_session():
+    """Issue a new conversation session ID (pass it as session_id to /chat or /ws)."""
+    require_sessions()
+    return {"session_id": session_store.new_session_id()}
+
+
+@app.delete("/sessions/{session_id}")
+async def end_session(session_id: str):
+    """Forget a conversation session's history (only server-issued IDs are accepted)."""
+    require_sessions()
+    if len(session_id) > 128 or not session_store.is_issued(session_id):
+        raise HTTPException(status_code=404, detail="Unknown session_id")
+    return {"status": "deleted" if session_store.clear(session_id) else "not_found"}
 
 
 @app.post("/reindex")
@@ -212,6 +568,8 @@ async def reindex_knowledge_base():
     """
     global _is_reindexing
     
+    require_ready()
+    
     # Check if already reindexing
     if _is_reindexing:
         return {
@@ -219,37 +577,38 @@ async def reindex_knowledge_base():
             "message": "Reindexing is already in progress. Please wait."
         }
     
+    # Preforked workers each hold a copy-on-write view of the parent's
+    # in-process index; the parent rebuilds it and restarts the workers.
+    if prefork_parent_pid and vector_store.is_in_process():
+        logger.info("Forwarding reindex request to the preforking parent process")
+        os.kill(prefork_parent_pid, signal.SIGHUP)
+        return {
+            "status": "accepted",
+            "message": "Reindexing in the parent process; workers will restart with the new knowledge base."
+        }
+    
     logger.info("Re-indexing knowledge base")
     
     async with _reindex_lock:
         _is_reindexing = True
         try:
-            # Scrape first to avoid downtime if scraping fails
-            scraper = WebsiteScraper()
-            documents = scraper.scrape(max_pages=100)
-
-            if not documents:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Scraping failed; keeping existing knowledge base"
-                )
-
-            # Clear existing data only after successful scrape
-            vector_store.clear()
-            count = vector_store.add_documents(documents)
-
+            count = await asyncio.to_thread(rebuild_knowledge_base)
+            
             return {
                 "status": "success",
                 "message": f"Re-indexed {count} documents"
             }
             
         except Exception as e:
-            logger.error(f"Re-indexing failed: {e}")
+            logger.error("Re-indexing failed: %s", e)
             raise HTTPException(status_code=500, detail=str(e))
         finally:
             _is_reindexing = False
 
 
+startup_tracker.record_phase("import", time.perf_counter() - _import_started)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,212 @@
+"""
+Prometheus metrics for the NexGenTeck AI Chatbot.
+
+Per-stage latency histograms cover each LangGraph node (analyze,
+retrieve_context, generate_response) and the sub-steps inside them: RoBERTa
+sentiment, the intent router and intent LLM call, BGE-M3 query encoding, the
+vector search and Groq generation. Counters cover retrieved documents,
+fallback responses, token usage and reindexing. Load, queue, breaker and
+session gauges are read from their stats() only when /metrics is scraped.
+Each timed() stage is also a tracing span (see tracing.py).
+
+Recording a sample costs a perf_counter() pair and a lock-protected
+increment. Without prometheus_client installed, every metric is a no-op and
+/metrics returns 503. With preforked workers (serve.py), set
+PROMETHEUS_MULTIPROC_DIR to an empty directory so every worker's samples are
+aggregated.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+import functools
+import logging
+import os
+import time
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Buckets from 5 ms to 30 s: local models take milliseconds, Groq calls seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+
+class _NoopMetric:
+    """Stand-in used when prometheus_client is not installed."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, value=1):
+        pass
+
+
+if prometheus_client is not None:
+    from prometheus_client import Counter, Histogram
+
+    STAGE_SECONDS = Histogram(
+        "chatbot_stage_seconds", "Time spent in each pipeline node and sub-step",
+        ["stage"], buckets=LATENCY_BUCKETS
+    )
+    REQUEST_SECONDS = Histogram(
+        "chatbot_request_seconds", "End-to-end request latency",
+        ["endpoint", "status"], buckets=LATENCY_BUCKETS
+    )
+    RETRIEVALS = Counter("chatbot_retrievals_total", "Knowledge base searches used for an answer")
+    RETRIEVED_DOCUMENTS = Counter("chatbot_retrieved_documents_total", "Documents passed to the LLM as context")
+    FALLBACKS = Counter(
+        "chatbot_fallback_responses_total", "Responses not generated by the LLM",
+        ["reason"]
+    )
+    LLM_TOKENS = Counter("chatbot_llm_tokens_total", "Groq tokens used", ["call", "kind"])
+    REINDEX_SECONDS = Histogram(
+        "chatbot_reindex_seconds", "Knowledge base rebuild duration",
+        buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200)
+    )
+    REINDEXES = Counter("chatbot_reindexes_total", "Knowledge base rebuilds", ["status"])
+else:
+    STAGE_SECONDS = REQUEST_SECONDS = RETRIEVALS = RETRIEVED_DOCUMENTS = _NoopMetric()
+    FALLBACKS = LLM_TOKENS = REINDEX_SECONDS = REINDEXES = _NoopMetric()
+
+
+@contextmanager
+def timed(stage: str, attributes: Optional[Dict] = None):
+    """
+    Record how long a block takes in chatbot_stage_seconds, inside a tracing span.
+
+    Args:
+        stage: Stage label, also the span name
+        attributes: Initial span attributes
+
+    Usage:
+        with timed("embed_query") as span:
+            ...
+    """
+    start = time.perf_counter()
+    with tracing.span(stage, attributes) as span:
+        try:
+            yield span
+        finally:
+            STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def timed_node(stage: str, node):
+    """
+    Wrap an async LangGraph node so its duration is recorded.
+
+    Args:
+        stage: Stage label (the node name)
+        node: Async node function
+
+    Returns:
+        Wrapped node function
+    """
+    @functools.wraps(node)
+    async def wrapper(state):
+        with timed(stage):
+            return await node(state)
+    return wrapper
+
+
+def record_tokens(call: str, usage: Optional[Dict[str, int]]):
+    """Count input/output tokens from utils.token_usage() for one Groq call."""
+    if not usage:
+        return
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            LLM_TOKENS.labels(call, kind.split("_")[0]).inc(usage[kind])
+
+
+def record_retrieval(documents: int):
+    """Count one search and the documents it contributed as context."""
+    RETRIEVALS.inc()
+    RETRIEVED_DOCUMENTS.inc(documents)
+
+
+def record_fallback(reason: str):
+    """Count a response that did not come from the LLM (reason: error, deadline or circuit_open)."""
+    FALLBACKS.labels(reason).inc()
+
+
+def _collect_runtime():
+    """Yield gauges from the admission, breaker, session, coalescing and WebSocket stats (read on scrape)."""
+    from prometheus_client.core import GaugeMetricFamily
+    from admission import admission
+    from coalescing import request_coalescer
+    from resilience import groq_breaker, qdrant_breaker
+    from sessions import session_store
+    from ws_chat import websocket_chat
+
+    admission_stats = admission.stats()
+    in_flight = GaugeMetricFamily("chatbot_in_flight_requests", "Chat pipelines running")
+    in_flight.add_metric([], admission_stats['in_flight'])
+    queue = GaugeMetricFamily("chatbot_queue_depth", "Chat requests waiting for admission")
+    queue.add_metric([], admission_stats['queue_depth'])
+    shed = GaugeMetricFamily("chatbot_rejected_requests", "Requests shed by admission control", labels=["reason"])
+    shed.add_metric(["rate_limited"], admission_stats['rejected_rate_limited'])
+    shed.add_metric(["queue_full"], admission_stats['rejected_queue_full'])
+    shed.add_metric(["queue_timeout"], admission_stats['rejected_queue_timeout'])
+
+    breaker = GaugeMetricFamily("chatbot_breaker_open", "1 when a dependency's circuit breaker is not closed", labels=["dependency"])
+    for dependency in (groq_breaker, qdrant_breaker):
+        breaker.add_metric([dependency.name], 0 if dependency.state == "closed" else 1)
+
+    sessions = GaugeMetricFamily("chatbot_sessions", "Conversation sessions held in memory")
+    sessions.add_metric([], session_store.stats()['sessions'])
+    coalesced = GaugeMetricFamily("chatbot_coalesced_requests", "Requests that shared another request's pipeline run")
+    coalesced.add_metric([], request_coalescer.stats()['coalesced'])
+
+    websockets = GaugeMetricFamily("chatbot_websocket_connections", "Open /ws chat connections")
+    websockets.add_metric([], websocket_chat.stats()['connections'])
+
+    yield from (in_flight, queue, shed, breaker, sessions, coalesced, websockets)
+
+
+class _RuntimeCollector:
+    """Custom collector that reads runtime stats only when scraped."""
+
+    def describe(self):
+        # Without describe(), registering calls collect(), which imports the
+        # stats sources (ws_chat pulls in the whole pipeline) mid-import
+        return []
+
+    def collect(self):
+        try:
+            yield from _collect_runtime()
+        except Exception as e:
+            logger.warning("Runtime metrics collection failed: %s", e)
+
+
+if prometheus_client is not None and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    prometheus_client.REGISTRY.register(_RuntimeCollector())
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    Returns:
+        (body, content type)
+
+    Raises:
+        RuntimeError: If prometheus_client is not installed
+    """
+    if prometheus_client is None:
+        raise RuntimeError("prometheus_client is not installed")
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Preforked workers: aggregate every process's samples
+        from prometheus_client import CollectorRegistry, multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
@@ -0,0 +1,174 @@
+"""
+In-process exact-search vector index backed by NumPy.
+Keeps every normalized embedding in one contiguous matrix so a query is a
+single matrix multiply plus argpartition, with no per-hit object conversion.
+Intended for small knowledge bases (hundreds to a few thousand chunks).
+"""
+
+from typing import Dict, List, Sequence, Tuple
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per block when the matrix is stored as float16.
+# NumPy has no BLAS path for float16, so blocks are upcast to float32 first.
+_FLOAT16_BLOCK_ROWS = 4096
+
+
+class NumpyIndex:
+    """
+    Exact cosine-similarity index over a contiguous float matrix.
+
+    Vectors are expected to be L2-normalized (BGE-M3 embeddings are encoded
+    with normalize_embeddings=True), so the inner product is the cosine
+    similarity. Payloads live in a side table of parallel lists indexed by
+    row number.
+    """
+
+    def __init__(self, dtype: str = "float32", initial_capacity: int = 1024):
+        """
+        Initialize an empty index.
+
+        Args:
+            dtype: Storage dtype for the vector matrix ("float32" or "float16")
+            initial_capacity: Number of rows to preallocate on first insert
+        """
+        self._dtype = np.dtype(dtype)
+        if self._dtype not in (np.dtype(np.float32), np.dtype(np.float16)):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+        self._initial_capacity = max(1, initial_capacity)
+        self._matrix = None
+        self._size = 0
+        self._contents: List[str] = []
+        self._metadata: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        """Vector dimension, or 0 if nothing has been added yet."""
+        return 0 if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the live rows of the vector matrix."""
+        return 0 if self._matrix is None else self._size * self._matrix.shape[1] * self._dtype.itemsize
+
+    def count(self) -> int:
+        """Get the number of vectors in the index."""
+        return self._size
+
+    def add(self, vectors: np.ndarray, contents: Sequence[str], metadatas: Sequence[Dict]) -> int:
+        """
+        Append vectors and their payloads.
+
+        Args:
+            vectors: Array of shape (n, dim) with normalized embeddings
+            contents: Document text for each vector
+            metadatas: Metadata dict for each vector
+
+        Returns:
+            Number of vectors added
+        """
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2:
+            raise ValueError("vectors must be a 2-D array")
+        if not (len(vectors) == len(contents) == len(metadatas)):
+            raise ValueError("vectors, contents and metadatas must have the same length")
+
+        n = len(vectors)
+        if n == 0:
+            return 0
+
+        with self._lock:
+            self._reserve(self._size + n, vectors.shape[1])
+            # Writes land beyond the current size, so concurrent readers holding
+            # the previous (matrix, size) snapshot never observe partial rows.
+            self._matrix[self._size:self._size + n] = vectors
+            self._contents.extend(contents)
+            self._metadata.extend(metadatas)
+            self._size += n
+
+        return n
+
+    def _reserve(self, rows: int, dim: int):
+        """Grow the matrix (doubling) so it can hold at least `rows` rows."""
+        if self._matrix is None:
+            capacity = max(self._initial_capacity, rows)
+            self._matrix = np.empty((capacity, dim), dtype=self._dtype)
+            return
+
+        if dim != self._matrix.shape[1]:
+            raise ValueError(f"Vector dimension {dim} does not match index dimension {self._matrix.shape[1]}")
+
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+
+        while capacity < rows:
+            capacity *= 2
+        grown = np.empty((capacity, dim), dtype=self._dtype)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+    def search(self, queries: np.ndarray, limit: int) -> List[List[Tuple[float, str, Dict]]]:
+        """
+        Find the most similar vectors for one or more queries.
+
+        Args:
+            queries: Array of shape (dim,) or (q, dim) with normalized query vectors
+            limit: Maximum number of hits per query
+
+        Returns:
+            One list per query of (score, content, metadata), best match first
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[np.newaxis, :]
+
+        # Snapshot so a concurrent add() or clear() cannot change what we score
+        with self._lock:
+            matrix, size = self._matrix, self._size
+            contents, metadata = self._contents, self._metadata
+        if matrix is None or size == 0 or limit <= 0:
+            return [[] for _ in range(len(queries))]
+
+        scores = self._score(queries, matrix[:size])
+
+        k = min(limit, size)
+        if k < size:
+            top = np.argpartition(scores, size - k, axis=1)[:, size - k:]
+        else:
+            top = np.broadcast_to(np.arange(size), (len(queries), size))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [(float(score), contents[row], metadata[row]) for row, score in zip(rows, row_scores)]
+            for rows, row_scores in zip(top.tolist(), top_scores.tolist())
+        ]
+
+    def _score(self, queries: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Compute the (q, n) inner-product matrix in float32."""
+        if rows.dtype == np.float32:
+            return queries @ rows.T
+
+        scores = np.empty((len(queries), len(rows)), dtype=np.float32)
+        for start in range(0, len(rows), _FLOAT16_BLOCK_ROWS):
+            block = rows[start:start + _FLOAT16_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        return scores
+
+    def clear(self):
+        """Remove all vectors and payloads."""
+        with self._lock:
+            self._matrix = None
+            self._size = 0
+            self._contents = []
+            self._metadata = []
+        logger.info("NumPy index cleared")
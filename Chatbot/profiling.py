@@ -0,0 +1,192 @@
+"""
+On-demand request profiling for the NexGenTeck AI Chatbot.
+
+When one query is slow in production, an admin can re-send it with
+X-Admin-Token: <PROFILING_ADMIN_TOKEN> and X-Profile: 1 (or ?profile=1) to
+run it under pyinstrument's sampling profiler. PROFILING_SAMPLE_RATE also
+profiles a random fraction of all /chat requests. Each profile is saved in
+PROFILING_DIR as a speedscope JSON file (open it at https://www.speedscope.app)
+or a pyinstrument HTML flame view. Only the newest PROFILING_MAX_FILES are kept.
+GET /profiles lists them and GET /profiles/{name} downloads one.
+
+The profiler runs in async mode, so time spent awaiting Groq or a worker
+thread shows up as an await frame of this request. Other requests' work is
+not counted. One request is profiled at a time per worker.
+
+Disabled unless PROFILING_ENABLED=true and pyinstrument is installed. When
+disabled, profile() only checks one config flag.
+"""
+
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+import asyncio
+import datetime
+import hmac
+import logging
+import os
+import random
+import re
+import uuid
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_NAME_PATTERN = re.compile(r"^[\w.-]+\.(speedscope\.json|html)$")
+
+
+class RequestProfiler:
+    """Decides which requests to profile, runs the profiler and manages saved profiles."""
+
+    def __init__(self):
+        self._active = False
+        self._available: Optional[bool] = None
+        self.profiled = 0
+        self.skipped_busy = 0
+
+    def _pyinstrument_available(self) -> bool:
+        """Check (once) that pyinstrument can be imported."""
+        if self._available is None:
+            try:
+                import pyinstrument  # noqa: F401
+                self._available = True
+            except ImportError:
+                logger.warning("PROFILING_ENABLED is set but pyinstrument is not installed; profiling disabled")
+                self._available = False
+        return self._available
+
+    def is_admin(self, headers) -> bool:
+        """Check the X-Admin-Token header against PROFILING_ADMIN_TOKEN (constant time)."""
+        token = headers.get("x-admin-token", "")
+        return bool(config.PROFILING_ADMIN_TOKEN) and hmac.compare_digest(
+            token.encode(), config.PROFILING_ADMIN_TOKEN.encode()
+        )
+
+    def should_profile(self, request) -> Optional[str]:
+        """
+        Decide whether to profile a request.
+
+        Args:
+            request: FastAPI Request
+
+        Returns:
+            "admin" or "sampled" if the request should be profiled, else None
+        """
+        if not config.PROFILING_ENABLED:
+            return None
+
+        reason = None
+        flag = request.headers.get("x-profile") or request.query_params.get("profile")
+        if flag in ("1", "true") and self.is_admin(request.headers):
+            reason = "admin"
+        elif config.PROFILING_SAMPLE_RATE > 0 and random.random() < config.PROFILING_SAMPLE_RATE:
+            reason = "sampled"
+
+        if reason is None or not self._pyinstrument_available():
+            return None
+        if self._active:
+            self.skipped_busy += 1
+            return None
+        return reason
+
+    @asynccontextmanager
+    async def profile(self, request, label: str):
+        """
+        Profile the enclosed block if should_profile() selects the request, and save the result.
+
+        Args:
+            request: FastAPI Request
+            label: Short description stored in the file name (e.g. "chat")
+
+        Yields:
+            Dict whose 'name' is set to the saved profile's file name on exit
+            (None when the request was not profiled)
+
+        Usage:
+            async with request_profiler.profile(http_request, "chat") as profile:
+                ...
+        """
+        result = {'name': None}
+        reason = self.should_profile(request)
+        if reason is None:
+            yield result
+            return
+
+        from pyinstrument import Profiler
+
+        profiler = Profiler(interval=config.PROFILING_INTERVAL_MS / 1000, async_mode="enabled")
+        self._active = True
+        profiler.start()
+        try:
+            yield result
+        finally:
+            session = profiler.stop()
+            self._active = False
+            timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+            base = f"{timestamp}-{label}-{reason}-{round(session.duration * 1000)}ms-{uuid.uuid4().hex[:6]}"
+            try:
+                result['name'] = await asyncio.to_thread(self._save, session, base)
+                self.profiled += 1
+                logger.info("Saved profile %s (%.0f ms)", result['name'], session.duration * 1000)
+            except Exception as e:
+                logger.warning("Failed to save profile: %s", e)
+
+    def _save(self, session, base: str) -> str:
+        """Render a profiler session to PROFILING_DIR and prune old profiles."""
+        if config.PROFILING_FORMAT == "html":
+            from pyinstrument.renderers import HTMLRenderer
+            name, renderer = f"{base}.html", HTMLRenderer()
+        else:
+            from pyinstrument.renderers import SpeedscopeRenderer
+            name, renderer = f"{base}.speedscope.json", SpeedscopeRenderer()
+
+        os.makedirs(config.PROFILING_DIR, exist_ok=True)
+        with open(os.path.join(config.PROFILING_DIR, name), "w", encoding="utf-8") as f:
+            f.write(renderer.render(session))
+
+        for old in self.list_profiles()[config.PROFILING_MAX_FILES:]:
+            try:
+                os.remove(os.path.join(config.PROFILING_DIR, old['name']))
+            except OSError:
+                pass
+        return name
+
+    def list_profiles(self) -> List[Dict]:
+        """Saved profiles, newest first."""
+        try:
+            names = [name for name in os.listdir(config.PROFILING_DIR) if _NAME_PATTERN.match(name)]
+        except FileNotFoundError:
+            return []
+        profiles = []
+        for name in names:
+            try:
+                info = os.stat(os.path.join(config.PROFILING_DIR, name))
+            except OSError:
+                continue
+            profiles.append((info.st_mtime, {
+                'name': name,
+                'created': datetime.datetime.fromtimestamp(info.st_mtime).isoformat(timespec="seconds"),
+                'bytes': info.st_size,
+            }))
+        profiles.sort(key=lambda p: (p[0], p[1]['name']), reverse=True)
+        return [profile for _, profile in profiles]
+
+    def path_for(self, name: str) -> Optional[str]:
+        """File path of a saved profile, or None if the name is not a saved profile."""
+        if not _NAME_PATTERN.match(name):
+            return None
+        path = os.path.join(config.PROFILING_DIR, name)
+        return path if os.path.isfile(path) else None
+
+    def stats(self) -> Dict:
+        """Profiling counters."""
+        return {
+            'enabled': config.PROFILING_ENABLED,
+            'sample_rate': config.PROFILING_SAMPLE_RATE,
+            'profiled': self.profiled,
+            'skipped_busy': self.skipped_busy,
+        }
+
+
+# Singleton instance
+request_profiler = RequestProfiler()
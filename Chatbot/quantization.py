@@ -0,0 +1,118 @@
+"""
+Qdrant quantization and storage options for the knowledge base collection.
+Builds the collection and search parameters for int8-scalar or binary
+quantization with original-vector rescoring, and optional on-disk originals.
+"""
+
+from typing import Optional, Union
+
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
+
+from config import config
+
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+
+def build_quantization_config(
+    mode: str = None,
+    always_ram: bool = None
+) -> Optional[Union[ScalarQuantization, BinaryQuantization]]:
+    """
+    Build the collection quantization config.
+
+    Args:
+        mode: "none", "scalar" (int8) or "binary" (defaults to config.QDRANT_QUANTIZATION)
+        always_ram: Keep quantized vectors in RAM (defaults to config.QDRANT_QUANTIZATION_ALWAYS_RAM)
+
+    Returns:
+        Quantization config, or None for an unquantized collection
+    """
+    mode = mode or config.QDRANT_QUANTIZATION
+    always_ram = config.QDRANT_QUANTIZATION_ALWAYS_RAM if always_ram is None else always_ram
+
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode '{mode}', expected one of {QUANTIZATION_MODES}")
+
+    if mode == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,
+                always_ram=always_ram
+            )
+        )
+    if mode == "binary":
+        return BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=always_ram)
+        )
+    return None
+
+
+def build_vector_params(
+    dim: int,
+    mode: str = None,
+    on_disk: bool = None
+) -> VectorParams:
+    """
+    Build the vector params for the knowledge base collection.
+
+    Args:
+        dim: Embedding dimension
+        mode: Quantization mode (defaults to config.QDRANT_QUANTIZATION)
+        on_disk: Store original vectors on disk (defaults to config.QDRANT_ON_DISK_VECTORS)
+
+    Returns:
+        VectorParams for create_collection
+    """
+    on_disk = config.QDRANT_ON_DISK_VECTORS if on_disk is None else on_disk
+
+    return VectorParams(
+        size=dim,
+        distance=Distance.COSINE,
+        on_disk=on_disk or None,
+        quantization_config=build_quantization_config(mode)
+    )
+
+
+def build_search_params(
+    mode: str = None,
+    rescore: bool = None,
+    oversampling: float = None
+) -> Optional[SearchParams]:
+    """
+    Build per-query search params for a quantized collection.
+
+    With rescoring enabled, Qdrant fetches limit * oversampling candidates
+    using the quantized vectors and re-ranks them with the original vectors.
+
+    Args:
+        mode: Quantization mode (defaults to config.QDRANT_QUANTIZATION)
+        rescore: Re-rank with original vectors (defaults to config.QDRANT_RESCORE)
+        oversampling: Candidate multiplier (defaults to config.QDRANT_OVERSAMPLING)
+
+    Returns:
+        SearchParams, or None when the collection is not quantized
+    """
+    mode = mode or config.QDRANT_QUANTIZATION
+    if mode == "none":
+        return None
+
+    rescore = config.QDRANT_RESCORE if rescore is None else rescore
+    oversampling = config.QDRANT_OVERSAMPLING if oversampling is None else oversampling
+
+    return SearchParams(
+        quantization=QuantizationSearchParams(
+            rescore=rescore,
+            oversampling=oversampling if rescore else None
+        )
+    )
@@ -4,15 +4,28 @@ Fully softcoded - uses LLM for all interpretation.
 The chatbot is trained on website content and uses that as context for all responses.
 """
 
-from typing import Dict, List, TypedDict
-from langgraph.graph import StateGraph, END
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage
+from contextlib import nullcontext
+from typing import AsyncContextManager, Callable, Dict, List, Optional, Tuple, TypedDict
+import asyncio
+import json
 import logging
 
+import numpy as np
+
 from config import config
+from embeddings import embedding_manager
 from vector_store import vector_store
 from sentiment import llm_analyzer
+from intent_router import intent_router
+from llm_client import llm_generator
+from sessions import session_store, format_history
+from deadlines import Deadline
+from resilience import CircuitOpenError, answer_cache
+from coalescing import request_coalescer
+from admission import AdmissionRejected
+from metrics import record_fallback, record_retrieval, record_tokens, timed, timed_node
+import tracing
+from utils import token_usage
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +37,22 @@ class ChatState(TypedDict):
     context: List[str]
     response: str
     error: str
+    usage: Dict[str, Dict[str, int]]
+    prefetched: Optional[Dict]
+    # Speculative search still running; retrieve_context awaits it, other routes cancel it
+    prefetch: Optional["asyncio.Future"]
+    # BGE-M3 embeddings, computed at most once per request
+    query_vector: Optional[np.ndarray]
+    query_vector_task: Optional["asyncio.Future"]
+    search_vector: Optional[np.ndarray]
+    # RoBERTa result computed ahead for a whole batch (see batch.py)
+    sentiment: Optional[Dict]
+    # Bounded session history: rolling 'summary' plus recent (user, assistant) 'turns'
+    history: Dict
+    # End-to-end deadline; stages run within its remaining budget
+    deadline: Deadline
+    # Receives answer text as it streams from Groq (WebSocket chat, see ws_chat.py)
+    on_token: Optional[Callable[[str], None]]
 
 
 async def analyze_message(state: ChatState) -> ChatState:
@@ -40,21 +69,69 @@ async def analyze_message(state: ChatState) -> ChatState:
     logger.info("Analyzing message with LLM")
     
     try:
-        analysis = await llm_analyzer.analyze(state['message'])
+        # The message is embedded once, for the intent router and speculative retrieval
+        vector = None
+        if config.SPECULATIVE_RETRIEVAL or intent_router.is_available():
+            vector = asyncio.ensure_future(ensure_query_vector(state))
+        
+        async def analyze():
+            query_vector = None
+            if vector is not None and intent_router.is_available():
+                try:
+                    # Shielded: an analysis timeout must not cancel the shared embedding
+                    query_vector = await asyncio.shield(vector)
+                except Exception as e:
+                    logger.warning("Query embedding failed: %s", e)
+            return await llm_analyzer.analyze(
+                state['message'], query_vector, format_history(state.get('history')), state.get('sentiment')
+            )
+        
+        # Retrieval on the raw message runs concurrently with the analysis call
+        # (unless a batch already searched for it); retrieve_context collects it
+        if state.get('prefetched') is None:
+            state['prefetch'] = asyncio.ensure_future(prefetch_context(state, vector))
+        
+        # Analysis is skipped if it would eat into the time reserved for the answer
+        analysis = await state['deadline'].run(
+            "analyze", analyze(),
+            stage_ms=config.ANALYSIS_BUDGET_MS,
+            reserve_ms=config.GENERATION_RESERVE_MS
+        )
+        
+        if analysis is None:
+            state['analysis'] = get_default_analysis()
+            return state
+        
+        if 'llm_usage' in analysis:
+            state['usage']['analyze'] = analysis.pop('llm_usage')
         state['analysis'] = analysis
-        logger.info(f"LLM determined: greeting={analysis.get('is_greeting')}, needs_context={analysis.get('needs_context')}")
+        tracing.set_attributes(intent=analysis.get('intent'), intent_source=analysis.get('intent_source'))
+        logger.info("LLM determined: greeting=%s, needs_context=%s", analysis.get('is_greeting'), analysis.get('needs_context'))
     except Exception as e:
-        logger.error(f"Analysis error: {e}")
-        state['analysis'] = {
-            'is_greeting': False,
-            'needs_context': True,
-            'intent': 'general',
-            'sentiment': 'neutral'
-        }
+        logger.error("Analysis error: %s", e)
+        state['analysis'] = get_default_analysis()
+    finally:
+        # No context needed (e.g. a greeting): drop the speculative search
+        # instead of waiting for it
+        prefetch = state.get('prefetch')
+        if prefetch is not None and not llm_analyzer.should_retrieve_context(state.get('analysis') or {}):
+            prefetch.cancel()
+            state['prefetch'] = None
     
     return state
 
 
+def get_default_analysis() -> Dict:
+    """Analysis used when the analysis stage fails or runs out of time: retrieve and answer."""
+    return {
+        'is_greeting': False,
+        'needs_context': True,
+        'intent': 'general',
+        'sentiment': 'neutral',
+        'intent_source': 'default'
+    }
+
+
 def should_retrieve(state: ChatState) -> str:
     """
     Route based on LLM's decision about whether context is needed.
@@ -88,35 +165,173 @@ async def retrieve_context(state: ChatState) -> ChatState:
     logger.info("Retrieving context from website knowledge base")
     
     try:
+        # Speculative search started alongside the analysis
+        prefetch = state.get('prefetch')
+        if prefetch is not None:
+            state['prefetch'] = None
+            state['prefetched'] = await state['deadline'].run(
+                "prefetch", prefetch,
+                stage_ms=config.RETRIEVAL_BUDGET_MS,
+                reserve_ms=config.GENERATION_RESERVE_MS
+            )
+        
         # Build search query using LLM-identified topics
         search_query = llm_analyzer.get_search_query(
             state['message'], 
             state['analysis']
         )
         
-        # Search for relevant documents from scraped website
-        results = vector_store.search(
-            query=search_query,
-            n_results=config.MAX_CONTEXT_DOCS
-        )
-        
-        # Extract content from results
-        context = []
-        for doc, distance, metadata in results:
-            source = metadata.get('source', 'website')
-            context.append(f"[Source: {source}]\n{doc}")
-            logger.debug(f"Retrieved (distance={distance:.3f}): {doc[:100]}...")
+        prefetched = state.get('prefetched')
+        speculative_hit = prefetched is not None and not needs_refinement(prefetched['query'], search_query)
+        if speculative_hit:
+            # Speculative results on the raw message are close enough
+            results = prefetched['results']
+            logger.info("Using speculatively retrieved context")
+        else:
+            if search_query == state['message']:
+                search_vector = await ensure_query_vector(state)
+            elif state['deadline'].budget(reserve_ms=config.GENERATION_RESERVE_MS) > 0:
+                search_vector = state['search_vector'] = await embed_query(search_query)
+            else:
+                search_vector = None
+            
+            # Search for relevant documents from scraped website
+            results = await state['deadline'].run(
+                "retrieve",
+                asyncio.to_thread(
+                    vector_store.search,
+                    query=search_query,
+                    n_results=config.MAX_CONTEXT_DOCS,
+                    query_vector=search_vector
+                ),
+                stage_ms=config.RETRIEVAL_BUDGET_MS,
+                reserve_ms=config.GENERATION_RESERVE_MS
+            )
+            if results is None:
+                # Out of time: fall back to the speculative results, or answer without context
+                results = prefetched['results'] if prefetched else []
         
-        state['context'] = context
-        logger.info(f"Retrieved {len(context)} relevant documents from website")
+        state['context'] = format_context(results)
+        record_retrieval(len(state['context']))
+        tracing.set_attributes(chunks=len(state['context']), speculative_hit=speculative_hit)
+        logger.info("Retrieved %s relevant documents from website", len(state['context']))
         
     except Exception as e:
-        logger.error(f"Context retrieval error: {e}")
+        logger.error("Context retrieval error: %s", e)
         state['context'] = []
     
     return state
 
 
+async def prefetch_context(state: ChatState, vector: "asyncio.Future" = None) -> Optional[Dict]:
+    """
+    Speculatively search the knowledge base for the raw message.
+    Used by retrieve_context when analysis asks for context, discarded otherwise.
+    
+    Args:
+        state: Current pipeline state
+        vector: Pending query embedding shared with other consumers (optional)
+        
+    Returns:
+        Dict with the 'query' and its search 'results', or None if disabled/failed
+    """
+    if not config.SPECULATIVE_RETRIEVAL:
+        return None
+    
+    try:
+        with timed("prefetch"):
+            # Shielded: a prefetch timeout must not cancel the shared embedding,
+            # or the next stage would encode the message again
+            query_vector = await (asyncio.shield(vector) if vector is not None else ensure_query_vector(state))
+            results = await asyncio.to_thread(
+                vector_store.search,
+                query=state['message'],
+                n_results=config.MAX_CONTEXT_DOCS,
+                query_vector=query_vector
+            )
+        return {'query': state['message'], 'results': results}
+    except Exception as e:
+        logger.warning("Speculative retrieval failed: %s", e)
+        return None
+
+
+async def embed_query(text: str) -> np.ndarray:
+    """
+    Embed one text with BGE-M3 in a worker thread.
+    
+    Args:
+        text: Text to embed
+        
+    Returns:
+        float32 vector
+    """
+    with timed("embed_query"):
+        return (await asyncio.to_thread(embedding_manager.encode, [text]))[0]
+
+
+async def ensure_query_vector(state: ChatState) -> np.ndarray:
+    """
+    Get the message embedding, computing it on first use.
+    Every stage that needs it shares this one vector.
+    
+    Args:
+        state: Current pipeline state
+        
+    Returns:
+        float32 embedding of state['message']
+    """
+    if state.get('query_vector') is None:
+        task = state.get('query_vector_task')
+        if task is None:
+            task = state['query_vector_task'] = asyncio.ensure_future(embed_query(state['message']))
+        # Shielded: a caller that times out must not cancel the embedding
+        # another stage is waiting for
+        state['query_vector'] = await asyncio.shield(task)
+    return state['query_vector']
+
+
+def needs_refinement(prefetched_query: str, search_query: str) -> bool:
+    """
+    Decide whether LLM-identified topics changed the search query enough
+    to re-run retrieval, using token-set Jaccard similarity.
+    
+    Args:
+        prefetched_query: Query the speculative search ran with
+        search_query: Query built from the analysis
+        
+    Returns:
+        True if a refinement search should run
+    """
+    if prefetched_query == search_query:
+        return False
+    
+    before = set(prefetched_query.lower().split())
+    after = set(search_query.lower().split())
+    if not before | after:
+        return False
+    
+    similarity = len(before & after) / len(before | after)
+    return similarity < config.SPECULATIVE_REFINE_THRESHOLD
+
+
+def format_context(results: List[Tuple[str, float, Dict]]) -> List[str]:
+    """
+    Format search results as context blocks for the system prompt.
+    
+    Args:
+        results: (content, distance, metadata) tuples from the vector store
+        
+    Returns:
+        Context strings with their sources
+    """
+    context = []
+    for doc, distance, metadata in results:
+        source = metadata.get('source', 'website')
+        context.append(f"[Source: {source}]\n{doc}")
+        logger.debug("Retrieved (distance=%.3f): %s...", distance, doc[:100])
+    return context
+
+
 async def generate_response(state: ChatState) -> ChatState:
     """
     Generate a response using Groq LLM with website context.
@@ -131,36 +346,226 @@ async def generate_response(state: ChatState) -> ChatState:
     logger.info("Generating LLM response using website context")
     
     try:
-        # Initialize Groq client
-        llm = ChatGroq(
-            api_key=config.GROQ_API_KEY,
-            model=config.LLM_MODEL,
-            temperature=config.LLM_TEMPERATURE,
-            max_tokens=config.LLM_MAX_TOKENS
-        )
-        
         # Build system prompt with website context
-        system_prompt = build_system_prompt(state['context'], state['analysis'])
+        messages = build_messages(state)
         
-        # Generate response
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=state['message'])
-        ]
+        # Streamed with hedging/failover across Groq requests
+        response = await state['deadline'].run(
+            "generate", llm_generator.generate(messages, on_token=state.get('on_token'))
+        )
+        if response is None:
+            state['error'] = "deadline exceeded"
+            state['response'] = get_degraded_response(state, "deadline")
+            return state
         
-        response = llm.invoke(messages)
         state['response'] = response.content
+        state['usage']['generate'] = token_usage(response)
         
         logger.info("Response generated successfully")
         
+    except CircuitOpenError as e:
+        logger.warning("Skipping LLM generation: %s", e)
+        state['error'] = str(e)
+        state['response'] = get_degraded_response(state, "circuit_open")
+    except Exception as e:
+        logger.error("LLM generation error: %s", e)
+        state['error'] = str(e)
+        state['response'] = get_degraded_response(state, "error")
+    
+    return state
+
+
+async def analyze_sentiment(state: ChatState) -> ChatState:
+    """
+    Single-call mode: run only the local RoBERTa sentiment analysis, while
+    prefetching context. Intent metadata comes back from the answer call itself.
+    
+    Args:
+        state: Current pipeline state
+        
+    Returns:
+        Updated state with sentiment analysis
+    """
+    analysis = {
+        'is_greeting': False,
+        'intent': 'general',
+        'is_lead_intent': False,
+        'needs_context': True,
+        'context_topics': [],
+        'contact_data': None,
+        'intent_source': 'single_call'
+    }
+    if state.get('sentiment') is not None and state.get('prefetched') is not None:
+        # Both were computed ahead for a whole batch
+        analysis.update(state['sentiment'])
+        state['analysis'] = analysis
+        return state
+    
+    # Sentiment and retrieval on the raw message run concurrently
+    deadline = state['deadline']
+    sentiment, state['prefetched'] = await asyncio.gather(
+        deadline.run(
+            "analyze", asyncio.to_thread(llm_analyzer.analyze_sentiment_batch, [state['message']]),
+            stage_ms=config.ANALYSIS_BUDGET_MS, reserve_ms=config.GENERATION_RESERVE_MS
+        ),
+        deadline.run(
+            "prefetch", prefetch_context(state),
+            stage_ms=config.RETRIEVAL_BUDGET_MS, reserve_ms=config.GENERATION_RESERVE_MS
+        )
+    )
+    if sentiment:
+        analysis.update(sentiment[0])
+    state['analysis'] = analysis
+    return state
+
+
+async def generate_structured_response(state: ChatState) -> ChatState:
+    """
+    Single-call mode: one Groq call returns both the intent metadata and the answer.
+    
+    Args:
+        state: Current pipeline state (context retrieved from the raw message)
+        
+    Returns:
+        Updated state with response and LLM-derived analysis fields
+    """
+    logger.info("Generating structured LLM response (analysis + answer)")
+    
+    try:
+        response = await state['deadline'].run("generate", llm_generator.generate(
+            build_messages(state, SINGLE_CALL_INSTRUCTIONS),
+            model_kwargs={"response_format": {"type": "json_object"}}
+        ))
+        if response is None:
+            state['error'] = "deadline exceeded"
+            state['response'] = get_degraded_response(state, "deadline")
+            return state
+        
+        state['usage']['generate'] = token_usage(response)
+        
+        answer, metadata = parse_structured_response(response.content)
+        state['analysis'].update(metadata)
+        state['response'] = answer or get_fallback_response()
+        
+        logger.info("Structured response generated: intent=%s, lead=%s", state['analysis']['intent'], state['analysis']['is_lead_intent'])
+        
+    except CircuitOpenError as e:
+        logger.warning("Skipping LLM generation: %s", e)
+        state['error'] = str(e)
+        state['response'] = get_degraded_response(state, "circuit_open")
     except Exception as e:
-        logger.error(f"LLM generation error: {e}")
+        logger.error("LLM generation error: %s", e)
         state['error'] = str(e)
-        state['response'] = get_fallback_response()
+        state['response'] = get_degraded_response(state, "error")
     
     return state
 
 
+SINGLE_CALL_INSTRUCTIONS = """
+=== MESSAGE ANALYSIS (do this yourself) ===
+No separate analysis has been run on this message. While answering:
+- If it is a greeting or casual hello, keep the answer SHORT and friendly (1-2 sentences max)
+- If the user wants to contact us, hire us, get a quote or work with us, treat it as a lead:
+  acknowledge their interest and tell them "I'm noting this as a lead in our system. Our team will reach out shortly!"
+- If they provide a name, email, phone or project details, confirm you've captured them
+
+=== OUTPUT FORMAT ===
+Respond ONLY with valid JSON in this exact format:
+{
+    "is_greeting": true/false,
+    "intent": "greeting|question|request|complaint|feedback|contact|hire|quote|general",
+    "is_lead_intent": true/false,
+    "contact_data": null or {"name": "...", "email": "...", "phone": "...", "project": "..."},
+    "answer": "your reply to the user"
+}
+"""
+
+
+def parse_structured_response(content: str):
+    """
+    Split a single-call JSON response into the answer and intent metadata.
+    Falls back to treating the whole response as the answer if it isn't JSON.
+    
+    Args:
+        content: Raw LLM response
+        
+    Returns:
+        (answer, metadata dict)
+    """
+    text = content.strip()
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif text.startswith("```"):
+        text = text.split("```")[1].split("```")[0]
+    
+    try:
+        result = json.loads(text.strip())
+    except json.JSONDecodeError as e:
+        logger.warning("Failed to parse structured response as JSON: %s", e)
+        return content, {}
+    
+    if not isinstance(result, dict):
+        return content, {}
+    
+    metadata = {
+        'is_greeting': bool(result.get('is_greeting', False)),
+        'intent': result.get('intent') or 'general',
+        'is_lead_intent': bool(result.get('is_lead_intent', False)),
+        'contact_data': result.get('contact_data')
+    }
+    return str(result.get('answer', '')).strip(), metadata
+
+
+def build_messages(state: ChatState, instructions: str = "") -> List:
+    """
+    Build the messages for the answer call: system prompt with context,
+    session history, then the user's message.
+    
+    Args:
+        state: Current pipeline state
+        instructions: Text appended to the system prompt (optional)
+        
+    Returns:
+        LangChain messages
+    """
+    from langchain_core.messages import HumanMessage, SystemMessage
+    
+    with timed("build_prompt") as span:
+        system_prompt = build_system_prompt(state['context'], state['analysis']) + instructions
+        history_messages = build_history_messages(state.get('history'))
+        span.set_attributes({
+            'chatbot.context_chunks': len(state['context']),
+            'chatbot.history_messages': len(history_messages),
+            'chatbot.system_prompt_chars': len(system_prompt),
+        })
+    return [SystemMessage(content=system_prompt), *history_messages, HumanMessage(content=state['message'])]
+
+
+def build_history_messages(history: Optional[Dict]) -> List:
+    """
+    Turn a session's bounded history into chat messages for the answer call.
+    The rolling summary is a system message; recent turns are replayed verbatim.
+    
+    Args:
+        history: Dict with 'summary' and 'turns' (may be empty or None)
+        
+    Returns:
+        LangChain messages to place between the system prompt and the new message
+    """
+    if not history:
+        return []
+    
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+    
+    messages = []
+    if history.get('summary'):
+        messages.append(SystemMessage(content=f"Summary of the earlier conversation with this user:\n{history['summary']}"))
+    for user, assistant in history.get('turns', []):
+        messages.append(HumanMessage(content=user))
+        messages.append(AIMessage(content=assistant))
+    return messages
+
+
 def build_system_prompt(context: List[str], analysis: Dict) -> str:
     """
     Build the AgenticRAG system prompt with website context.
@@ -295,21 +700,71 @@ def get_fallback_response() -> str:
     )
 
 
-def build_rag_pipeline() -> StateGraph:
+def get_degraded_response(state: ChatState, reason: str) -> str:
+    """
+    Answer to use when generation is unavailable: a recent answer to the
+    same question if this is not a follow-up, otherwise the fallback text.
+    
+    Args:
+        state: Current pipeline state
+        reason: Why generation failed ("deadline", "circuit_open" or "error")
+        
+    Returns:
+        Response string
+    """
+    record_fallback(reason)
+    if not format_history(state.get('history')):
+        cached = answer_cache.get(state['message'])
+        if cached:
+            logger.info("Serving cached answer while generation is unavailable")
+            tracing.set_attributes(fallback_reason=reason, answer_cache_hit=True)
+            return cached
+    tracing.set_attributes(fallback_reason=reason, answer_cache_hit=False)
+    return get_fallback_response()
+
+
+def build_rag_pipeline(mode: str = None):
     """
     Build the LangGraph RAG pipeline.
     Fully LLM-driven with no hardcoded routing.
     
+    Args:
+        mode: "two_call" (analyze, then answer) or "single_call" (one
+            structured call after retrieving on the raw message).
+            Defaults to config.PIPELINE_MODE.
+    
     Returns:
         Compiled state graph
+        
+    Raises:
+        ValueError: If the mode is not one of the two above
     """
+    from langgraph.graph import StateGraph, END
+    
+    mode = mode or config.PIPELINE_MODE
+    if mode not in ("two_call", "single_call"):
+        raise ValueError(f"Unknown pipeline mode '{mode}'; use 'two_call' or 'single_call'")
+    
     # Create the graph
     workflow = StateGraph(ChatState)
     
+    if mode == "single_call":
+        workflow.add_node("analyze", timed_node("analyze", analyze_sentiment))
+        workflow.add_node("retrieve_context", timed_node("retrieve_context", retrieve_context))
+        workflow.add_node("generate_response", timed_node("generate_response", generate_structured_response))
+        
+        # Retrieval always runs on the raw message; one LLM call answers and classifies
+        workflow.set_entry_point("analyze")
+        workflow.add_edge("analyze", "retrieve_context")
+        workflow.add_edge("retrieve_context", "generate_response")
+        workflow.add_edge("generate_response", END)
+        
+        return workflow.compile()
+    
     # Add nodes
-    workflow.add_node("analyze", analyze_message)
-    workflow.add_node("retrieve_context", retrieve_context)
-    workflow.add_node("generate_response", generate_response)
+    workflow.add_node("analyze", timed_node("analyze", analyze_message))
+    workflow.add_node("retrieve_context", timed_node("retrieve_context", retrieve_context))
+    workflow.add_node("generate_response", timed_node("generate_response", generate_response))
     
     # Set entry point
     workflow.set_entry_point("analyze")
@@ -331,36 +786,134 @@ def build_rag_pipeline() -> StateGraph:
     return workflow.compile()
 
 
-# Create the pipeline instance
-rag_pipeline = build_rag_pipeline()
+# Pipeline instance, compiled on first use so importing this module stays cheap
+_rag_pipeline = None
 
 
-async def process_message(message: str) -> str:
+def get_rag_pipeline():
     """
-    Process a user message through the RAG pipeline.
-    Uses LLM for all interpretation and website content for context.
+    Get the compiled RAG pipeline, building it on first call.
+    
+    Returns:
+        Compiled state graph
+    """
+    global _rag_pipeline
+    if _rag_pipeline is None:
+        _rag_pipeline = build_rag_pipeline()
+    return _rag_pipeline
+
+
+async def run_pipeline(
+    message: str,
+    pipeline=None,
+    history: Dict = None,
+    deadline: Deadline = None,
+    query_vector: np.ndarray = None,
+    prefetched: Dict = None,
+    sentiment: Dict = None,
+    on_token: Callable[[str], None] = None
+) -> ChatState:
+    """
+    Run a user message through the RAG pipeline and return the final state.
     
     Args:
         message: User's message
+        pipeline: Compiled graph to use (defaults to get_rag_pipeline())
+        history: Session history from session_store.get_history (optional)
+        deadline: Request deadline (defaults to config.REQUEST_TIMEOUT_MS from now)
+        query_vector: Precomputed BGE-M3 embedding of the message (optional)
+        prefetched: Precomputed raw-message search, {'query', 'results'} (optional)
+        sentiment: Precomputed RoBERTa result (optional)
+        on_token: Called with each piece of answer text as it is generated (optional).
+            The structured single_call mode does not stream.
         
     Returns:
-        Bot's response
+        Final pipeline state (response, analysis, context, token usage)
     """
-    logger.info(f"Processing message: {message[:50]}...")
-    
     # Initialize state
     initial_state: ChatState = {
         'message': message,
         'analysis': {},
         'context': [],
         'response': '',
-        'error': ''
+        'error': '',
+        'usage': {},
+        'prefetched': prefetched,
+        'prefetch': None,
+        'query_vector': query_vector,
+        'query_vector_task': None,
+        'search_vector': None,
+        'sentiment': sentiment,
+        'history': history or {'summary': "", 'turns': []},
+        'deadline': deadline or Deadline(),
+        'on_token': on_token
     }
     
+    result = await (pipeline or get_rag_pipeline()).ainvoke(initial_state)
+    for call, usage in result.get('usage', {}).items():
+        record_tokens(call, usage)
+    return result
+
+
+async def process_message(
+    message: str,
+    session_id: str = None,
+    deadline: Deadline = None,
+    on_token: Callable[[str], None] = None,
+    admit: Callable[[], AsyncContextManager] = None
+) -> str:
+    """
+    Process a user message through the RAG pipeline.
+    Uses LLM for all interpretation and website content for context.
+    Concurrent sessionless requests with the same message share one pipeline run
+    (unless the answer is streamed).
+    
+    Args:
+        message: User's message
+        session_id: Conversation session; earlier turns are used as context (optional)
+        deadline: Request deadline (defaults to config.REQUEST_TIMEOUT_MS from now)
+        on_token: Called with each piece of answer text as it is generated (optional)
+        admit: Creates the admission slot context a pipeline run holds (optional);
+            a request that joins a coalesced run doesn't take one
+        
+    Returns:
+        Bot's response
+        
+    Raises:
+        AdmissionRejected: If the run could not get an admission slot
+    """
+    logger.info("Processing message: %s...", message[:50])
+    
+    history = session_store.get_history(session_id) if session_id else None
+    
     # Run the pipeline
     try:
-        result = await rag_pipeline.ainvoke(initial_state)
-        return result.get('response', get_fallback_response())
+        if session_id is None and config.COALESCE_REQUESTS and on_token is None:
+            deadline = deadline or Deadline()
+            result = await request_coalescer.run(
+                message,
+                lambda: run_pipeline(message, deadline=deadline),
+                timeout=max(deadline.remaining(), 0),
+                admit=admit
+            )
+        else:
+            async with admit() if admit else nullcontext():
+                result = await run_pipeline(message, history=history, deadline=deadline, on_token=on_token)
+    except AdmissionRejected:
+        raise
+    except asyncio.TimeoutError:
+        logger.warning("Timed out waiting for a coalesced pipeline run")
+        record_fallback("deadline")
+        return get_fallback_response()
     except Exception as e:
-        logger.error(f"Pipeline error: {e}")
+        logger.error("Pipeline error: %s", e)
+        record_fallback("error")
         return get_fallback_response()
+    
+    response = result.get('response') or get_fallback_response()
+    if not result.get('error'):
+        if session_id:
+            session_store.record_turn(session_id, message, response)
+        else:
+            answer_cache.put(message, response)
+    return response
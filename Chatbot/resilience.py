@@ -0,0 +1,408 @@
+"""
+Circuit breakers, a retry budget and an answer cache for the NexGenTeck AI Chatbot.
+
+- CircuitBreaker: one per dependency (groq_breaker, qdrant_breaker). Counts
+  outcomes over a sliding time window and opens when the failure rate is too
+  high. While open, calls fail immediately with CircuitOpenError so requests
+  take their fallback path (default intent, no context, cached or fallback
+  answer) instead of waiting for a timeout. After a cool-down a few probe
+  calls are let through (half-open); a successful probe closes the breaker.
+- RetryBudget: one shared budget that caps retries (including hedges and
+  failovers) at a fraction of recent calls, so a failing dependency is not
+  hit with extra load.
+- AnswerCache: recent answers to sessionless questions, served when Groq is
+  unavailable.
+"""
+
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+
+from config import config
+from deadlines import DEADLINE_EXCEEDED
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+    def __init__(self, name: str):
+        super().__init__(f"{name} circuit breaker is open")
+        self.name = name
+
+
+def is_failure(exc: BaseException) -> bool:
+    """
+    Decide whether an exception means the dependency is unhealthy.
+    Client errors (HTTP 4xx other than 408 and 429) are our fault, not the dependency's.
+    A call cancelled because its stage deadline ran out was too slow, which
+    counts; any other cancellation (e.g. the client left) gives no verdict.
+
+    Args:
+        exc: Exception raised by the call
+
+    Returns:
+        True if it should count against the breaker (and, for exceptions, may be retried)
+    """
+    if isinstance(exc, asyncio.CancelledError):
+        return exc.args[:1] == (DEADLINE_EXCEEDED,)
+    if not isinstance(exc, Exception) or isinstance(exc, CircuitOpenError):
+        return False
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500 and status not in (408, 429):
+        return False
+    return True
+
+
+class _Guard:
+    """Context manager for one call through a breaker (sync or async)."""
+
+    def __init__(self, breaker: "CircuitBreaker"):
+        self.breaker = breaker
+        self.probe = False
+
+    def __enter__(self):
+        self.probe = self.breaker._acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is None:
+            self.breaker._record(True, self.probe)
+        elif is_failure(exc):
+            self.breaker._record(False, self.probe)
+        else:
+            # Cancelled by the caller or a client error: no verdict on the dependency
+            self.breaker._release(self.probe)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with half-open probing."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, ok)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        """State, moving open to half-open once the cool-down has passed (caller holds the lock)."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= config.BREAKER_OPEN_SECONDS:
+            self._state = HALF_OPEN
+            self._probes = 0
+            logger.info("%s circuit breaker half-open: probing", self.name)
+        return self._state
+
+    def is_open(self) -> bool:
+        """
+        Check whether calls are being rejected right now (without reserving a probe).
+        Callers that skip the dependency because of this call record_rejected().
+        """
+        if not config.BREAKER_ENABLED:
+            return False
+        with self._lock:
+            state = self._current_state()
+            return state == OPEN or (state == HALF_OPEN and self._probes >= config.BREAKER_HALF_OPEN_PROBES)
+
+    def record_rejected(self):
+        """Count a call skipped because the breaker is open."""
+        with self._lock:
+            self.rejected += 1
+
+    def guard(self) -> _Guard:
+        """
+        Wrap one call: raises CircuitOpenError when rejected, records the outcome otherwise.
+
+        Usage:
+            with groq_breaker.guard():
+                ...
+        """
+        return _Guard(self)
+
+    def _acquire(self) -> bool:
+        """Admit a call or raise CircuitOpenError; returns True if the call is a probe."""
+        if not config.BREAKER_ENABLED:
+            return False
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return False
+            if state == HALF_OPEN and self._probes < config.BREAKER_HALF_OPEN_PROBES:
+                self._probes += 1
+                return True
+            self.rejected += 1
+        raise CircuitOpenError(self.name)
+
+    def record_failure(self):
+        """Record a failure seen after a guarded call returned (e.g. a stream that broke mid-response)."""
+        self._record(False, False)
+
+    def _release(self, probe: bool):
+        """Free a probe slot without recording an outcome."""
+        if probe:
+            with self._lock:
+                self._probes = max(0, self._probes - 1)
+
+    def _record(self, ok: bool, probe: bool):
+        """Record a call outcome and update the state."""
+        if not config.BREAKER_ENABLED:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if probe:
+                self._probes = max(0, self._probes - 1)
+                if self._state == HALF_OPEN:
+                    if ok:
+                        self._state = CLOSED
+                        self._outcomes.clear()
+                        logger.info("%s circuit breaker closed: probe succeeded", self.name)
+                    else:
+                        self._open(now, "probe failed")
+                    return
+
+            self._outcomes.append((now, ok))
+            while self._outcomes and now - self._outcomes[0][0] > config.BREAKER_WINDOW_SECONDS:
+                self._outcomes.popleft()
+
+            if self._state == CLOSED and len(self._outcomes) >= config.BREAKER_MIN_CALLS:
+                failures = sum(1 for _, success in self._outcomes if not success)
+                rate = failures / len(self._outcomes)
+                if rate >= config.BREAKER_FAILURE_RATE:
+                    self._open(now, f"{failures}/{len(self._outcomes)} calls failed")
+
+    def _open(self, now: float, reason: str):
+        """Trip the breaker (caller holds the lock)."""
+        self._state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self.opened += 1
+        logger.warning("%s circuit breaker open for %.0fs: %s", self.name, config.BREAKER_OPEN_SECONDS, reason)
+
+    def reset(self):
+        """Close the breaker and forget recent outcomes."""
+        with self._lock:
+            self._state = CLOSED
+            self._outcomes.clear()
+            self._probes = 0
+
+    def stats(self) -> Dict:
+        """Breaker statistics."""
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                'state': state,
+                'window_calls': calls,
+                'window_failure_rate': round(failures / calls, 4) if calls else 0.0,
+                'opened': self.opened,
+                'rejected': self.rejected,
+            }
+
+
+class RetryBudget:
+    """Caps retries at a fraction of recent calls across all dependencies."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = deque()
+        self._retries = deque()
+        self.denied = 0
+
+    def _trim(self, now: float):
+        """Drop events older than the window (caller holds the lock)."""
+        for events in (self._calls, self._retries):
+            while events and now - events[0] > config.RETRY_BUDGET_WINDOW_SECONDS:
+                events.popleft()
+
+    def record_call(self):
+        """Count a first attempt; each one adds RETRY_BUDGET_RATIO to the budget."""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._calls.append(now)
+
+    def try_retry(self) -> bool:
+        """
+        Take one retry from the budget.
+
+        Returns:
+            True if the retry may be sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            allowed = (
+                len(self._calls) * config.RETRY_BUDGET_RATIO
+                + config.RETRY_BUDGET_MIN_PER_SECOND * config.RETRY_BUDGET_WINDOW_SECONDS
+            )
+            if len(self._retries) >= allowed:
+                self.denied += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def stats(self) -> Dict:
+        """Retry budget statistics over the current window."""
+        with self._lock:
+            self._trim(time.monotonic())
+            return {'calls': len(self._calls), 'retries': len(self._retries), 'denied': self.denied}
+
+
+def _backoff(attempt: int) -> float:
+    """Seconds to wait before retry number `attempt` (exponential with full jitter)."""
+    return random.uniform(0, config.RETRY_BACKOFF_MS * (2 ** (attempt - 1))) / 1000
+
+
+async def call_async(breaker: CircuitBreaker, fn: Callable, *args, retries: int = None, **kwargs):
+    """
+    Await fn(*args, **kwargs) through a breaker, retrying failures within the retry budget.
+
+    Args:
+        breaker: Breaker for the dependency being called
+        fn: Coroutine function
+        retries: Maximum retries (defaults to config.RETRY_ATTEMPTS)
+
+    Returns:
+        fn's result
+
+    Raises:
+        CircuitOpenError: If the breaker rejected the call
+    """
+    retries = config.RETRY_ATTEMPTS if retries is None else retries
+    retry_budget.record_call()
+    attempt = 0
+    while True:
+        try:
+            with breaker.guard():
+                return await fn(*args, **kwargs)
+        except Exception as e:
+            attempt += 1
+            if attempt > retries or not is_failure(e) or breaker.is_open() or not retry_budget.try_retry():
+                raise
+            logger.info("Retrying %s call after error: %s", breaker.name, e)
+            await asyncio.sleep(_backoff(attempt))
+
+
+def call_sync(breaker: CircuitBreaker, fn: Callable, *args, retries: int = None, **kwargs):
+    """
+    Call fn(*args, **kwargs) through a breaker, retrying failures within the retry budget.
+    Blocking counterpart of call_async (e.g. for Qdrant calls in a worker thread).
+
+    Args:
+        breaker: Breaker for the dependency being called
+        fn: Function to call
+        retries: Maximum retries (defaults to config.RETRY_ATTEMPTS)
+
+    Returns:
+        fn's result
+
+    Raises:
+        CircuitOpenError: If the breaker rejected the call
+    """
+    retries = config.RETRY_ATTEMPTS if retries is None else retries
+    retry_budget.record_call()
+    attempt = 0
+    while True:
+        try:
+            with breaker.guard():
+                return fn(*args, **kwargs)
+        except Exception as e:
+            attempt += 1
+            if attempt > retries or not is_failure(e) or breaker.is_open() or not retry_budget.try_retry():
+                raise
+            logger.info("Retrying %s call after error: %s", breaker.name, e)
+            time.sleep(_backoff(attempt))
+
+
+def normalize_message(message: str) -> str:
+    """Cache key for a message: lowercased, whitespace collapsed, trailing punctuation dropped."""
+    return re.sub(r"\s+", " ", message.lower()).strip().rstrip("?!. ")
+
+
+class AnswerCache:
+    """LRU cache of recent answers to sessionless questions (used as a fallback only)."""
+
+    def __init__(self):
+        self._answers: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def put(self, message: str, answer: str):
+        """Remember the answer to a message."""
+        if config.ANSWER_CACHE_SIZE <= 0:
+            return
+        key = normalize_message(message)
+        with self._lock:
+            self._answers[key] = (time.monotonic(), answer)
+            self._answers.move_to_end(key)
+            while len(self._answers) > config.ANSWER_CACHE_SIZE:
+                self._answers.popitem(last=False)
+
+    def get(self, message: str) -> Optional[str]:
+        """
+        Look up a recent answer.
+
+        Returns:
+            The cached answer, or None if missing or older than ANSWER_CACHE_TTL_SECONDS
+        """
+        key = normalize_message(message)
+        with self._lock:
+            entry = self._answers.get(key)
+            if entry is None:
+                return None
+            stored, answer = entry
+            if time.monotonic() - stored > config.ANSWER_CACHE_TTL_SECONDS:
+                del self._answers[key]
+                return None
+            self.hits += 1
+            return answer
+
+    def stats(self) -> Dict:
+        """Answer cache statistics."""
+        with self._lock:
+            return {'entries': len(self._answers), 'fallback_hits': self.hits}
+
+
+def stats() -> Dict:
+    """Breaker states, retry budget and answer cache statistics."""
+    return {
+        'breakers': {breaker.name: breaker.stats() for breaker in (groq_breaker, qdrant_breaker)},
+        'retry_budget': retry_budget.stats(),
+        'answer_cache': answer_cache.stats(),
+    }
+
+
+# Singleton instances
+groq_breaker = CircuitBreaker("groq")
+qdrant_breaker = CircuitBreaker("qdrant")
+retry_budget = RetryBudget()
+answer_cache = AnswerCache()
@@ -5,15 +5,12 @@ This is the ONLY source of information for the chatbot.
 """
 
 from bs4 import BeautifulSoup
-from typing import List, Dict, Set
+from typing import Iterator, List, Dict, Set
 from urllib.parse import urljoin, urlparse
 import logging
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
+import threading
+import time
 
 from config import config
 from utils import clean_text, chunk_text
@@ -36,13 +33,18 @@ class WebsiteScraper:
         """
         self.base_url = base_url or config.WEBSITE_URL
         self.visited_urls: Set[str] = set()
-        self.documents: List[Dict[str, str]] = []
+        self.document_count = 0
+        self._stopped = threading.Event()
+    
+    def stop(self):
+        """Stop crawling after the current page (e.g. on shutdown)."""
+        self._stopped.set()
         
     def scrape(self, max_pages: int = 100) -> List[Dict[str, str]]:
         """
         Scrape the ENTIRE website and extract ALL content.
-        For local development, uses translation files directly.
-        For production, scrapes the live website.
+        Returns only after the whole crawl; use iter_documents() to index
+        pages as they are crawled.
         
         Args:
             max_pages: Maximum number of pages to scrape
@@ -50,7 +52,24 @@ class WebsiteScraper:
         Returns:
             List of documents with 'content' and 'metadata' keys
         """
-        logger.info(f"Starting comprehensive scrape of {self.base_url}")
+        return list(self.iter_documents(max_pages=max_pages))
+    
+    def iter_documents(self, max_pages: int = 100) -> Iterator[Dict[str, str]]:
+        """
+        Scrape the ENTIRE website, yielding each page's documents as soon as
+        the page is processed. Nothing is kept after it is yielded, so memory
+        does not grow with the size of the site.
+        For local development, uses translation files directly.
+        For production, scrapes the live website.
+        
+        Args:
+            max_pages: Maximum number of pages to scrape
+            
+        Yields:
+            Documents with 'content' and 'metadata' keys
+        """
+        logger.info("Starting comprehensive scrape of %s", self.base_url)
+        self.document_count = 0
         
         # Optional local-source ingestion (disabled by default in production).
         # This avoids stale local content overriding live website updates.
@@ -61,39 +80,56 @@ class WebsiteScraper:
                 logger.info("USE_TRANSLATION_EXTRACTOR=true - using translation extractor")
                 try:
                     from translation_extractor import get_translation_based_content
-                    self.documents = get_translation_based_content()
-                    logger.info(f"Loaded {len(self.documents)} documents from translations")
-                    return self.documents
+                    documents = get_translation_based_content()
                 except Exception as e:
-                    logger.warning(f"Translation extractor failed: {e}, falling back to source scraping")
+                    logger.warning("Translation extractor failed: %s, falling back to source scraping", e)
+                else:
+                    logger.info("Loaded %s documents from translations", len(documents))
+                    self.document_count = len(documents)
+                    yield from documents
+                    return
         
         # Crawl with a JS-capable browser so SPA content is rendered
         try:
-            self._crawl_site(max_pages=max_pages)
+            for page_documents in self._crawl_site(max_pages=max_pages):
+                self.document_count += len(page_documents)
+                yield from page_documents
         except Exception as e:
-            logger.error(f"Rendered scraping failed: {e}")
+            logger.error("Rendered scraping failed: %s", e)
 
         # If scraping produced nothing, provide a fallback so the bot still works.
-        if not self.documents:
+        if not self.document_count and not self._stopped.is_set():
             logger.warning("No documents extracted from scraping; falling back to safe defaults")
+            documents = []
             if config.USE_TRANSLATION_EXTRACTOR:
                 try:
                     from translation_extractor import get_translation_based_content
-                    self.documents = get_translation_based_content()
-                    logger.info(f"Loaded {len(self.documents)} documents from translations fallback")
+                    documents = get_translation_based_content()
+                    logger.info("Loaded %s documents from translations fallback", len(documents))
                 except Exception as e:
-                    logger.warning(f"Translation fallback failed: {e}")
+                    logger.warning("Translation fallback failed: %s", e)
 
-            if not self.documents:
-                self.documents = self._get_fallback_content()
+            if not documents:
+                documents = self._get_fallback_content()
+            self.document_count = len(documents)
+            yield from documents
                 
-        logger.info(f"Scraped {len(self.visited_urls)} pages, created {len(self.documents)} documents")
-        return self.documents
+        logger.info("Scraped %s pages, created %s documents", len(self.visited_urls), self.document_count)
     
-    def _crawl_site(self, max_pages: int) -> None:
+    def _crawl_site(self, max_pages: int) -> Iterator[List[Dict[str, str]]]:
         """
         Crawl the site with a JS-capable browser to fully render SPA content.
+        
+        Yields:
+            The documents extracted from each page, page by page
         """
+        # Selenium is only needed when crawling; import lazily to keep startup fast
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        from selenium.webdriver.chrome.options import Options as ChromeOptions
+        from selenium.webdriver.support.ui import WebDriverWait
+        from webdriver_manager.chrome import ChromeDriverManager
+        
         base_domain = urlparse(self.base_url).netloc
         queue: List[str] = [self.base_url]
 
@@ -107,28 +143,37 @@ class WebsiteScraper:
             service=ChromeService(ChromeDriverManager().install()),
             options=chrome_options
         )
+        # Bound each page load and the whole crawl so a slow site can't stall reindexing
+        driver.set_page_load_timeout(config.SCRAPER_PAGE_TIMEOUT)
+        crawl_deadline = time.monotonic() + config.SCRAPER_TOTAL_TIMEOUT
 
         try:
             while queue and len(self.visited_urls) < max_pages:
+                if self._stopped.is_set():
+                    logger.info("Scraper stopped; ending crawl early")
+                    break
+                if time.monotonic() > crawl_deadline:
+                    logger.warning("Crawl time limit (%ss) reached; stopping early", config.SCRAPER_TOTAL_TIMEOUT)
+                    break
                 url = queue.pop(0)
                 if url in self.visited_urls:
                     continue
 
                 self.visited_urls.add(url)
-                logger.info(f"Processing: {url}")
+                logger.info("Processing: %s", url)
 
                 try:
                     driver.get(url)
-                    WebDriverWait(driver, 30).until(
+                    WebDriverWait(driver, config.SCRAPER_PAGE_TIMEOUT).until(
                         lambda d: d.execute_script("return document.readyState") == "complete"
                     )
                     html = driver.page_source
                 except Exception as e:
-                    logger.warning(f"Failed to load {url}: {e}")
+                    logger.warning("Failed to load %s: %s", url, e)
                     continue
 
                 soup = BeautifulSoup(html, 'lxml')
-                self._extract_all_content(soup, url)
+                page_documents = self._extract_all_content(soup, url)
 
                 # Discover new links dynamically from rendered HTML
                 for link in soup.find_all('a', href=True):
@@ -149,10 +194,13 @@ class WebsiteScraper:
                     normalized = parsed._replace(fragment="").geturl()
                     if normalized not in self.visited_urls:
                         queue.append(normalized)
+
+                if page_documents:
+                    yield page_documents
         finally:
             driver.quit()
     
-    def _extract_all_content(self, soup: BeautifulSoup, url: str):
+    def _extract_all_content(self, soup: BeautifulSoup, url: str) -> List[Dict[str, str]]:
         """
         Extract ALL relevant content from a page.
         This is comprehensive - we want all the website information.
@@ -160,6 +208,9 @@ class WebsiteScraper:
         Args:
             soup: BeautifulSoup object
             url: URL of the page
+            
+        Returns:
+            The page's chunk documents (empty if the page has no real content)
         """
         # Remove elements that don't contain useful content
         for element in soup(['script', 'style', 'noscript', 'iframe']):
@@ -254,20 +305,23 @@ class WebsiteScraper:
         # Combine all content
         full_content = "\n\n".join(content_parts)
         
-        if full_content and len(full_content) > 50:
-            # Chunk the content for better retrieval
-            chunks = chunk_text(full_content, chunk_size=800, overlap=100)
-            
-            for i, chunk in enumerate(chunks):
-                self.documents.append({
-                    'content': chunk,
-                    'metadata': {
-                        'source': url,
-                        'title': title_text,
-                        'chunk_index': i,
-                        'total_chunks': len(chunks)
-                    }
-                })
+        if not full_content or len(full_content) <= 50:
+            return []
+        
+        # Chunk the content for better retrieval
+        chunks = chunk_text(full_content, chunk_size=800, overlap=100)
+        return [
+            {
+                'content': chunk,
+                'metadata': {
+                    'source': url,
+                    'title': title_text,
+                    'chunk_index': i,
+                    'total_chunks': len(chunks)
+                }
+            }
+            for i, chunk in enumerate(chunks)
+        ]
     
     def _get_fallback_content(self) -> List[Dict[str, str]]:
         """
@@ -7,14 +7,20 @@ Uses:
 This is a hybrid approach: RoBERTa for sentiment, LLM for intent.
 """
 
-from transformers import pipeline
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage
-from typing import Dict
+from typing import Dict, List
+import asyncio
 import logging
 import json
+import threading
+
+import numpy as np
 
 from config import config
+from embeddings import embedding_manager
+from intent_router import intent_router, log_analysis
+from resilience import CircuitOpenError, call_async, groq_breaker
+from utils import token_usage
+from metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +35,9 @@ class LLMAnalyzer:
     _instance = None
     _llm = None
     _sentiment_model = None
+    _llm_loaded = False
+    _sentiment_loaded = False
+    _lock = threading.Lock()
     
     def __new__(cls):
         """Singleton pattern."""
@@ -36,25 +45,62 @@ class LLMAnalyzer:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
+    def load(self):
         """Initialize the LLM and RoBERTa models."""
-        # Initialize LLM for intent detection
-        if LLMAnalyzer._llm is None:
+        self.load_llm()
+        self.load_sentiment_model()
+    
+    def load_llm(self) -> bool:
+        """
+        Initialize the LLM for intent detection.
+        Deferred until first use (or startup) so importing this module stays cheap.
+        
+        Returns:
+            True if the LLM client is available
+        """
+        if LLMAnalyzer._llm_loaded:
+            return LLMAnalyzer._llm is not None
+        
+        with LLMAnalyzer._lock:
+            if LLMAnalyzer._llm_loaded:
+                return LLMAnalyzer._llm is not None
+            
             logger.info("Initializing LLM analyzer")
             try:
-                LLMAnalyzer._llm = ChatGroq(
-                    api_key=config.GROQ_API_KEY,
+                from llm_client import get_chat_model
+                
+                LLMAnalyzer._llm = get_chat_model(
                     model=config.LLM_MODEL,
                     temperature=0.1,  # Low temperature for consistent analysis
                     max_tokens=256
                 )
                 logger.info("LLM analyzer initialized successfully")
             except Exception as e:
-                logger.error(f"Failed to initialize LLM analyzer: {e}")
+                logger.error("Failed to initialize LLM analyzer: %s", e)
                 LLMAnalyzer._llm = None
+            
+            LLMAnalyzer._llm_loaded = True
+            return LLMAnalyzer._llm is not None
+    
+    def load_sentiment_model(self) -> bool:
+        """
+        Initialize RoBERTa for sentiment analysis.
+        Deferred until first use (or startup) so importing this module stays cheap.
+        
+        Returns:
+            True if the sentiment model is available
+        """
+        if config.INFERENCE_MODE == "sidecar":
+            # The sidecar owns the model; nothing to load in this process
+            return True
         
-        # Initialize RoBERTa for sentiment analysis
-        if LLMAnalyzer._sentiment_model is None:
+        if LLMAnalyzer._sentiment_loaded:
+            return LLMAnalyzer._sentiment_model is not None
+        
+        with LLMAnalyzer._lock:
+            if LLMAnalyzer._sentiment_loaded:
+                return LLMAnalyzer._sentiment_model is not None
+            
             logger.info("Initializing RoBERTa sentiment model")
             try:
                 # Use explicit device=-1 for CPU and disable multiprocessing on Windows
@@ -62,7 +108,7 @@ class LLMAnalyzer:
                 os.environ["TOKENIZERS_PARALLELISM"] = "false"
                 
                 # Explicitly load model with low_cpu_mem_usage=False to avoid multiprocessing issues on Windows
-                from transformers import AutoModelForSequenceClassification, AutoTokenizer
+                from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
                 
                 model_name = "cardiffnlp/twitter-roberta-base-sentiment-latest"
                 
@@ -82,15 +128,28 @@ class LLMAnalyzer:
                 )
                 logger.info("RoBERTa sentiment model initialized successfully")
             except Exception as e:
-                logger.error(f"Failed to initialize RoBERTa model: {e}")
+                logger.error("Failed to initialize RoBERTa model: %s", e)
                 LLMAnalyzer._sentiment_model = None
+            
+            LLMAnalyzer._sentiment_loaded = True
+            return LLMAnalyzer._sentiment_model is not None
     
-    async def analyze(self, message: str) -> Dict[str, any]:
+    async def analyze(
+        self,
+        message: str,
+        query_vector: np.ndarray = None,
+        conversation: str = "",
+        sentiment: Dict[str, any] = None
+    ) -> Dict[str, any]:
         """
         Analyze the user message using RoBERTa (sentiment) and LLM (intent).
+        Intent comes from the local router when it is confident, skipping the LLM call.
         
         Args:
             message: User message to analyze
+            query_vector: Precomputed BGE-M3 embedding of the message (optional)
+            conversation: Earlier conversation in this session, as text (optional)
+            sentiment: Precomputed RoBERTa result, e.g. from a batch (skips the model)
             
         Returns:
             Dict with analysis results
@@ -102,20 +161,58 @@ class LLMAnalyzer:
             'sentiment_score': 0.5,
             'needs_context': True,
             'context_topics': [],
-            'confidence': 0.5
+            'confidence': 0.5,
+            'intent_source': 'default'
         }
         
-        # Step 1: RoBERTa sentiment analysis
-        sentiment_result = self._analyze_sentiment_roberta(message)
+        # RoBERTa sentiment (in a worker thread) runs concurrently with intent detection
+        if sentiment is not None:
+            sentiment_result = sentiment
+            intent_result = await self._analyze_intent(message, query_vector, conversation)
+        else:
+            sentiment_result, intent_result = await asyncio.gather(
+                asyncio.to_thread(self._analyze_sentiment_roberta, message),
+                self._analyze_intent(message, query_vector, conversation)
+            )
         result.update(sentiment_result)
-        
-        # Step 2: LLM intent analysis (softcoded - no hardcoded patterns)
-        intent_result = await self._analyze_intent_llm(message)
         result.update(intent_result)
         
-        logger.info(f"Analysis: sentiment={result['sentiment']}, intent={result['intent']}, needs_context={result['needs_context']}")
+        logger.info("Analysis: sentiment=%s, intent=%s (%s), needs_context=%s", result['sentiment'], result['intent'], result['intent_source'], result['needs_context'])
         return result
     
+    async def _analyze_intent(self, message: str, query_vector: np.ndarray = None, conversation: str = "") -> Dict[str, any]:
+        """
+        Detect intent with the local router, falling back to the LLM when it is uncertain.
+        
+        Args:
+            message: User message to analyze
+            query_vector: Precomputed BGE-M3 embedding of the message (optional)
+            conversation: Earlier conversation in this session, as text (optional)
+            
+        Returns:
+            Dict with intent analysis results
+        """
+        # Local intent router for high-confidence cases
+        if intent_router.is_available():
+            if query_vector is None:
+                with timed("embed_query"):
+                    query_vector = (await asyncio.to_thread(embedding_manager.encode, [message]))[0]
+            with timed("intent_router"):
+                intent_result = intent_router.predict(query_vector)
+            # Follow-ups that need context go to the LLM, which resolves
+            # references like "that" into search topics
+            if intent_result is not None and conversation and intent_result['needs_context']:
+                intent_result = None
+            if intent_result is not None:
+                intent_result['intent_source'] = 'router'
+                return intent_result
+        
+        # LLM intent analysis (softcoded - no hardcoded patterns)
+        intent_result = await self._analyze_intent_llm(message, conversation)
+        if intent_result.get('intent_source') == 'llm':
+            log_analysis(message, intent_result)
+        return intent_result
+    
     def _analyze_sentiment_roberta(self, message: str) -> Dict[str, any]:
         """
         Analyze sentiment using RoBERTa model.
@@ -127,56 +224,96 @@ class LLMAnalyzer:
         Returns:
             Dict with 'sentiment' and 'sentiment_score'
         """
-        if LLMAnalyzer._sentiment_model is None:
-            return {'sentiment': 'neutral', 'sentiment_score': 0.5}
+        return self.analyze_sentiment_batch([message])[0]
+    
+    def analyze_sentiment_batch(self, messages: List[str]) -> List[Dict[str, any]]:
+        """
+        Analyze sentiment for several messages in one RoBERTa forward pass.
+        Runs in the inference sidecar when INFERENCE_MODE=sidecar.
+        
+        Args:
+            messages: Texts to analyze
+            
+        Returns:
+            One dict with 'sentiment' and 'sentiment_score' per message
+        """
+        neutral = {'sentiment': 'neutral', 'sentiment_score': 0.5}
+        
+        if config.INFERENCE_MODE == "sidecar":
+            from inference_client import inference_client
+            try:
+                return inference_client.sentiment(messages)
+            except Exception as e:
+                logger.error("RoBERTa sentiment analysis error: %s", e)
+                return [dict(neutral) for _ in messages]
+        
+        if not self.load_sentiment_model():
+            return [dict(neutral) for _ in messages]
         
         try:
             # Truncate to model's max length
-            results = LLMAnalyzer._sentiment_model(message[:512])
-            
-            if results and results[0]:
-                # Find the highest scoring sentiment
-                best = max(results[0], key=lambda x: x['score'])
-                label = best['label'].lower()
-                
-                # Map RoBERTa labels to standard sentiments
-                sentiment_map = {
-                    'positive': 'positive',
-                    'negative': 'negative',
-                    'neutral': 'neutral',
-                    'pos': 'positive',
-                    'neg': 'negative',
-                    'neu': 'neutral'
-                }
-                
-                sentiment = sentiment_map.get(label, 'neutral')
-                logger.debug(f"RoBERTa sentiment: {sentiment} (score: {best['score']:.3f})")
-                
-                return {
-                    'sentiment': sentiment,
-                    'sentiment_score': best['score']
-                }
-                
+            with timed("sentiment"):
+                results = LLMAnalyzer._sentiment_model(
+                    [message[:512] for message in messages],
+                    batch_size=max(1, min(len(messages), config.SENTIMENT_BATCH_SIZE))
+                )
+            return [self._best_sentiment(scores) or dict(neutral) for scores in results]
         except Exception as e:
-            logger.error(f"RoBERTa sentiment analysis error: {e}")
+            logger.error("RoBERTa sentiment analysis error: %s", e)
+        
+        return [dict(neutral) for _ in messages]
+    
+    def _best_sentiment(self, scores: List[Dict]) -> Dict[str, any]:
+        """Map RoBERTa's per-label scores for one text to the best sentiment."""
+        if not scores:
+            return None
+        
+        # Find the highest scoring sentiment
+        best = max(scores, key=lambda x: x['score'])
+        label = best['label'].lower()
+        
+        # Map RoBERTa labels to standard sentiments
+        sentiment_map = {
+            'positive': 'positive',
+            'negative': 'negative',
+            'neutral': 'neutral',
+            'pos': 'positive',
+            'neg': 'negative',
+            'neu': 'neutral'
+        }
         
-        return {'sentiment': 'neutral', 'sentiment_score': 0.5}
+        sentiment = sentiment_map.get(label, 'neutral')
+        logger.debug("RoBERTa sentiment: %s (score: %.3f)", sentiment, best['score'])
+        
+        return {
+            'sentiment': sentiment,
+            'sentiment_score': best['score']
+        }
     
-    async def _analyze_intent_llm(self, message: str) -> Dict[str, any]:
+    async def _analyze_intent_llm(self, message: str, conversation: str = "") -> Dict[str, any]:
         """
         Analyze intent using LLM (fully softcoded).
         LLM interprets intent dynamically without hardcoded patterns.
         
         Args:
             message: Text to analyze
+            conversation: Earlier conversation in this session, as text (optional)
             
         Returns:
             Dict with intent analysis results
         """
-        if LLMAnalyzer._llm is None:
+        if not self.load_llm():
+            return self._get_default_intent()
+        
+        # Groq is failing: don't wait for another failure
+        if groq_breaker.is_open():
+            groq_breaker.record_rejected()
+            logger.info("Groq circuit breaker open, using default intent")
             return self._get_default_intent()
         
         try:
+            from langchain_core.messages import HumanMessage, SystemMessage
+            
             analysis_prompt = """You are an intelligent message analyzer for a business website chatbot (NexGenTeck - a tech company).
 
 Analyze the user's message and determine:
@@ -207,16 +344,30 @@ Respond ONLY with valid JSON in this exact format:
     "contact_data": null or {"name": "...", "email": "...", "phone": "...", "project": "..."}
 }"""
             
-            response = LLMAnalyzer._llm.invoke([
-                SystemMessage(content=analysis_prompt),
-                HumanMessage(content=f"Analyze this message: \"{message}\"")
-            ])
+            with timed("intent_llm", {'gen_ai.request.model': config.LLM_MODEL}) as span:
+                response = await call_async(groq_breaker, LLMAnalyzer._llm.ainvoke, [
+                    SystemMessage(content=analysis_prompt),
+                    HumanMessage(content=(
+                        f"Conversation so far (use it to resolve references like \"that\" in context_topics):\n{conversation}\n\n"
+                        if conversation else ""
+                    ) + f"Analyze this message: \"{message}\"")
+                ])
+                usage = token_usage(response)
+                span.set_attributes({
+                    'gen_ai.usage.input_tokens': usage['input_tokens'],
+                    'gen_ai.usage.output_tokens': usage['output_tokens'],
+                })
             
             # Parse JSON response
-            return self._parse_intent_response(response.content)
+            result = self._parse_intent_response(response.content)
+            result['llm_usage'] = usage
+            return result
             
+        except CircuitOpenError:
+            logger.info("Groq circuit breaker open, using default intent")
+            return self._get_default_intent()
         except Exception as e:
-            logger.error(f"LLM intent analysis error: {e}")
+            logger.error("LLM intent analysis error: %s", e)
             return self._get_default_intent()
     
     def _parse_intent_response(self, response: str) -> Dict[str, any]:
@@ -235,13 +386,16 @@ Respond ONLY with valid JSON in this exact format:
             return {
                 "is_greeting": result.get("is_greeting", False),
                 "intent": result.get("intent", "general"),
+                "is_lead_intent": result.get("is_lead_intent", False),
                 "needs_context": result.get("needs_context", True),
                 "context_topics": result.get("context_topics", []),
-                "confidence": 0.9
+                "contact_data": result.get("contact_data"),
+                "confidence": 0.9,
+                "intent_source": "llm"
             }
             
         except json.JSONDecodeError as e:
-            logger.warning(f"Failed to parse LLM response as JSON: {e}")
+            logger.warning("Failed to parse LLM response as JSON: %s", e)
             return self._get_default_intent()
     
     def _get_default_intent(self) -> Dict[str, any]:
@@ -251,7 +405,8 @@ Respond ONLY with valid JSON in this exact format:
             "intent": "general",
             "needs_context": True,
             "context_topics": [],
-            "confidence": 0.5
+            "confidence": 0.5,
+            "intent_source": "default"
         }
     
     def should_retrieve_context(self, analysis: Dict) -> bool:
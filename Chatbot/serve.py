@@ -0,0 +1,245 @@
+"""
+Multi-worker launcher for the NexGenTeck AI Chatbot.
+
+Loads BGE-M3, RoBERTa and the knowledge base ONCE in a parent process, then
+forks uvicorn workers that share them copy-on-write. Startup work (scrape,
+embed, index) runs once, and each added worker only costs its private pages.
+
+Use VECTOR_BACKEND=numpy (one contiguous matrix, shared untouched by the
+workers) or a Qdrant server (every worker attaches to the same index).
+Qdrant :memory: mode also works, but its per-point Python objects are
+gradually copied into each worker as they are read.
+
+Usage:
+    python serve.py --workers 4 --port 8000
+
+SIGHUP (sent by /reindex in a worker) makes the parent re-scrape and
+rebuild the in-process index, then replace the workers one by one.
+
+Conversation sessions are disabled with more than one worker: each worker
+keeps its own session store, and the shared socket hands every request to
+an arbitrary worker, so a session's history would be lost between turns.
+"""
+
+import multiprocessing
+import os
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+import argparse
+import asyncio
+import gc
+import logging
+import signal
+import socket
+import sys
+import time
+
+from config import config
+from inference_client import inference_client
+from logging_setup import setup_logging
+
+logger = logging.getLogger("serve")
+
+
+def set_torch_threads(threads: int):
+    """Set PyTorch intra-op threads if torch is installed."""
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(max(1, threads))
+
+
+def memory_usage_mb() -> str:
+    """Describe this process's RSS and PSS (proportional share of shared pages)."""
+    values = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key] = int(rest.split()[0]) / 1024
+    except OSError:
+        return "n/a"
+    return ", ".join(f"{k}={v:.0f}MB" for k, v in values.items())
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Create the listening socket shared by all workers."""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload(app_module):
+    """Load every component and build the knowledge base in this process."""
+    # A single intra-op thread keeps PyTorch from starting an OpenMP pool in
+    # the parent; a pool started before fork() can deadlock the workers.
+    set_torch_threads(1)
+    asyncio.run(app_module.load_components(wait_for_knowledge_base=True))
+
+    if not app_module.startup_tracker.is_ready():
+        report = app_module.startup_tracker.snapshot()
+        raise RuntimeError(f"Preload failed: {report['components']}")
+
+    # Move preloaded objects out of the GC's tracked generations so worker
+    # collections don't write to (and un-share) their pages.
+    gc.collect()
+    gc.freeze()
+    logger.info("Preload complete (%s)", memory_usage_mb())
+
+
+def run_worker(app_module, sock: socket.socket, threads: int):
+    """Body of a forked worker: serve HTTP on the inherited socket."""
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+
+    set_torch_threads(threads)
+    app_module.vector_store.reset_after_fork()
+    inference_client.reset()
+    logger.info("Worker %s started (%s)", os.getpid(), memory_usage_mb())
+
+    server = uvicorn.Server(uvicorn.Config(app_module.app, lifespan="on", log_level="info"))
+    server.run(sockets=[sock])
+
+
+class Supervisor:
+    """Forks workers, restarts ones that die and handles shutdown/reindex signals."""
+
+    def __init__(self, app_module, sock: socket.socket, workers: int, threads: int):
+        self.app_module = app_module
+        self.sock = sock
+        self.workers = workers
+        self.threads = threads
+        self.children = set()
+        self.retiring = set()
+        self.stopping = False
+        self.reindex_requested = False
+
+    def spawn(self) -> int:
+        """Fork one worker."""
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(self.app_module, self.sock, self.threads)
+            finally:
+                os._exit(0)
+        self.children.add(pid)
+        return pid
+
+    def stop(self, signum, frame):
+        """Forward SIGTERM/SIGINT to the workers and stop supervising."""
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.discard(pid)
+
+    def request_reindex(self, signum, frame):
+        """Handle SIGHUP from a worker's /reindex."""
+        self.reindex_requested = True
+
+    def reindex(self):
+        """Rebuild the knowledge base here, then replace workers one at a time."""
+        self.reindex_requested = False
+        logger.info("Rebuilding knowledge base in the parent process")
+        gc.unfreeze()
+        try:
+            count = self.app_module.rebuild_knowledge_base()
+            logger.info("Re-indexed %s documents; restarting workers", count)
+        except Exception as e:
+            logger.error("Re-indexing failed: %s", e)
+            return
+        finally:
+            gc.collect()
+            gc.freeze()
+
+        for pid in list(self.children):
+            self.spawn()
+            self.retiring.add(pid)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """Start the workers and supervise until stopped."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, self.request_reindex)
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children:
+            if self.reindex_requested and not self.stopping:
+                self.reindex()
+                continue
+
+            # Poll so SIGHUP/SIGTERM flags are acted on promptly
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.5)
+                continue
+
+            self.children.discard(pid)
+            if self.stopping or pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+
+            if os.waitstatus_to_exitcode(status) != 0 or len(self.children) < self.workers:
+                logger.warning("Worker %s exited; starting a replacement", pid)
+                time.sleep(1)
+                self.spawn()
+
+        logger.info("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=config.HOST)
+    parser.add_argument("--port", type=int, default=config.PORT)
+    parser.add_argument("--workers", type=int, default=config.WEB_WORKERS)
+    parser.add_argument("--threads-per-worker", type=int, default=config.TORCH_THREADS_PER_WORKER,
+                        help="PyTorch intra-op threads per worker (0 = CPU count / workers)")
+    args = parser.parse_args()
+
+    setup_logging()
+
+    import main as app_module
+
+    # A single worker doesn't need preloading; keep /livez fast during startup.
+    if args.workers <= 1 or not hasattr(os, "fork"):
+        import uvicorn
+        uvicorn.run(app_module.app, host=args.host, port=args.port)
+        return
+
+    config.validate()
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    # Session stores are per worker; turn sessions off rather than lose history
+    app_module.session_store.disable("Sessions are unavailable when the server runs several workers")
+    logger.warning("Conversation sessions are disabled with %s workers", args.workers)
+
+    sock = bind_socket(args.host, args.port)
+    preload(app_module)
+    app_module.prefork_parent_pid = os.getpid()
+
+    logger.info("Starting %s workers on %s:%s (%s torch threads each)", args.workers, args.host, args.port, threads)
+    Supervisor(app_module, sock, args.workers, threads).run()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
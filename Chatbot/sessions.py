@@ -0,0 +1,310 @@
+"""
+Server-side conversation sessions for the NexGenTeck AI Chatbot.
+
+Each session keeps its last few turns verbatim plus a short rolling summary
+of everything older, so the history sent to Groq stays within a fixed size
+however long the conversation runs. Older turns are summarized by a small
+Groq model in the background, after the response has been sent (or
+extractively, without an LLM call, while the Groq circuit breaker is open).
+
+Memory is bounded three ways: a maximum number of sessions (least recently
+used evicted first), an idle TTL, and byte caps per session and overall.
+
+Session IDs are issued by the server (POST /sessions, or a new /ws
+connection): a random part plus its HMAC under SESSION_SECRET. Requests
+with any other ID are rejected, so a conversation can only be read,
+continued or deleted by a client that was given its ID.
+
+The store lives in the worker process. serve.py workers share one listening
+socket, so consecutive requests land on arbitrary workers; it disables
+sessions when it runs more than one worker rather than lose history.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+
+from config import config
+from resilience import call_async, groq_breaker
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+def _text_bytes(text: str) -> int:
+    """UTF-8 size of a string."""
+    return len(text.encode("utf-8"))
+
+
+def _clip(text: str, max_chars: int, keep_end: bool = False) -> str:
+    """Shorten text to max_chars, keeping the start (or the end)."""
+    if len(text) <= max_chars:
+        return text
+    return "..." + text[-(max_chars - 3):] if keep_end else text[:max_chars - 3] + "..."
+
+
+class Session:
+    """One conversation: rolling summary plus recent (user, assistant) turns."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.summary = ""
+        self.turns: List[Tuple[str, str]] = []
+        self.last_access = time.monotonic()
+        self.compacting = False
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the session's text."""
+        return _text_bytes(self.summary) + sum(_text_bytes(u) + _text_bytes(a) for u, a in self.turns)
+
+
+class SessionStore:
+    """
+    Memory-bounded session store with LRU and TTL eviction.
+    Thread-safe; compaction runs as an asyncio background task.
+    """
+
+    def __init__(self):
+        self._secret = (config.SESSION_SECRET or secrets.token_hex(32)).encode()
+        self.disabled_reason: Optional[str] = None
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._tasks = set()
+        self._summarizer = None
+        self.evictions = 0
+        self.summaries = 0
+
+    def disable(self, reason: str):
+        """Turn sessions off: IDs are no longer issued or accepted (reason is shown to clients)."""
+        self.disabled_reason = reason
+
+    def _sign(self, nonce: str) -> str:
+        return hmac.new(self._secret, nonce.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def new_session_id(self) -> str:
+        """Issue a new session ID: <random>-<signature>."""
+        nonce = secrets.token_hex(16)
+        return f"{nonce}-{self._sign(nonce)}"
+
+    def is_issued(self, session_id: str) -> bool:
+        """Check that a session ID was issued by this server (same SESSION_SECRET)."""
+        nonce, _, signature = session_id.partition("-")
+        return bool(nonce) and hmac.compare_digest(signature, self._sign(nonce))
+
+    def _drop(self, session_id: str):
+        """Remove a session and release its bytes (caller holds the lock)."""
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._total_bytes -= session.nbytes
+
+    def _evict(self):
+        """Drop expired sessions, then least recently used ones over the caps (caller holds the lock)."""
+        now = time.monotonic()
+        # Sessions are kept in access order, so expired ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access <= config.SESSION_TTL_SECONDS:
+                break
+            self._drop(session_id)
+            self.evictions += 1
+
+        while self._sessions and (
+            len(self._sessions) > config.SESSION_MAX_SESSIONS
+            or self._total_bytes > config.SESSION_MAX_TOTAL_BYTES
+        ):
+            self._drop(next(iter(self._sessions)))
+            self.evictions += 1
+
+    def get_history(self, session_id: str) -> Dict:
+        """
+        Get the bounded history used to build the prompt.
+
+        Args:
+            session_id: Session identifier from new_session_id()
+
+        Returns:
+            Dict with 'summary' and 'turns' (the last SESSION_RECENT_TURNS turns)
+        """
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return {'summary': "", 'turns': []}
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return {
+                'summary': session.summary,
+                'turns': list(session.turns[-config.SESSION_RECENT_TURNS:])
+            }
+
+    def record_turn(self, session_id: str, message: str, response: str):
+        """
+        Append a turn and schedule compaction of older turns.
+
+        Args:
+            session_id: Session identifier from new_session_id()
+            message: User message
+            response: Assistant response
+        """
+        turn = (
+            _clip(message, config.SESSION_TURN_MAX_CHARS),
+            _clip(response, config.SESSION_TURN_MAX_CHARS)
+        )
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id)
+            self._total_bytes -= session.nbytes
+            session.turns.append(turn)
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+
+            # Over the per-session cap: compact right away without waiting for the LLM
+            if session.nbytes > config.SESSION_MAX_BYTES:
+                older = session.turns[:-config.SESSION_RECENT_TURNS] or session.turns[:-1]
+                session.summary = self._fallback_summary(session.summary, older)
+                session.turns = session.turns[len(older):]
+
+            self._total_bytes += session.nbytes
+            needs_compaction = len(session.turns) > config.SESSION_RECENT_TURNS and not session.compacting
+            if needs_compaction:
+                session.compacting = True
+            self._evict()
+
+        if needs_compaction:
+            self._schedule(self.compact(session_id))
+
+    def _schedule(self, coro):
+        """Run a coroutine in the background, keeping a reference until it finishes."""
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def compact(self, session_id: str):
+        """
+        Fold turns older than the recent window into the rolling summary.
+
+        Args:
+            session_id: Session to compact
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+            summary = session.summary
+            older = session.turns[:-config.SESSION_RECENT_TURNS]
+
+        try:
+            if older:
+                with timed("session_summary"):
+                    new_summary = await self._summarize(summary, older)
+            else:
+                new_summary = summary
+        except Exception as e:
+            logger.warning("Session summarization failed, using extractive summary: %s", e)
+            new_summary = self._fallback_summary(summary, older)
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+            session.compacting = False
+            # Turns may have been compacted by the byte cap in the meantime
+            if session.turns[:len(older)] != older:
+                return
+            self._total_bytes -= session.nbytes
+            session.summary = _clip(new_summary, config.SESSION_SUMMARY_MAX_CHARS, keep_end=True)
+            session.turns = session.turns[len(older):]
+            self._total_bytes += session.nbytes
+            self.summaries += 1
+
+    async def _summarize(self, summary: str, turns: List[Tuple[str, str]]) -> str:
+        """Ask a small Groq model to merge turns into the running summary."""
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        if self._summarizer is None:
+            from llm_client import get_chat_model
+            self._summarizer = get_chat_model(
+                model=config.SESSION_SUMMARY_MODEL,
+                temperature=0.0,
+                max_tokens=config.SESSION_SUMMARY_MAX_CHARS // 4
+            )
+
+        transcript = "\n".join(f"User: {user}\nAssistant: {assistant}" for user, assistant in turns)
+        response = await call_async(groq_breaker, self._summarizer.ainvoke, [
+            SystemMessage(content=(
+                "You maintain a running summary of a customer's chat with NexGenTeck's website assistant. "
+                "Merge the new exchanges into the existing summary. Keep the services discussed, "
+                "requirements, budget/timeline, any name, email, phone or project details, and open questions. "
+                f"Write at most {config.SESSION_SUMMARY_MAX_CHARS // 6} words of plain text, no preamble."
+            )),
+            HumanMessage(content=f"Existing summary:\n{summary or '(none)'}\n\nNew exchanges:\n{transcript}")
+        ])
+        return response.content.strip()
+
+    def _fallback_summary(self, summary: str, turns: List[Tuple[str, str]]) -> str:
+        """Extractive summary used when the LLM is unavailable or the byte cap is hit."""
+        parts = [summary] if summary else []
+        for user, assistant in turns:
+            parts.append(f"User asked: {_clip(user, 200)} Assistant answered: {_clip(assistant, 200)}")
+        return _clip(" ".join(parts), config.SESSION_SUMMARY_MAX_CHARS, keep_end=True)
+
+    def clear(self, session_id: str) -> bool:
+        """
+        Forget a session.
+
+        Returns:
+            True if the session existed
+        """
+        with self._lock:
+            existed = session_id in self._sessions
+            self._drop(session_id)
+            return existed
+
+    def stats(self) -> Dict:
+        """Session store statistics."""
+        with self._lock:
+            return {
+                'enabled': self.disabled_reason is None,
+                'sessions': len(self._sessions),
+                'bytes': self._total_bytes,
+                'evictions': self.evictions,
+                'summaries': self.summaries,
+            }
+
+
+def format_history(history: Optional[Dict]) -> str:
+    """
+    Render a session history as plain text (used in the analysis prompt).
+
+    Args:
+        history: Dict from SessionStore.get_history
+
+    Returns:
+        Conversation text, or "" when there is no history
+    """
+    if not history or not (history.get('summary') or history.get('turns')):
+        return ""
+    lines = []
+    if history.get('summary'):
+        lines.append(f"Summary of earlier conversation: {history['summary']}")
+    for user, assistant in history.get('turns', []):
+        lines.append(f"User: {_clip(user, 300)}")
+        lines.append(f"Assistant: {_clip(assistant, 300)}")
+    return "\n".join(lines)
+
+
+# Singleton instance
+session_store = SessionStore()
@@ -0,0 +1,153 @@
+"""
+Startup tracking for the NexGenTeck AI Chatbot.
+Records per-component load state for /readyz and a per-phase timing
+breakdown of startup, so slow cold starts can be diagnosed.
+"""
+
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+# Still loading, but already usable (e.g. the knowledge base while pages are indexed)
+PARTIAL = "partial"
+
+
+class StartupTracker:
+    """
+    Tracks component load state and startup phase timings.
+
+    Components marked as required must load for the service to be ready.
+    Optional components (e.g. the RoBERTa model) may fail; the chatbot then
+    runs in a degraded mode, which /readyz still reports.
+    """
+
+    def __init__(self):
+        """Initialize an empty tracker."""
+        self.started_at = time.perf_counter()
+        self.components: Dict[str, Dict] = {}
+        self.phases: List[Dict] = []
+        self.completed_in: float = None
+
+    def register(self, name: str, required: bool = True):
+        """
+        Register a component that will be loaded during startup.
+
+        Args:
+            name: Component name as reported by /readyz
+            required: Whether readiness depends on this component loading
+        """
+        self.components[name] = {'state': PENDING, 'required': required, 'seconds': None, 'error': None}
+
+    def set_state(self, name: str, state: str, error: str = None):
+        """Set a component's state directly (e.g. when loaded elsewhere)."""
+        self.components[name]['state'] = state
+        self.components[name]['error'] = error
+
+    def set_progress(self, name: str, progress: Dict, usable: bool = False):
+        """
+        Attach progress details to a component still loading (e.g. documents indexed).
+
+        Args:
+            name: Registered component name
+            progress: Details reported by /readyz
+            usable: The component already works with what has loaded; a loading
+                component becomes partial, which counts as settled for readiness
+        """
+        component = self.components[name]
+        component['progress'] = progress
+        if usable and component['state'] == LOADING:
+            component['state'] = PARTIAL
+
+    def record_phase(self, name: str, seconds: float):
+        """Record how long a startup phase took."""
+        self.phases.append({'phase': name, 'seconds': round(seconds, 3)})
+
+    @asynccontextmanager
+    async def phase(self, name: str):
+        """Async context manager that records the duration of a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - start)
+
+    async def load(self, name: str, loader: Callable):
+        """
+        Run a blocking loader in a worker thread and track its state.
+
+        A loader that raises, or returns False, marks the component failed.
+
+        Args:
+            name: Registered component name
+            loader: Blocking callable that loads the component
+
+        Returns:
+            The loader's return value, or None on failure
+        """
+        component = self.components[name]
+        if component['state'] == READY:
+            return None
+
+        component['state'] = LOADING
+        start = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(loader)
+        except Exception as e:
+            logger.error("Failed to load %s: %s", name, e)
+            result = False
+            component['error'] = str(e)
+        finally:
+            component['seconds'] = round(time.perf_counter() - start, 3)
+            self.record_phase(name, component['seconds'])
+
+        component['state'] = FAILED if result is False else READY
+        return None if result is False else result
+
+    def is_settled(self) -> bool:
+        """True once every component has finished loading, failed or become usable."""
+        return all(c['state'] in (READY, FAILED, PARTIAL) for c in self.components.values())
+
+    def is_ready(self) -> bool:
+        """True once all components are settled and no required one failed."""
+        return self.is_settled() and all(
+            c['state'] in (READY, PARTIAL) for c in self.components.values() if c['required']
+        )
+
+    def failed_components(self) -> List[str]:
+        """Names of required components that failed to load."""
+        return [name for name, c in self.components.items() if c['required'] and c['state'] == FAILED]
+
+    def mark_complete(self):
+        """Record total startup time and log the phase breakdown."""
+        self.completed_in = round(time.perf_counter() - self.started_at, 3)
+        breakdown = ", ".join(f"{p['phase']}={p['seconds']:.2f}s" for p in self.phases)
+        logger.info("Startup finished in %.2fs (%s)", self.completed_in, breakdown)
+
+    def snapshot(self) -> Dict:
+        """Return the readiness report for /readyz."""
+        if self.is_ready():
+            status = "ready"
+        elif self.is_settled():
+            status = "failed"
+        else:
+            status = "starting"
+
+        return {
+            'status': status,
+            'components': {name: dict(c) for name, c in self.components.items()},
+            'phases': list(self.phases),
+            'uptime_seconds': round(time.perf_counter() - self.started_at, 3),
+            'startup_seconds': self.completed_in,
+        }
+
+
+# Singleton instance
+startup_tracker = StartupTracker()
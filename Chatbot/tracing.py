@@ -0,0 +1,180 @@
+"""
+OpenTelemetry tracing for the NexGenTeck AI Chatbot.
+
+Each /chat request becomes a trace. The root span covers the request, and
+child spans cover every pipeline node and sub-step timed by metrics.timed():
+RoBERTa sentiment, the intent router and intent LLM call, BGE-M3 query
+encoding, the vector search, prompt building and the Groq completion.
+Attributes record chunk counts, token usage, speculative-retrieval and
+answer-cache hits, and whether the request was coalesced. Incoming W3C
+traceparent headers are honoured, so traces join the caller's.
+
+Disabled unless TRACING_ENABLED=true and the OpenTelemetry SDK is installed.
+When disabled every call is a cheap no-op. Exporters (TRACING_EXPORTER):
+- otlp: OTLP over HTTP to OTEL_EXPORTER_OTLP_ENDPOINT (a local collector by default)
+- file: one JSON span per line in TRACING_FILE_PATH (for tests)
+- console: print spans to stdout
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Optional
+import json
+import logging
+import threading
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_tracer = None
+_provider = None
+
+
+class _NoopSpan:
+    """Span stand-in used when tracing is disabled."""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _file_exporter(path: str):
+    """Span exporter that appends one JSON object per span to a file."""
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesSpanExporter(SpanExporter):
+        def __init__(self):
+            self._lock = threading.Lock()
+
+        def export(self, spans):
+            with self._lock, open(path, "a", encoding="utf-8") as f:
+                for span in spans:
+                    f.write(json.dumps(json.loads(span.to_json())) + "\n")
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+    return JsonLinesSpanExporter()
+
+
+def setup_tracing() -> bool:
+    """
+    Install the tracer provider and exporter configured by TRACING_*.
+
+    Returns:
+        True if tracing is active
+    """
+    global _tracer, _provider
+
+    if _tracer is not None:
+        return True
+    if not config.TRACING_ENABLED:
+        return False
+
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("TRACING_ENABLED is set but opentelemetry-sdk is not installed; tracing disabled")
+        return False
+
+    exporter_name = config.TRACING_EXPORTER
+    if exporter_name == "file":
+        exporter = _file_exporter(config.TRACING_FILE_PATH)
+    elif exporter_name == "console":
+        exporter = ConsoleSpanExporter()
+    else:
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("opentelemetry-exporter-otlp-proto-http is not installed; tracing disabled")
+            return False
+        exporter = OTLPSpanExporter()
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": config.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(config.TRACING_SAMPLE_RATIO))
+    )
+    # The file exporter writes synchronously so tests can read spans right away
+    processor = SimpleSpanProcessor if exporter_name == "file" else BatchSpanProcessor
+    _provider.add_span_processor(processor(exporter))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("chatbot")
+
+    logger.info("Tracing enabled (%s exporter, sample ratio %s)", exporter_name, config.TRACING_SAMPLE_RATIO)
+    return True
+
+
+def shutdown_tracing():
+    """Flush pending spans and stop the exporter."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = _provider = None
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict] = None):
+    """
+    Run a block inside a child span of the current span.
+
+    Args:
+        name: Span name
+        attributes: Initial span attributes
+
+    Yields:
+        The span (a no-op object when tracing is disabled)
+    """
+    if _tracer is None:
+        yield _NOOP_SPAN
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+@contextmanager
+def request_span(name: str, headers=None, attributes: Optional[Dict] = None):
+    """
+    Start the root span for an incoming request, continuing the caller's
+    trace when the headers carry a W3C traceparent.
+
+    Args:
+        name: Span name (e.g. "POST /chat")
+        headers: Incoming request headers (mapping)
+        attributes: Initial span attributes
+
+    Yields:
+        The span (a no-op object when tracing is disabled)
+    """
+    if _tracer is None:
+        yield _NOOP_SPAN
+        return
+    from opentelemetry.propagate import extract
+    from opentelemetry.trace import SpanKind
+
+    context = extract(dict(headers)) if headers is not None else None
+    with _tracer.start_as_current_span(name, context=context, kind=SpanKind.SERVER, attributes=attributes) as current:
+        yield current
+
+
+def set_attributes(**attributes):
+    """Add attributes to the current span (no-op when tracing is disabled)."""
+    if _tracer is None:
+        return
+    from opentelemetry import trace
+
+    current = trace.get_current_span()
+    if current.is_recording():
+        current.set_attributes({f"chatbot.{key}": value for key, value in attributes.items() if value is not None})
@@ -41,14 +41,14 @@ class TranslationExtractor:
         self._load_language_context_translations()
         self._load_service_translations()
         
-        logger.info(f"Loaded {len(self.translations)} translation keys")
+        logger.info("Loaded %s translation keys", len(self.translations))
         
         # Create structured documents from translations
         documents.extend(self._create_service_documents())
         documents.extend(self._create_general_documents())
         documents.extend(self._create_company_documents())
         
-        logger.info(f"Created {len(documents)} knowledge documents")
+        logger.info("Created %s knowledge documents", len(documents))
         return documents
     
     def _load_language_context_translations(self):
@@ -58,7 +58,7 @@ class TranslationExtractor:
         )
         
         if not os.path.exists(lang_context_path):
-            logger.warning(f"LanguageContext.tsx not found at {lang_context_path}")
+            logger.warning("LanguageContext.tsx not found at %s", lang_context_path)
             return
             
         try:
@@ -78,10 +78,10 @@ class TranslationExtractor:
                 if key and value and not key.startswith('//'):
                     self.translations[key] = value
                     
-            logger.info(f"Loaded {len(matches)} translations from LanguageContext.tsx")
+            logger.info("Loaded %s translations from LanguageContext.tsx", len(matches))
             
         except Exception as e:
-            logger.error(f"Error loading LanguageContext.tsx: {e}")
+            logger.error("Error loading LanguageContext.tsx: %s", e)
     
     def _extract_english_section(self, content: str) -> str:
         """Extract the English translations section from the file."""
@@ -128,7 +128,7 @@ class TranslationExtractor:
         )
         
         if not os.path.exists(service_trans_path):
-            logger.warning(f"serviceTranslations.ts not found")
+            logger.warning("serviceTranslations.ts not found")
             return
             
         try:
@@ -149,7 +149,7 @@ class TranslationExtractor:
                 pass
                 
         except Exception as e:
-            logger.error(f"Error loading serviceTranslations.ts: {e}")
+            logger.error("Error loading serviceTranslations.ts: %s", e)
     
     def _extract_section_by_lang(self, content: str, lang: str) -> str:
         """Extract a specific language section."""
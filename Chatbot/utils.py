@@ -4,13 +4,8 @@ Fully softcoded - no hardcoded patterns or regex.
 """
 
 import logging
-from typing import List
+from typing import Dict, List
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 
@@ -73,3 +68,20 @@ def clean_text(text: str) -> str:
     text = ' '.join(words)
     
     return text.strip()
+
+
+def token_usage(response) -> Dict[str, int]:
+    """
+    Extract token counts from a LangChain chat model response.
+    
+    Args:
+        response: AIMessage returned by the chat model
+        
+    Returns:
+        Dict with 'input_tokens' and 'output_tokens' (zeros if unreported)
+    """
+    usage = getattr(response, 'usage_metadata', None) or {}
+    return {
+        'input_tokens': usage.get('input_tokens', 0),
+        'output_tokens': usage.get('output_tokens', 0)
+    }
@@ -2,16 +2,21 @@
 Vector store manager using Qdrant.
 Handles storage and retrieval of document embeddings.
 Uses in-memory Qdrant for simplicity (no external server needed).
+Set VECTOR_BACKEND=numpy to use the in-process NumPy exact-search index instead.
 """
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from typing import List, Dict, Tuple
+from typing import Callable, Dict, Iterable, List, Tuple
 import logging
+import threading
 import uuid
 
+import numpy as np
+
 from config import config
 from embeddings import embedding_manager
+from numpy_store import NumpyIndex
+from resilience import CircuitOpenError, call_sync, qdrant_breaker
+from metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +26,10 @@ class VectorStore:
     
     _instance = None
     _client = None
+    _index = None
     _collection_name = None
     _initialized = False
+    _lock = threading.Lock()
     
     def __new__(cls):
         """Singleton pattern for vector store."""
@@ -30,85 +37,160 @@ class VectorStore:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
+    def load(self):
         """
         Initialize Qdrant client.
         Supports both in-memory storage and external Qdrant server.
         Set QDRANT_URL environment variable to use an external server.
+        Set VECTOR_BACKEND=numpy to skip Qdrant and search in-process.
+        Deferred until first use (or startup) so importing this module stays cheap.
         """
-        if VectorStore._client is None:
+        if self.is_loaded():
+            return
+        
+        with VectorStore._lock:
+            if self.is_loaded():
+                return
+            
+            if config.VECTOR_BACKEND == "numpy":
+                logger.info("Initializing NumPy exact-search index (%s)", config.NUMPY_VECTOR_DTYPE)
+                VectorStore._index = NumpyIndex(dtype=config.NUMPY_VECTOR_DTYPE)
+                return
+            
+            from qdrant_client import QdrantClient
+            
             qdrant_url = config.QDRANT_URL
             
             if qdrant_url == ":memory:" or not qdrant_url:
                 # Use in-memory Qdrant - no external server needed
                 logger.info("Initializing Qdrant (in-memory mode)")
-                VectorStore._client = QdrantClient(":memory:")
+                client = QdrantClient(":memory:")
             else:
                 # Connect to external Qdrant server (self-hosted open source)
-                logger.info(f"Connecting to external Qdrant server at {qdrant_url}")
+                logger.info("Connecting to external Qdrant server at %s", qdrant_url)
                 try:
-                    VectorStore._client = QdrantClient(url=qdrant_url)
+                    client = QdrantClient(url=qdrant_url, timeout=config.QDRANT_TIMEOUT)
                     logger.info("Connected to external Qdrant server successfully")
                 except Exception as e:
-                    logger.error(f"Failed to connect to Qdrant server: {e}")
+                    logger.error("Failed to connect to Qdrant server: %s", e)
                     logger.info("Falling back to in-memory mode")
-                    VectorStore._client = QdrantClient(":memory:")
+                    client = QdrantClient(":memory:")
             
             VectorStore._collection_name = config.COLLECTION_NAME
             
             # Create collection if it doesn't exist
-            self._create_collection()
+            self._create_collection(client)
+            VectorStore._client = client
             
-            logger.info(f"Qdrant collection '{config.COLLECTION_NAME}' ready")
+            logger.info("Qdrant collection '%s' ready", config.COLLECTION_NAME)
     
-    def _create_collection(self):
-        """Create the vector collection if it doesn't exist."""
-        try:
-            # Get embedding dimension
-            dim = embedding_manager.get_embedding_dimension()
+    def is_loaded(self) -> bool:
+        """Check whether the backend has been initialized."""
+        return VectorStore._client is not None or VectorStore._index is not None
+    
+    def is_in_process(self) -> bool:
+        """Check whether the index lives in this process (numpy or Qdrant :memory:)."""
+        return config.VECTOR_BACKEND == "numpy" or config.QDRANT_URL in (":memory:", "")
+    
+    def reset_after_fork(self):
+        """
+        Drop a Qdrant server connection inherited from a parent process.
+        Forked workers must not share the parent's HTTP connection pool, so
+        the client is replaced with a fresh one. In-process indexes are kept
+        and shared copy-on-write.
+        """
+        if VectorStore._client is not None and not self.is_in_process():
+            from qdrant_client import QdrantClient
             
-            # Create collection
-            VectorStore._client.create_collection(
-                collection_name=VectorStore._collection_name,
-                vectors_config=VectorParams(
-                    size=dim,
-                    distance=Distance.COSINE
-                )
-            )
-            logger.info(f"Created collection with dimension {dim}")
-        except Exception as e:
-            # Collection might already exist
-            logger.debug(f"Collection creation note: {e}")
+            VectorStore._client = QdrantClient(url=config.QDRANT_URL, timeout=config.QDRANT_TIMEOUT)
+    
+    def _create_collection(self, client=None):
+        """
+        Create the vector collection if it doesn't exist.
+        
+        Raises:
+            Whatever Qdrant raised (e.g. a collection config it rejects), so
+            load() fails instead of searching a collection that isn't there
+        """
+        from quantization import build_vector_params
+        
+        client = client or VectorStore._client
+        if client.collection_exists(VectorStore._collection_name):
+            logger.info("Using existing collection '%s'", VectorStore._collection_name)
+            return
+        
+        # Get embedding dimension
+        dim = embedding_manager.get_embedding_dimension()
+        
+        # Create collection (optionally quantized, with on-disk originals)
+        client.create_collection(
+            collection_name=VectorStore._collection_name,
+            vectors_config=build_vector_params(dim)
+        )
+        logger.info(
+            "Created collection with dimension %s (quantization=%s, on_disk=%s)",
+            dim, config.QDRANT_QUANTIZATION, config.QDRANT_ON_DISK_VECTORS
+        )
     
     @property
     def client(self):
-        """Get the Qdrant client."""
+        """Get the Qdrant client, connecting on first access."""
+        if not self.is_loaded():
+            self.load()
         return VectorStore._client
     
-    def add_documents(self, documents: List[Dict[str, str]]) -> int:
+    def add_documents(
+        self,
+        documents: Iterable[Dict[str, str]],
+        batch_size: int = None,
+        on_progress: Callable[[Dict], None] = None
+    ) -> int:
         """
         Add documents to the vector store.
         
+        Documents are embedded and upserted in fixed-size batches, with the
+        next batch encoding while the previous one is written (see
+        ingestion.py), so memory does not grow with the number of documents.
+        
         Args:
-            documents: List of dicts with 'content' and 'metadata' keys
+            documents: Dicts with 'content' and 'metadata' keys (a list or any
+                iterable, e.g. a generator; consumed lazily)
+            batch_size: Documents per batch (defaults to INGEST_BATCH_SIZE)
+            on_progress: Called with the pipeline's progress() after each batch
             
         Returns:
             Number of documents added
         """
-        if not documents:
-            return 0
+        from ingestion import IngestionPipeline
+        
+        # The store loads on the first write (after the first batch is encoded),
+        # so a crawl can start feeding documents while the models still load
+        pipeline = IngestionPipeline(
+            # The pipeline logs progress itself; no progress bar per batch
+            lambda texts: embedding_manager.encode(texts, show_progress=False),
+            self._write_batch,
+            batch_size=batch_size,
+            on_progress=on_progress
+        )
+        count = pipeline.run(documents)
         
-        # Extract content and metadata
-        contents = [doc['content'] for doc in documents]
-        metadatas = [doc.get('metadata', {}) for doc in documents]
+        if count:
+            VectorStore._initialized = True
+        logger.info("Added %s documents to vector store", count)
+        return count
+    
+    def _write_batch(self, contents: List[str], embeddings: np.ndarray, metadatas: List[Dict]):
+        """Store one batch of embedded documents on the active backend."""
+        self.load()
+        if VectorStore._index is not None:
+            VectorStore._index.add(embeddings, contents, metadatas)
+            return
         
-        # Generate embeddings
-        embeddings = embedding_manager.embed_texts(contents)
+        from qdrant_client.models import PointStruct
         
         # Create points for Qdrant
-        points = []
-        for i, (content, embedding, metadata) in enumerate(zip(contents, embeddings, metadatas)):
-            point = PointStruct(
+        points = [
+            PointStruct(
                 id=str(uuid.uuid4()),
                 vector=embedding,
                 payload={
@@ -116,23 +198,21 @@ class VectorStore:
                     **metadata
                 }
             )
-            points.append(point)
+            for content, embedding, metadata in zip(contents, embeddings.tolist(), metadatas)
+        ]
         
         # Add to collection
         self.client.upsert(
             collection_name=VectorStore._collection_name,
             points=points
         )
-        
-        VectorStore._initialized = True
-        logger.info(f"Added {len(documents)} documents to vector store")
-        return len(documents)
     
     def search(
         self, 
         query: str, 
         n_results: int = None,
-        distance_threshold: float = None
+        distance_threshold: float = None,
+        query_vector: np.ndarray = None
     ) -> List[Tuple[str, float, Dict]]:
         """
         Search for relevant documents.
@@ -141,59 +221,154 @@ class VectorStore:
             query: Search query
             n_results: Maximum number of results (defaults to config.MAX_CONTEXT_DOCS)
             distance_threshold: Maximum distance for relevance (defaults to config.RELEVANCE_THRESHOLD)
+            query_vector: Precomputed embedding of the query (skips encoding)
             
         Returns:
             List of tuples: (content, distance, metadata)
         """
+        query_vectors = None if query_vector is None else np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        return self.search_batch([query], n_results, distance_threshold, query_vectors)[0]
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        n_results: int = None,
+        distance_threshold: float = None,
+        query_vectors: np.ndarray = None
+    ) -> List[List[Tuple[str, float, Dict]]]:
+        """
+        Search for relevant documents for several queries at once.
+        Embeds all queries in one encode call and runs a single batched search.
+        
+        Args:
+            queries: Search queries
+            n_results: Maximum number of results per query (defaults to config.MAX_CONTEXT_DOCS)
+            distance_threshold: Maximum distance for relevance (defaults to config.RELEVANCE_THRESHOLD)
+            query_vectors: Precomputed (len(queries), dim) embeddings (skips encoding)
+            
+        Returns:
+            One list of (content, distance, metadata) tuples per query
+        """
         n_results = n_results or config.MAX_CONTEXT_DOCS
         distance_threshold = distance_threshold or config.RELEVANCE_THRESHOLD
         
+        if not queries:
+            return []
+        
+        # Qdrant is failing: don't wait for another timeout
+        if qdrant_breaker.is_open() and self.is_loaded() and VectorStore._index is None:
+            qdrant_breaker.record_rejected()
+            raise CircuitOpenError(qdrant_breaker.name)
+        
         if self.count() == 0:
             logger.warning("Vector store is empty")
-            return []
+            return [[] for _ in queries]
         
-        # Generate query embedding
-        query_embedding = embedding_manager.embed_text(query)
+        # Generate query embeddings unless the caller already has them
+        if query_vectors is None:
+            query_embeddings = embedding_manager.encode(queries)
+        else:
+            query_embeddings = np.asarray(query_vectors, dtype=np.float32)
         
         # Search
-        results = self.client.search(
-            collection_name=VectorStore._collection_name,
-            query_vector=query_embedding,
-            limit=n_results
-        )
+        with timed("vector_search", {'chatbot.queries': len(queries), 'chatbot.backend': config.VECTOR_BACKEND}) as span:
+            hits_per_query = self._search_vectors(query_embeddings, n_results)
+            span.set_attribute('chatbot.hits', sum(len(hits) for hits in hits_per_query))
         
         # Process results
         processed = []
-        for hit in results:
-            # Convert similarity score to distance (1 - similarity for cosine)
-            distance = 1 - hit.score
-            
-            # Filter by relevance threshold
-            if distance <= distance_threshold:
-                content = hit.payload.get("content", "")
-                metadata = {k: v for k, v in hit.payload.items() if k != "content"}
-                processed.append((content, distance, metadata))
+        for hits in hits_per_query:
+            relevant = []
+            for score, content, metadata in hits:
+                # Convert similarity score to distance (1 - similarity for cosine)
+                distance = 1 - score
+                
+                # Filter by relevance threshold
+                if distance <= distance_threshold:
+                    relevant.append((content, distance, metadata))
+            processed.append(relevant)
         
-        logger.info(f"Found {len(processed)} relevant documents for query")
+        logger.info("Found %s relevant documents for %s queries", sum(len(p) for p in processed), len(queries))
         return processed
     
+    def _search_vectors(self, vectors: np.ndarray, limit: int) -> List[List[Tuple[float, str, Dict]]]:
+        """
+        Run the raw similarity search on the active backend.
+        
+        Args:
+            vectors: Array of shape (q, dim) with normalized query vectors
+            limit: Maximum number of hits per query
+            
+        Returns:
+            One list per query of (score, content, metadata), best match first
+        """
+        self.load()
+        if VectorStore._index is not None:
+            return VectorStore._index.search(vectors, limit)
+        
+        from qdrant_client.models import SearchRequest
+        from quantization import build_search_params
+        
+        search_params = build_search_params()
+        
+        if len(vectors) == 1:
+            results = [call_sync(
+                qdrant_breaker,
+                self.client.search,
+                collection_name=VectorStore._collection_name,
+                query_vector=vectors[0].tolist(),
+                limit=limit,
+                search_params=search_params
+            )]
+        else:
+            results = call_sync(
+                qdrant_breaker,
+                self.client.search_batch,
+                collection_name=VectorStore._collection_name,
+                requests=[
+                    SearchRequest(vector=vector, limit=limit, with_payload=True, params=search_params)
+                    for vector in vectors.tolist()
+                ]
+            )
+        
+        return [
+            [
+                (
+                    hit.score,
+                    hit.payload.get("content", ""),
+                    {k: v for k, v in hit.payload.items() if k != "content"}
+                )
+                for hit in hits
+            ]
+            for hits in results
+        ]
+    
     def count(self) -> int:
         """Get the number of documents in the store."""
+        if not self.is_loaded():
+            return 0
+        if VectorStore._index is not None:
+            return VectorStore._index.count()
         try:
-            info = self.client.get_collection(VectorStore._collection_name)
+            info = call_sync(qdrant_breaker, self.client.get_collection, VectorStore._collection_name, retries=0)
             return info.points_count
         except Exception:
             return 0
     
     def clear(self):
         """Clear all documents from the store."""
+        self.load()
+        if VectorStore._index is not None:
+            VectorStore._index.clear()
+            VectorStore._initialized = False
+            return
         try:
             self.client.delete_collection(VectorStore._collection_name)
             self._create_collection()
             VectorStore._initialized = False
             logger.info("Vector store cleared")
         except Exception as e:
-            logger.error(f"Error clearing vector store: {e}")
+            logger.error("Error clearing vector store: %s", e)
     
     def is_initialized(self) -> bool:
         """Check if the vector store has been populated with data."""
@@ -0,0 +1,348 @@
+"""
+WebSocket chat for the NexGenTeck AI Chatbot.
+
+A visitor keeps one connection open (/ws?session_id=...) for the whole
+conversation instead of one HTTP request per message. Each answer runs
+through the same pipeline as /chat (process_message, admission control,
+deadlines, session history) and its text is streamed back as Groq
+generates it. Sending a new message while an answer is still streaming
+cancels that answer on the server, including the Groq request.
+
+Protocol (JSON text frames):
+- client → server:
+    {"type": "message", "message": "...", "id": "optional client id"}
+    {"type": "cancel"}
+    {"type": "ping"}
+- server → client:
+    {"type": "ready", "session_id"}              once, after connecting
+    {"type": "start", "id"}                      the answer has a pipeline slot
+    {"type": "token", "id", "text"}              answer text, in order
+    {"type": "end", "id", "response"}            the full answer (replaces the
+                                                 streamed text if they differ)
+    {"type": "cancelled", "id"}
+    {"type": "error", "id", "status", "detail", "retry_after"?}
+    {"type": "pong"}
+
+Per-connection resources are capped: one answer in flight, client frames up
+to WS_MAX_MESSAGE_BYTES, and the connection is closed after
+WS_IDLE_TIMEOUT_SECONDS without a message. Open connections are limited
+per worker (WS_MAX_CONNECTIONS) and per client (WS_MAX_CONNECTIONS_PER_CLIENT);
+a newer connection for the same session replaces the older one. While
+sessions are disabled, connections have no session ("session_id": null)
+and every message is answered without history.
+"""
+
+from typing import Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from config import config
+from admission import AdmissionRejected, admission, client_id_for
+from deadlines import Deadline
+from rag_pipeline import process_message
+from sessions import session_store
+from startup import startup_tracker
+from logging_setup import request_id_var
+import metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Close codes (RFC 6455)
+CLOSE_NORMAL = 1000
+CLOSE_POLICY = 1008
+CLOSE_TOO_BIG = 1009
+CLOSE_TRY_AGAIN = 1013
+
+
+class ChatConnection:
+    """One open WebSocket: reads client frames and runs at most one answer at a time."""
+
+    def __init__(self, websocket: WebSocket, session_id: Optional[str], client_id: str,
+                 validate: Callable[[str], str]):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.key = session_id or uuid.uuid4().hex
+        self.client_id = client_id
+        self.validate = validate
+        self.request_id = request_id_var.get()
+        self.turns = 0
+        self._answer: Optional[asyncio.Task] = None
+        self._answer_id: Optional[str] = None
+        # Answer text waiting to be sent; the writer sends whatever has
+        # accumulated as one frame, so a slow client gets fewer, larger frames
+        self._pending: List[str] = []
+        self._wakeup = asyncio.Event()
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, frame: Dict):
+        """Send one JSON frame (frames from the writer and the answer never interleave)."""
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(frame))
+
+    async def send_error(self, answer_id: Optional[str], status: int, detail: str, **extra):
+        """Send an error frame, ignoring a client that is already gone."""
+        try:
+            await self.send({'type': "error", 'id': answer_id, 'status': status, 'detail': detail, **extra})
+        except Exception:
+            pass
+
+    async def close(self, code: int = CLOSE_NORMAL, reason: str = ""):
+        """Close the connection, ignoring a client that is already gone."""
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    def _on_token(self, text: str):
+        """Pipeline callback: queue answer text for the writer."""
+        self._pending.append(text)
+        self._wakeup.set()
+
+    async def _flush(self, answer_id: str):
+        """Send the answer text accumulated so far as one token frame."""
+        async with self._send_lock:
+            if not self._pending:
+                return
+            text = "".join(self._pending)
+            self._pending.clear()
+            await self.websocket.send_text(json.dumps({'type': "token", 'id': answer_id, 'text': text}))
+
+    async def _writer(self):
+        """Send queued answer text until the connection closes."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self._answer_id is None:
+                continue
+            try:
+                await self._flush(self._answer_id)
+            except Exception:
+                return  # The client is gone; run() cleans up
+
+    async def cancel_answer(self, notify: bool = True):
+        """Stop the answer in flight, if any (its Groq request is closed too)."""
+        task, answer_id = self._answer, self._answer_id
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
+        self._pending.clear()
+        if notify:
+            websocket_chat.record(cancelled=1)
+            await self.send({'type': "cancelled", 'id': answer_id})
+
+    async def _run_answer(self, answer_id: str, message: str, turn: int):
+        """Answer one message through the /chat pipeline, streaming its text."""
+        # Each turn gets its own request ID in the logs: <connection id>.<turn>
+        request_id_var.set(f"{self.request_id}.{turn}")
+        started = time.perf_counter()
+        status = "error"
+        deadline = Deadline()
+        with tracing.request_span("WS /ws", self.websocket.headers, {
+            'chatbot.session': self.session_id is not None,
+            'chatbot.message_chars': len(message),
+            'chatbot.request_id': request_id_var.get(),
+        }) as span:
+            try:
+                async with admission.admit(self.client_id, deadline):
+                    await self.send({'type': "start", 'id': answer_id})
+                    response = await process_message(message, self.session_id, deadline, on_token=self._on_token)
+                await self._flush(answer_id)
+                await self.send({'type': "end", 'id': answer_id, 'response': response})
+                status = "ok"
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            except AdmissionRejected as e:
+                status = str(e.status_code)
+                logger.warning("Shedding WebSocket message (%s): %s", e.status_code, e.reason)
+                await self.send_error(answer_id, e.status_code, f"{e.reason}. Please try again in {e.retry_after} seconds.",
+                                      retry_after=e.retry_after)
+            except Exception as e:
+                logger.error("Error answering WebSocket message: %s", e)
+                await self.send_error(answer_id, 500, "I'm having trouble processing your request. Please try again.")
+            finally:
+                span.set_attribute('chatbot.status', status)
+                metrics.REQUEST_SECONDS.labels("/ws", status).observe(time.perf_counter() - started)
+
+    async def _handle_frame(self, text: str) -> bool:
+        """
+        Act on one client frame.
+
+        Returns:
+            False if the connection should be closed
+        """
+        if len(text.encode("utf-8")) > config.WS_MAX_MESSAGE_BYTES:
+            await self.close(CLOSE_TOO_BIG, f"Frames are limited to {config.WS_MAX_MESSAGE_BYTES} bytes")
+            return False
+        try:
+            frame = json.loads(text)
+            if not isinstance(frame, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError:
+            await self.send_error(None, 400, "Frames must be JSON objects")
+            return True
+
+        kind = frame.get('type')
+        if kind == "ping":
+            await self.send({'type': "pong"})
+        elif kind == "cancel":
+            await self.cancel_answer()
+        elif kind == "message":
+            answer_id = str(frame.get('id') or uuid.uuid4().hex[:12])[:64]
+            try:
+                message = self.validate(frame.get('message') or "")
+            except ValueError as e:
+                await self.send_error(answer_id, 422, str(e))
+                return True
+            # A new message supersedes the answer still streaming
+            await self.cancel_answer()
+            self.turns += 1
+            websocket_chat.record(turns=1)
+            logger.info("Received WebSocket message: %s...", message[:100])
+            self._answer_id = answer_id
+            self._answer = asyncio.ensure_future(self._run_answer(answer_id, message, self.turns))
+        else:
+            await self.send_error(None, 400, f"Unknown frame type: {kind}")
+        return True
+
+    async def _receive(self) -> str:
+        """Next client frame as text (binary frames are decoded as UTF-8)."""
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", CLOSE_NORMAL))
+        if message.get("text") is not None:
+            return message["text"]
+        return (message.get("bytes") or b"").decode("utf-8", "replace")
+
+    async def run(self):
+        """Read frames until the client disconnects or goes idle."""
+        writer = asyncio.ensure_future(self._writer())
+        try:
+            await self.send({'type': "ready", 'session_id': self.session_id})
+            while True:
+                try:
+                    text = await asyncio.wait_for(self._receive(), config.WS_IDLE_TIMEOUT_SECONDS)
+                except asyncio.TimeoutError:
+                    if self._answer is not None and not self._answer.done():
+                        continue  # Still answering; not idle
+                    logger.info("Closing idle WebSocket connection")
+                    await self.close(CLOSE_NORMAL, "Idle timeout")
+                    return
+                if not await self._handle_frame(text):
+                    return
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await self.cancel_answer(notify=False)
+            writer.cancel()
+
+
+class WebSocketChat:
+    """Open /ws connections, their caps and counters."""
+
+    def __init__(self):
+        self._connections: Dict[str, ChatConnection] = {}  # by session ID (or a random key)
+        self._per_client: Dict[str, int] = {}
+        self.peak = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.replaced = 0
+        self.turns = 0
+        self.cancelled = 0
+
+    def record(self, **counters):
+        """Add to counters (the event loop is the only writer)."""
+        for name, value in counters.items():
+            setattr(self, name, getattr(self, name) + value)
+
+    async def serve(self, websocket: WebSocket, session_id: Optional[str], validate: Callable[[str], str]):
+        """
+        Accept a WebSocket and hold the conversation until it closes.
+
+        Args:
+            websocket: The incoming connection
+            session_id: Server-issued conversation session (a new one is issued if None,
+                unless sessions are disabled)
+            validate: Message validator (raises ValueError), as used by /chat
+        """
+        await websocket.accept()
+        client_id = client_id_for(websocket)
+
+        if startup_tracker.failed_components():
+            await websocket.close(code=CLOSE_TRY_AGAIN, reason="The chatbot is unavailable")
+            return
+        if not startup_tracker.is_ready():
+            await websocket.close(code=CLOSE_TRY_AGAIN, reason="The chatbot is still starting up")
+            return
+        if session_id is None and not session_store.disabled_reason:
+            session_id = session_store.new_session_id()
+        previous = self._connections.get(session_id) if session_id else None
+        if previous is not None:
+            # One connection per visitor: the newer tab or reconnect wins
+            self._release(previous)
+        if (len(self._connections) >= config.WS_MAX_CONNECTIONS
+                or self._per_client.get(client_id, 0) >= config.WS_MAX_CONNECTIONS_PER_CLIENT):
+            if previous is not None:
+                self._register(previous)
+            self.rejected += 1
+            logger.warning("Rejecting WebSocket connection: %s open (%s from this client)",
+                           len(self._connections), self._per_client.get(client_id, 0))
+            await websocket.close(code=CLOSE_TRY_AGAIN, reason="Too many open connections")
+            return
+
+        connection = ChatConnection(websocket, session_id, client_id, validate)
+        self._register(connection)
+        self.accepted += 1
+        self.peak = max(self.peak, len(self._connections))
+        logger.info("WebSocket connected (%s open)", len(self._connections))
+        if previous is not None:
+            self.replaced += 1
+            await previous.cancel_answer(notify=False)
+            await previous.close(CLOSE_POLICY, "Replaced by a newer connection")
+        try:
+            await connection.run()
+        finally:
+            self._release(connection)
+            logger.info("WebSocket closed after %s messages (%s open)", connection.turns, len(self._connections))
+
+    def _register(self, connection: ChatConnection):
+        self._connections[connection.key] = connection
+        self._per_client[connection.client_id] = self._per_client.get(connection.client_id, 0) + 1
+
+    def _release(self, connection: ChatConnection):
+        """Forget a connection (once)."""
+        if self._connections.get(connection.key) is not connection:
+            return
+        del self._connections[connection.key]
+        remaining = self._per_client.get(connection.client_id, 1) - 1
+        if remaining > 0:
+            self._per_client[connection.client_id] = remaining
+        else:
+            self._per_client.pop(connection.client_id, None)
+
+    def stats(self) -> Dict:
+        """Connection statistics."""
+        return {
+            'connections': len(self._connections),
+            'peak_connections': self.peak,
+            'max_connections': config.WS_MAX_CONNECTIONS,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'replaced': self.replaced,
+            'messages': self.turns,
+            'cancelled': self.cancelled,
+        }
+
+
+# Singleton instance
+websocket_chat = WebSocketChat()
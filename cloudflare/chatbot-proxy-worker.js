@@ -8,6 +8,8 @@
  *   /chatbot/*  → FastAPI chatbot on BACKEND_IP:CHATBOT_PORT  (strips /chatbot)
  *   /contact/*  → Express contact API on BACKEND_IP:CONTACT_PORT (strips /contact)
  *
+ * WebSocket upgrades (e.g. wss://.../chatbot/ws) are passed through as-is.
+ *
  * Cloudflare Workers block outbound fetch() to raw IP addresses (error 1003).
  * Workaround: use nip.io wildcard DNS so the Worker fetches a proper hostname
  * (e.g. 165-245-177-103.nip.io) which resolves to the same IP but bypasses
@@ -97,6 +99,16 @@ export default {
     // ── Build target URL ─────────────────────────────────────────────
     const targetUrl = `http://${BACKEND_HOST}:${targetPort}${strippedPath}${incoming.search}`;
 
+    // ── WebSocket upgrades (chatbot /ws) ─────────────────────────────
+    //    Forward the handshake headers unchanged; the Worker then relays
+    //    frames in both directions for the life of the connection.
+    if ((request.headers.get('Upgrade') || '').toLowerCase() === 'websocket') {
+      const upgradeHeaders = new Headers(request.headers);
+      const upgradeClientIp = request.headers.get('cf-connecting-ip');
+      if (upgradeClientIp) upgradeHeaders.set('X-Forwarded-For', upgradeClientIp);
+      return fetch(targetUrl, { headers: upgradeHeaders });
+    }
+
     // ── Build clean headers ──────────────────────────────────────────
     //    Only forward the headers the backend actually needs.
     //    Do NOT set a custom Host header – let it default to the IP:port